@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Monta (ou atualiza) o snapshot colunar de /api/analytics/pivot em disco
+
+Grava em ANALITICO_DIRETORIO (ou --diretorio) os arrays de clientes,
+contatos e contatos arquivados (src/analitico.py). Os workers carregam
+esse snapshot na primeira análise e só leem do banco o que mudou desde
+então. Se o diretório já tiver um snapshot, ele é atualizado de forma
+incremental; --completo refaz a carga inteira.
+
+Pode rodar periodicamente (cron) para encurtar a primeira análise de
+cada worker.
+
+Uso: python analytics_snapshot.py [--diretorio /var/lib/crm/analitico] [--completo]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.main import create_app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--diretorio', help='padrão: ANALITICO_DIRETORIO')
+    parser.add_argument('--completo', action='store_true', help='ignora o snapshot gravado e relê tudo')
+    args = parser.parse_args()
+
+    app = create_app()
+    diretorio = args.diretorio or app.config.get('ANALITICO_DIRETORIO')
+    if not diretorio:
+        print("❌ Informe --diretorio ou defina ANALITICO_DIRETORIO")
+        sys.exit(1)
+
+    from src import analitico
+
+    with app.app_context():
+        inicio = time.perf_counter()
+        snapshot = None if args.completo else analitico.carregar(diretorio)
+        if snapshot is None:
+            print("Carga completa")
+            snapshot = analitico.construir()
+        else:
+            print("Atualização incremental")
+            snapshot = analitico.atualizar(snapshot)
+        analitico.salvar(snapshot, diretorio)
+
+    print(f"✅ {len(snapshot.clientes['ids']) - 1} clientes, {len(snapshot.contatos)} contatos e "
+          f"{len(snapshot.arquivados)} arquivados em {diretorio} ({time.perf_counter() - inicio:.1f}s)")
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Move os contatos antigos para o arquivo compacto (contatos_arquivados)
+
+Contatos anteriores ao horizonte (ARQUIVO_HORIZONTE_DIAS, padrão 730 dias,
+arredondado para o início do mês) saem de contatos_registrados e vão,
+comprimidos, para uma linha por mês em contatos_arquivados. O último
+contato de cada cliente fica na tabela. GET /api/contatos continua
+listando os arquivados quando o período pedido alcança esses meses.
+
+Funciona em SQLite e PostgreSQL; pode rodar periodicamente (cron). No
+PostgreSQL rode VACUUM em contatos_registrados depois de um arquivamento
+grande para devolver o espaço aos índices.
+
+Uso: python archive_contatos.py [--horizonte-dias 730]
+"""
+
+import argparse
+import os
+import sys
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.main import create_app
+from src.models.user import db
+from src.arquivo import arquivar_antigos, corte_do_horizonte
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--horizonte-dias', type=int, help='padrão: ARQUIVO_HORIZONTE_DIAS')
+    args = parser.parse_args()
+
+    app = create_app()
+    horizonte = args.horizonte_dias if args.horizonte_dias is not None else app.config['ARQUIVO_HORIZONTE_DIAS']
+    print(f"Arquivando contatos anteriores a {corte_do_horizonte(horizonte)}")
+
+    with app.app_context():
+        arquivados = arquivar_antigos(db.engine, horizonte)
+
+    for mes, quantidade in sorted(arquivados.items()):
+        print(f"{mes:%Y-%m}: {quantidade} contatos")
+    print(f"✅ {sum(arquivados.values())} contato(s) arquivado(s) em {len(arquivados)} mês(es)")
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point (SERVER_MODE=asgi)
+
+Uso: gunicorn -c gunicorn.conf.py (com SERVER_MODE=asgi) ou
+     uvicorn asgi:app
+"""
+
+import os
+import sys
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.asgi import create_asgi_app
+
+app = create_asgi_app()
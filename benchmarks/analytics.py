@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Snapshot colunar, pivots de /api/analytics/pivot (src/analitico.py),
+cobertura da carteira de /api/analytics/coverage (src/cobertura.py),
+fila de trabalho dos consultores (src/fila.py) e projeção de contatos
+de /api/analytics/projection (src/projecao.py)
+
+Duas fases:
+
+1. banco: gera dados sintéticos (benchmarks/generate_data.py) num SQLite
+   temporário, ou usa --database-url sem alterar nada, e mede a carga
+   completa do snapshot, uma atualização sem mudanças, uma atualização
+   depois de inserir contatos e o pivot filial × classe × mês contra o
+   GROUP BY equivalente no banco
+2. sintética: monta em memória um snapshot com --linhas contatos
+   (dezenas de milhões) e mede a latência dos pivots mais comuns e da
+   cobertura (cálculo, ordenação por atraso e resumo por consultor), da
+   fila de trabalho (planejamento e gravação do plano) e da projeção
+   (próximas datas de todos os clientes e soma por consultor e semana)
+
+Uso: python benchmarks/analytics.py [--clientes 5000] [--linhas 20000000]
+     python benchmarks/analytics.py --database-url postgresql://localhost/crm --linhas 0
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+PIVOTS = (
+    ('filial', 'classe', 'mes'),
+    ('consultor', 'ano'),
+    ('vendedor', 'tipo_contato', 'resultado_contato'),
+    ('filial', 'classe', 'consultor', 'mes'),
+)
+
+
+def cronometrar(funcao, repeticoes=1):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    tempos.sort()
+    return resultado, round(tempos[len(tempos) // 2] * 1000, 1)
+
+
+def fase_banco(app, repeticoes, escrever):
+    from sqlalchemy import text
+    from src.models.user import db
+    from src import analitico
+
+    resultados = {}
+    with app.app_context():
+        snapshot, resultados['carga_completa_ms'] = cronometrar(lambda: analitico.construir())
+        _, resultados['atualizacao_sem_mudanca_ms'] = cronometrar(lambda: analitico.atualizar(snapshot), repeticoes)
+
+        if escrever:
+            cliente_id = db.session.execute(text('SELECT min(id) FROM clientes')).scalar()
+            tipo_id = db.session.execute(text('SELECT min(id) FROM tipos_contato')).scalar()
+            resultado_id = db.session.execute(text('SELECT min(id) FROM resultados_contato')).scalar()
+            db.session.execute(text(
+                'INSERT INTO contatos_registrados (cliente_id, data_contato, tipo_contato_id, resultado_contato_id, '
+                'vendedor, created_at, updated_at) VALUES (:c, CURRENT_DATE, :t, :r, :v, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)'
+            ), [{'c': cliente_id, 't': tipo_id, 'r': resultado_id, 'v': f'Bench {i}'} for i in range(1000)])
+            db.session.commit()
+            snapshot, resultados['atualizacao_1000_novos_ms'] = cronometrar(lambda: analitico.atualizar(snapshot))
+
+        _, resultados['pivot_ms'] = cronometrar(lambda: analitico.pivot(snapshot, ['filial', 'classe', 'mes']), repeticoes)
+        mes = "strftime('%Y-%m', c.data_contato)" if db.engine.dialect.name == 'sqlite' else "date_trunc('month', c.data_contato)"
+        group_by = text(
+            f'SELECT cl.filial, cl.classe, {mes} AS mes, count(*) '
+            'FROM contatos_registrados c LEFT JOIN clientes cl ON cl.id = c.cliente_id GROUP BY 1, 2, 3'
+        )
+        _, resultados['group_by_sql_ms'] = cronometrar(lambda: db.session.execute(group_by).all(), repeticoes)
+        resultados['contatos'] = len(snapshot.contatos) + len(snapshot.arquivados)
+    return resultados
+
+
+def snapshot_sintetico(linhas, clientes, semente):
+    import numpy as np
+    from src.analitico import Categorias, Segmento, Snapshot, EPOCA
+    from datetime import date
+
+    gerador = np.random.default_rng(semente)
+    categorias = {
+        'filial': Categorias([''] + [f'F{i:02d}' for i in range(20)]),
+        'classe': Categorias(['', 'AA', 'AM', 'AF', 'BM', 'BF', 'QQ', 'SC', 'ZZ']),
+        'consultor': Categorias([''] + [f'Consultor {i:03d}' for i in range(200)]),
+        'vendedor': Categorias([''] + [f'Vendedor {i:03d}' for i in range(300)]),
+    }
+    dados_clientes = {
+        'ids': np.arange(clientes + 1, dtype=np.int64),
+        'filial': gerador.integers(1, len(categorias['filial']), clientes + 1, dtype=np.int32),
+        'classe': gerador.integers(1, len(categorias['classe']), clientes + 1, dtype=np.int32),
+        'consultor': gerador.integers(1, len(categorias['consultor']), clientes + 1, dtype=np.int32),
+        'consultor_servicos': gerador.integers(1, len(categorias['consultor']), clientes + 1, dtype=np.int32),
+        'potencial': np.round(gerador.lognormal(9, 1.5, clientes + 1), 2),
+    }
+    dia_final = date.today().toordinal() - EPOCA
+    contatos = Segmento(
+        np.arange(1, linhas + 1, dtype=np.int64),
+        cliente=gerador.integers(1, clientes + 1, linhas, dtype=np.int32),
+        dia=gerador.integers(dia_final - 6 * 365, dia_final, linhas, dtype=np.int32),
+        tipo=gerador.integers(1, 8, linhas, dtype=np.int32),
+        resultado=gerador.integers(1, 8, linhas, dtype=np.int32),
+        vendedor=gerador.integers(1, len(categorias['vendedor']), linhas, dtype=np.int32),
+    )
+    return Snapshot(categorias, dados_clientes, contatos, Segmento(), {'clientes': None, 'contatos': None}, ())
+
+
+def fase_sintetica(app, linhas, clientes, repeticoes, escrever):
+    from datetime import date, timedelta
+    from src import analitico
+
+    snapshot = snapshot_sintetico(linhas, clientes, 42)
+    memoria = sum(getattr(snapshot.contatos, nome).nbytes for nome in analitico.Segmento.COLUNAS) + snapshot.contatos.ids.nbytes
+    resultados = {'linhas': linhas, 'memoria_mb': round(memoria / 1e6, 1), 'pivots': []}
+    with app.app_context():
+        for dimensoes in PIVOTS:
+            # A primeira chamada inclui as colunas derivadas (memorizadas)
+            _, primeira = cronometrar(lambda: analitico.pivot(snapshot, list(dimensoes)))
+            resultado, mediana = cronometrar(lambda: analitico.pivot(snapshot, list(dimensoes)), repeticoes)
+            resultados['pivots'].append({
+                'dimensoes': ','.join(dimensoes), 'grupos': resultado['grupos'], 'primeira_ms': primeira, 'ms': mediana,
+            })
+        filtros = {'data_inicio': date.today() - timedelta(days=365), 'filial': ['F01', 'F02']}
+        _, mediana = cronometrar(lambda: analitico.pivot(snapshot, ['classe', 'mes'], 'clientes', filtros), repeticoes)
+        resultados['pivots'].append({'dimensoes': 'classe,mes (clientes, 1 ano, 2 filiais)', 'ms': mediana})
+
+        from src import cobertura
+        feriados = [date(date.today().year, 12, 25), date(date.today().year + 1, 1, 1)]
+        atual, resultados['cobertura_ms'] = cronometrar(lambda: cobertura.calcular(snapshot, feriados, date.today()), repeticoes)
+        posicoes = cobertura.selecionar(atual)
+        _, resultados['cobertura_ordenar_ms'] = cronometrar(lambda: cobertura.ordenar(atual, posicoes), repeticoes)
+        _, resultados['cobertura_resumo_ms'] = cronometrar(lambda: cobertura.resumo(atual, 'consultor', posicoes), repeticoes)
+
+        from src import fila
+        plano, resultados['fila_planejar_ms'] = cronometrar(
+            lambda: fila.planejar(atual, feriados, date.today(), capacidade=20, dias=10), repeticoes
+        )
+        resultados['fila_agendados'] = len(plano.clientes)
+        if escrever:
+            _, resultados['fila_gravar_ms'] = cronometrar(lambda: fila.salvar_plano(plano, atual))
+
+        from src import projecao
+        inicio, fim = projecao.janela_padrao(date.today())
+        k = projecao.k_para_janela(atual, fim)
+        projetada, resultados['projecao_ms'] = cronometrar(lambda: projecao.projetar(atual, feriados, k), repeticoes)
+        _, resultados['projecao_semanas_ms'] = cronometrar(
+            lambda: projecao.por_semana(projetada, inicio, fim), repeticoes
+        )
+        resultados['projecao_k'] = k
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', help='banco existente (só leitura); padrão: SQLite temporário')
+    parser.add_argument('--clientes', type=int, default=5000)
+    parser.add_argument('--contatos-por-cliente', type=int, default=10)
+    parser.add_argument('--linhas', type=int, default=20_000_000, help='contatos da fase sintética (0 desliga)')
+    parser.add_argument('--clientes-sinteticos', type=int, default=100_000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='saída em JSON')
+    args = parser.parse_args()
+
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.environ['SQL_LOG_REQUISICOES'] = 'false'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(tmp, 'analitico.db')}"
+
+        from src.main import create_app
+        app = create_app()
+        if not args.database_url:
+            from src.bootstrap import bootstrap_database
+            from benchmarks.generate_data import gerar
+            bootstrap_database(app, criar_admin=False)
+            gerar(app, args.clientes, args.contatos_por_cliente)
+
+        resultados = {'banco': fase_banco(app, args.repeticoes, escrever=not args.database_url)}
+        if args.linhas:
+            resultados['sintetica'] = fase_sintetica(app, args.linhas, args.clientes_sinteticos, args.repeticoes, escrever=not args.database_url)
+
+    if args.json:
+        print(json.dumps(resultados, ensure_ascii=False, indent=2))
+        return
+
+    banco = resultados['banco']
+    print(f"Banco ({banco['contatos']} contatos)")
+    for chave in ('carga_completa_ms', 'atualizacao_sem_mudanca_ms', 'atualizacao_1000_novos_ms', 'pivot_ms', 'group_by_sql_ms'):
+        if chave in banco:
+            print(f"  {chave:<30} {banco[chave]:>10} ms")
+    if 'sintetica' in resultados:
+        sintetica = resultados['sintetica']
+        print(f"Sintética ({sintetica['linhas']} contatos, {sintetica['memoria_mb']} MB)")
+        print(f"  {'dimensões':<45} {'grupos':>8} {'1ª (ms)':>9} {'ms':>9}")
+        for p in sintetica['pivots']:
+            print(f"  {p['dimensoes']:<45} {p.get('grupos', ''):>8} {p.get('primeira_ms', ''):>9} {p['ms']:>9}")
+        print(f"Cobertura ({args.clientes_sinteticos} clientes)")
+        for chave in ('cobertura_ms', 'cobertura_ordenar_ms', 'cobertura_resumo_ms'):
+            print(f"  {chave:<30} {sintetica[chave]:>10} ms")
+        print(f"Fila de trabalho ({sintetica['fila_agendados']} clientes agendados, 200 consultores)")
+        for chave in ('fila_planejar_ms', 'fila_gravar_ms'):
+            if chave in sintetica:
+                print(f"  {chave:<30} {sintetica[chave]:>10} ms")
+        print(f"Projeção ({sintetica['projecao_k']} datas por cliente, 13 semanas)")
+        for chave in ('projecao_ms', 'projecao_semanas_ms'):
+            print(f"  {chave:<30} {sintetica[chave]:>10} ms")
+
+
+if __name__ == '__main__':
+    main()
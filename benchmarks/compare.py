@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Compara dois resultados de benchmarks/run.py
+
+Mostra, por rota, p95 e consultas por requisição antes e depois, e a
+fase de carga HTTP (req/s e p95) por modo e concorrência. Sai com
+código 1 se alguma rota piorar além do limite:
+
+- p95 mais de --limite por cento acima (ignora rotas abaixo de --minimo-ms,
+  onde o ruído domina)
+- mais consultas por requisição (média) que antes
+
+Uso: python benchmarks/compare.py antes.json depois.json [--limite 20]
+"""
+
+import argparse
+import json
+import sys
+
+
+def carregar(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def variacao(antes, depois):
+    if not antes:
+        return None
+    return (depois - antes) / antes * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('antes')
+    parser.add_argument('depois')
+    parser.add_argument('--limite', type=float, default=20.0, help='piora máxima do p95 (%%)')
+    parser.add_argument('--minimo-ms', type=float, default=2.0, help='p95 abaixo disso não conta como regressão')
+    args = parser.parse_args()
+
+    antes, depois = carregar(args.antes), carregar(args.depois)
+    print(f"antes:  {antes['commit']} ({antes['data']})")
+    print(f"depois: {depois['commit']} ({depois['data']})")
+    if antes['parametros'] != depois['parametros']:
+        print('⚠️  parâmetros diferentes entre as execuções; a comparação pode não ser justa')
+
+    regressoes = []
+    print(f"\n{'rota':<36} {'p95 antes':>10} {'p95 depois':>11} {'var.':>8} {'consultas':>12}")
+    for endpoint in sorted(set(antes['rotas']) | set(depois['rotas'])):
+        a, d = antes['rotas'].get(endpoint), depois['rotas'].get(endpoint)
+        if a is None or d is None:
+            print(f"{endpoint:<36} {'nova' if a is None else 'removida':>31}")
+            continue
+
+        var = variacao(a['p95_ms'], d['p95_ms'])
+        marca = ''
+        if var is not None and var > args.limite and d['p95_ms'] >= args.minimo_ms:
+            regressoes.append(f"{endpoint}: p95 {a['p95_ms']} → {d['p95_ms']} ms ({var:+.0f}%)")
+            marca = ' ❌'
+        if d['consultas_media'] > a['consultas_media']:
+            regressoes.append(f"{endpoint}: consultas {a['consultas_media']} → {d['consultas_media']}")
+            marca = ' ❌'
+
+        texto_var = f'{var:+.0f}%' if var is not None else '-'
+        consultas = f"{a['consultas_media']:g} → {d['consultas_media']:g}"
+        print(f"{endpoint:<36} {a['p95_ms']:>10} {d['p95_ms']:>11} {texto_var:>8} {consultas:>12}{marca}")
+
+    carga_antes = {(r['modo'], r['concorrencia']): r for r in antes.get('carga', [])}
+    if depois.get('carga'):
+        print(f"\n{'carga':<16} {'req/s antes':>12} {'req/s depois':>13} {'p95 antes':>10} {'p95 depois':>11}")
+    for r in depois.get('carga', []):
+        a = carga_antes.get((r['modo'], r['concorrencia']), {})
+        print(f"{r['modo'] + ' c=' + str(r['concorrencia']):<16} {a.get('rps', '-')!s:>12} {r['rps']:>13} "
+              f"{a.get('p95_ms', '-')!s:>10} {r['p95_ms']!s:>11}")
+
+    if regressoes:
+        print(f'\n❌ {len(regressoes)} regressão(ões):')
+        for regressao in regressoes:
+            print(f'  - {regressao}')
+        sys.exit(1)
+    print('\n✅ Sem regressões')
+
+
+if __name__ == '__main__':
+    main()
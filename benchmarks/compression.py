@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Custo de CPU x bytes economizados na compressão das respostas
+
+Gera dados sintéticos (benchmarks/generate_data.py), obtém as respostas
+JSON reais das rotas mais pesadas (agenda, notificações, contatos,
+clientes e estatísticas) sem compressão e mede, para cada codec e nível
+usados por src/compressao.py, o tamanho comprimido e o tempo de CPU.
+
+Uso: python benchmarks/compression.py [--clientes 5000] [--repeticoes 20] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+ROTAS = (
+    '/api/agenda?per_page=100',
+    '/api/agenda?per_page=1000',
+    '/api/agenda/notifications',
+    '/api/agenda/grouped',
+    '/api/contatos?per_page=200',
+    '/api/clientes?per_page=100',
+    '/api/dashboard/stats',
+    '/api/clientes/stats',
+)
+
+# (codificação, nível)
+CODECS = (('gzip', 1), ('gzip', 6), ('gzip', 9), ('zstd', 1), ('zstd', 3), ('zstd', 9))
+
+
+def medir(dados, codificacao, nivel, repeticoes):
+    from src.compressao import comprimir
+
+    config = {'COMPRESSAO_NIVEL_GZIP': nivel, 'COMPRESSAO_NIVEL_ZSTD': nivel}
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.process_time()
+        comprimido = comprimir(dados, codificacao, config)
+        tempos.append(time.process_time() - inicio)
+    tempos.sort()
+    return len(comprimido), tempos[len(tempos) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clientes', type=int, default=5000)
+    parser.add_argument('--contatos-por-cliente', type=int, default=10)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='saída em JSON')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'compressao.db')}"
+        os.environ.setdefault('FLASK_ENV', 'production')
+        os.environ['SQL_LOG_REQUISICOES'] = 'false'
+        os.environ['COMPRESSAO_ATIVA'] = 'false'
+
+        from src.main import create_app
+        from src.bootstrap import bootstrap_database
+        from src.compressao import zstandard
+        from benchmarks.generate_data import gerar
+
+        app = create_app()
+        bootstrap_database(app, criar_admin=False)
+        gerar(app, args.clientes, args.contatos_por_cliente)
+
+        cliente = app.test_client()
+        token = cliente.post('/api/login', json={'email': 'admin@crm.com', 'password': 'admin123'}).get_json()['token']
+        corpos = {
+            rota: cliente.get(rota, headers={'Authorization': f'Bearer {token}'}).get_data()
+            for rota in ROTAS
+        }
+
+    resultados = []
+    for rota, dados in corpos.items():
+        for codificacao, nivel in CODECS:
+            if codificacao == 'zstd' and zstandard is None:
+                continue
+            tamanho, cpu_ms = medir(dados, codificacao, nivel, args.repeticoes)
+            resultados.append({
+                'rota': rota,
+                'codec': f'{codificacao}-{nivel}',
+                'bytes': len(dados),
+                'comprimido': tamanho,
+                'economia_pct': round(100 * (1 - tamanho / len(dados)), 1),
+                'cpu_ms': round(cpu_ms, 3),
+                'mb_s': round(len(dados) / 1e6 / (cpu_ms / 1000), 1) if cpu_ms else None,
+            })
+
+    if args.json:
+        print(json.dumps(resultados, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{'rota':<30} {'codec':<8} {'bytes':>9} {'comprimido':>11} {'economia':>9} {'CPU (ms)':>9} {'MB/s':>7}")
+    for r in resultados:
+        print(f"{r['rota']:<30} {r['codec']:<8} {r['bytes']:>9} {r['comprimido']:>11} "
+              f"{r['economia_pct']:>8}% {r['cpu_ms']:>9} {r['mb_s']!s:>7}")
+
+
+if __name__ == '__main__':
+    main()
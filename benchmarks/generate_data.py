@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Gerador de dados sintéticos do CRM (reprodutível)
+
+Popula um banco SQLite ou PostgreSQL com volumes realistas:
+- usuários: o master padrão (admin@crm.com / admin123) e N vendedores
+- tipos e resultados de contato e feriados nacionais de todo o período
+- clientes distribuídos entre filiais, municípios e as classes reais de
+  CADENCIA_DIAS (AA, a de cadência semanal, mais rara)
+- contatos: em média M por cliente (mais nas classes de cadência curta), ao
+  longo de --anos anos, com próximo contato pela cadência da classe em dia
+  útil (mesma regra de calcular_proximo_contato)
+
+A mesma --seed gera sempre os mesmos dados. A escrita usa executemany em
+lotes (SQLite sem fsync) ou COPY no PostgreSQL.
+
+Uso:
+    python benchmarks/generate_data.py --database-url sqlite:////tmp/crm.db \\
+        --clientes 20000 --contatos-por-cliente 15 --anos 3
+"""
+
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from src.models.cliente import CADENCIA_DIAS, CADENCIA_PADRAO_DIAS, cadencia_dias  # noqa: E402
+
+# clientes.filial é VARCHAR(10)
+FILIAIS = ['Matriz', 'Campinas', 'Rib Preto', 'Sorocaba', 'Bauru',
+           'SJ R Preto', 'P Prudente', 'Marília']
+MUNICIPIOS_POR_FILIAL = 12
+# Peso de cada classe na carteira (AA/AM = clientes estratégicos, poucos);
+# o intervalo entre contatos vem de CADENCIA_DIAS
+CLASSES = {'AA': 0.05, 'AM': 0.1, 'AF': 0.15, 'BM': 0.2, 'BF': 0.2, 'ZZ': 0.1, 'QQ': 0.1, 'SC': 0.1}
+assert set(CLASSES) == set(CADENCIA_DIAS)
+STATUS_6M = ['Ativo', 'Ativo', 'Ativo', 'Inativo']
+
+TIPOS_CONTATO = [('VIS', 'Visita'), ('TEL', 'Telefone'), ('WPP', 'WhatsApp'),
+                 ('EML', 'E-mail'), ('VID', 'Videochamada')]
+RESULTADOS_CONTATO = [('VEN', 'Venda realizada'), ('ORC', 'Orçamento enviado'),
+                      ('RET', 'Retornar contato'), ('SEM', 'Sem interesse'),
+                      ('NAT', 'Não atendeu')]
+# Feriados nacionais de data fixa (mês, dia, descrição)
+FERIADOS_FIXOS = [(1, 1, 'Confraternização Universal'), (4, 21, 'Tiradentes'),
+                  (5, 1, 'Dia do Trabalho'), (9, 7, 'Independência'),
+                  (10, 12, 'Nossa Senhora Aparecida'), (11, 2, 'Finados'),
+                  (11, 15, 'Proclamação da República'), (12, 25, 'Natal')]
+
+LOTE = 5000
+
+
+def _linhas_clientes(rng, quantidade, consultores, agora):
+    classes, pesos = zip(*CLASSES.items())
+    for i in range(quantidade):
+        filial_idx = rng.randrange(len(FILIAIS))
+        classe = rng.choices(classes, pesos)[0]
+        estrategico = cadencia_dias(classe) < CADENCIA_PADRAO_DIAS
+        potencial = round(rng.lognormvariate(9, 1) * (4 if estrategico else 1), 2)
+        yield {
+            'nome': f'Cliente {i + 1:07d} Ltda',
+            'cod_cliente': 100000 + i,
+            'municipio': f'{FILIAIS[filial_idx]} {rng.randrange(MUNICIPIOS_POR_FILIAL) + 1:02d}',
+            'filial': FILIAIS[filial_idx],
+            'potencial_pecas': potencial,
+            'potencial_servico': round(potencial * rng.uniform(0.2, 0.6), 2),
+            'status_6m': rng.choice(STATUS_6M),
+            'ultima_mov': agora.date() - timedelta(days=rng.randrange(365)),
+            'classe': classe,
+            'consultor_pecas': rng.choice(consultores),
+            'consultor_servicos': rng.choice(consultores),
+            'hash_conteudo': None,
+            'created_at': agora,
+            'updated_at': agora,
+        }
+
+
+def _proximo_contato(data_contato, classe, feriados):
+    """Data + cadência da classe, levada ao próximo dia útil (calcular_proximo_contato)"""
+    proximo = data_contato + timedelta(days=cadencia_dias(classe))
+    while proximo.weekday() >= 5 or proximo in feriados:
+        proximo += timedelta(days=1)
+    return proximo
+
+
+def _linhas_contatos(rng, clientes, media_por_cliente, anos, vendedores, tipos, resultados, agora, feriados):
+    hoje = agora.date()
+    dias = 365 * anos
+    for cliente_id, classe in clientes:
+        # Cadência curta (AA, AM) recebe mais contatos que a média, bimestral menos
+        fator = (CADENCIA_PADRAO_DIAS / cadencia_dias(classe)) ** 0.5
+        quantidade = max(0, int(rng.gauss(media_por_cliente * fator, media_por_cliente * 0.3)))
+        datas = sorted(hoje - timedelta(days=rng.randrange(dias)) for _ in range(quantidade))
+        vendedor = rng.choice(vendedores)
+        for n, data_contato in enumerate(datas):
+            ultimo = n == len(datas) - 1
+            hora = datetime.combine(data_contato, datetime.min.time()) + timedelta(minutes=rng.randrange(8 * 60, 18 * 60))
+            yield {
+                'cliente_id': cliente_id,
+                'data_contato': data_contato,
+                'tipo_contato_id': rng.choice(tipos),
+                'resultado_contato_id': rng.choice(resultados),
+                'observacao': 'Contato gerado para benchmark' if rng.random() < 0.7 else None,
+                # Só o último contato de cada cliente costuma ter agendamento em aberto
+                'vendedor': vendedor if rng.random() < 0.85 else rng.choice(vendedores),
+                'proximo_contato': _proximo_contato(data_contato, classe, feriados) if ultimo or rng.random() < 0.2 else None,
+                'hora_contato': hora,
+                'created_at': hora,
+                'updated_at': hora,
+            }
+
+
+def _gravar(conn, tabela, linhas, postgres):
+    """Grava linhas (dicts) em lotes; no PostgreSQL usa COPY"""
+    total = 0
+    lote = []
+
+    def descarregar():
+        nonlocal total
+        if not lote:
+            return
+        colunas = list(lote[0].keys())
+        if postgres:
+            buffer = io.StringIO()
+            escritor = csv.writer(buffer)
+            for linha in lote:
+                escritor.writerow(['\\N' if linha[c] is None else linha[c] for c in colunas])
+            buffer.seek(0)
+            cursor = conn.connection.dbapi_connection.cursor()
+            cursor.copy_expert(
+                f"COPY {tabela} ({', '.join(colunas)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+            )
+        else:
+            conn.exec_driver_sql(
+                f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' for _ in colunas)})",
+                [tuple(linha[c] for c in colunas) for linha in lote]
+            )
+        total += len(lote)
+        lote.clear()
+
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= LOTE:
+            descarregar()
+    descarregar()
+    return total
+
+
+def planilha_clientes(quantidade, inicio):
+    """Arquivo .xlsx em memória no formato do template de importação"""
+    from openpyxl import Workbook
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Clientes'
+    ws.append(['COD_CLIENTE', 'NOME', 'MUNICIPIO', 'FILIAL', 'CLASSE',
+               'POTENCIAL_PECAS', 'POTENCIAL_SERVICO', 'STATUS_6M',
+               'CONSULTOR_PECAS', 'CONSULTOR_SERVICOS'])
+    for i in range(inicio, inicio + quantidade):
+        ws.append([i, f'Importado {i}', 'Municipio', 'Filial 1', 'AF', 10.0, 5.0, 'Ativo', 'P', 'S'])
+    arquivo = io.BytesIO()
+    wb.save(arquivo)
+    arquivo.seek(0)
+    return arquivo
+
+
+def gerar(app, clientes=1000, contatos_por_cliente=10, anos=2, usuarios=10, seed=42, limpar=True):
+    """Popula o banco do app com dados sintéticos e retorna as contagens"""
+    from werkzeug.security import generate_password_hash
+    from src.models.user import db
+    from src.models.contato import incrementar_versao_referencias
+
+    rng = random.Random(seed)
+    # Datas relativas a hoje para a agenda ter atrasados, hoje e futuros
+    agora = datetime.combine(date.today(), datetime.min.time())
+    contagens = {}
+
+    with app.app_context():
+        engine = db.engine
+        postgres = engine.dialect.name == 'postgresql'
+
+        with engine.begin() as conn:
+            if engine.dialect.name == 'sqlite':
+                conn.exec_driver_sql('PRAGMA synchronous = OFF')
+
+            if limpar:
+                for tabela in ('contatos_registrados', 'clientes', 'feriados', 'tipos_contato',
+                               'resultados_contato', 'auditoria', 'users'):
+                    conn.exec_driver_sql(f'DELETE FROM {tabela}')
+
+            # Um único hash para todos os vendedores (gerar um por usuário é lento)
+            senha_hash = generate_password_hash('vendedor123')
+            vendedores = [f'Vendedor {i + 1:03d}' for i in range(usuarios)]
+            contagens['usuarios'] = _gravar(conn, 'users', [{
+                'nome': 'Administrador', 'email': 'admin@crm.com',
+                'senha_hash': generate_password_hash('admin123'), 'perfil': 'master',
+                'cargo': 'Administrador', 'departamento': 'TI', 'filial': None,
+                'ativo': True, 'created_at': agora, 'updated_at': agora,
+            }] + [{
+                'nome': nome, 'email': f'vendedor{i + 1:03d}@crm.com', 'senha_hash': senha_hash,
+                'perfil': 'vendedor', 'cargo': 'Consultor', 'departamento': 'Vendas',
+                'filial': FILIAIS[i % len(FILIAIS)], 'ativo': True,
+                'created_at': agora, 'updated_at': agora,
+            } for i, nome in enumerate(vendedores)], postgres)
+
+            contagens['tipos_contato'] = _gravar(conn, 'tipos_contato', [
+                {'codigo': codigo, 'descricao': descricao, 'ativo': True} for codigo, descricao in TIPOS_CONTATO
+            ], postgres)
+            contagens['resultados_contato'] = _gravar(conn, 'resultados_contato', [
+                {'codigo': codigo, 'descricao': descricao, 'ativo': True} for codigo, descricao in RESULTADOS_CONTATO
+            ], postgres)
+
+            ano_final = agora.year + 1
+            feriados = [
+                {'data': date(ano, mes, dia), 'descricao': descricao}
+                for ano in range(agora.year - anos, ano_final + 1)
+                for mes, dia, descricao in FERIADOS_FIXOS
+            ]
+            contagens['feriados'] = _gravar(conn, 'feriados', feriados, postgres)
+
+            contagens['clientes'] = _gravar(
+                conn, 'clientes', _linhas_clientes(rng, clientes, vendedores, agora), postgres
+            )
+            ids = conn.exec_driver_sql('SELECT id, classe FROM clientes ORDER BY id').fetchall()
+            tipos = [id_ for (id_,) in conn.exec_driver_sql('SELECT id FROM tipos_contato ORDER BY id')]
+            resultados = [id_ for (id_,) in conn.exec_driver_sql('SELECT id FROM resultados_contato ORDER BY id')]
+            contagens['contatos'] = _gravar(
+                conn, 'contatos_registrados',
+                _linhas_contatos(rng, ids, contatos_por_cliente, anos, vendedores, tipos, resultados, agora,
+                                 {feriado['data'] for feriado in feriados}), postgres
+            )
+            # Tipos, resultados e feriados mudaram: processos em execução recarregam
+            incrementar_versao_referencias(conn)
+
+        if postgres:
+            with engine.begin() as conn:
+                conn.exec_driver_sql('ANALYZE')
+
+    return contagens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'),
+                        help='padrão: DATABASE_URL (ou o SQLite de desenvolvimento)')
+    parser.add_argument('--clientes', type=int, default=1000)
+    parser.add_argument('--contatos-por-cliente', type=int, default=10)
+    parser.add_argument('--anos', type=int, default=2)
+    parser.add_argument('--usuarios', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--manter', action='store_true', help='não apagar os dados existentes')
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    os.environ.setdefault('FLASK_ENV', 'production')
+
+    from src.main import create_app
+    from src.bootstrap import bootstrap_database
+
+    app = create_app()
+    bootstrap_database(app, criar_admin=False)
+
+    inicio = time.perf_counter()
+    contagens = gerar(app, args.clientes, args.contatos_por_cliente, args.anos,
+                      args.usuarios, args.seed, limpar=not args.manter)
+    decorrido = time.perf_counter() - inicio
+
+    for tabela, quantidade in contagens.items():
+        print(f"{tabela:>20}: {quantidade}")
+    print(f"✅ Dados gerados em {decorrido:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Perfil de importação do worker web (python -X importtime)
+
+Executa, num processo novo, o mesmo caminho de inicialização de um worker
+(importar src.main e chamar create_app) com -X importtime e:
+
+- lista os módulos com maior tempo acumulado de importação
+- falha (exit 1) se algum módulo pesado proibido for importado
+  (pandas, numpy, openpyxl só devem carregar no primeiro uso)
+- falha se o tempo total de importação passar do orçamento
+
+Por isso os módulos que usam NumPy (src.analitico, src.cobertura, src.fila,
+src.projecao) são importados dentro das rotas, nunca no topo de um módulo de
+rotas: o NumPy só carrega na primeira requisição que precisa dele.
+
+Uso: python benchmarks/importtime.py [--budget-ms 1000] [--top 15]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que o processo web não deve importar na inicialização
+PROIBIDOS = ('pandas', 'numpy', 'openpyxl')
+
+WORKER = (
+    "import sys; sys.path.insert(0, {raiz!r}); "
+    "from src.main import create_app; create_app()"
+)
+
+LINHA = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def perfilar():
+    env = dict(os.environ)
+    env.setdefault('FLASK_ENV', 'production')
+    saida = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', WORKER.format(raiz=RAIZ)],
+        env=env, capture_output=True, text=True, check=True
+    )
+
+    modulos = []
+    for linha in saida.stderr.splitlines():
+        m = LINHA.match(linha)
+        if m:
+            proprio, acumulado, indentacao, nome = m.groups()
+            modulos.append({
+                'modulo': nome,
+                'proprio_us': int(proprio),
+                'acumulado_us': int(acumulado),
+                'nivel': len(indentacao) // 2
+            })
+    return modulos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=1000.0,
+                        help='orçamento para a soma dos imports de nível superior')
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    modulos = perfilar()
+    total_ms = sum(m['acumulado_us'] for m in modulos if m['nivel'] == 0) / 1000
+
+    print(f"{'acumulado (ms)':>15}  {'próprio (ms)':>13}  módulo")
+    for m in sorted(modulos, key=lambda m: m['acumulado_us'], reverse=True)[:args.top]:
+        print(f"{m['acumulado_us'] / 1000:>15.1f}  {m['proprio_us'] / 1000:>13.1f}  {m['modulo']}")
+    print(f"\nTotal de importação: {total_ms:.1f} ms (orçamento {args.budget_ms:.0f} ms)")
+
+    falhas = []
+    importados = {m['modulo'] for m in modulos}
+    for nome in PROIBIDOS:
+        if nome in importados:
+            falhas.append(f'módulo pesado importado na inicialização: {nome}')
+    if total_ms > args.budget_ms:
+        falhas.append(f'tempo de importação {total_ms:.1f} ms acima do orçamento de {args.budget_ms:.0f} ms')
+
+    if falhas:
+        for falha in falhas:
+            print(f"❌ {falha}")
+        sys.exit(1)
+    print("✅ Inicialização dentro do orçamento")
+
+
+if __name__ == '__main__':
+    main()
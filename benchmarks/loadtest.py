@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Teste de carga: modo WSGI (gthread) x modo ASGI (Uvicorn)
+
+Sobe o Gunicorn em cada modo (SERVER_MODE) sobre o mesmo banco SQLite
+populado com dados sintéticos e dispara N clientes concorrentes com
+conexões keep-alive contra as leituras mais acessadas. Para cada modo e
+nível de concorrência mostra requisições por segundo, p50, p99 e erros.
+
+O cliente HTTP usa só asyncio (sem dependências). Com --url o teste roda
+contra um servidor já em execução (por exemplo o Postgres de staging).
+
+Uso:
+    python benchmarks/loadtest.py [--concurrency 50 200 1000] [--duration 10]
+    python benchmarks/loadtest.py --url http://localhost:8080 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# Factories (wsgi.py fixa o DATABASE_URL de produção)
+APPS = {
+    'wsgi': 'src.main:create_app()',
+    'asgi': 'src.asgi:create_asgi_app()',
+}
+
+PATHS = (
+    '/api/clientes?search=1&per_page=20',
+    '/api/agenda?per_page=20',
+    '/api/dashboard/stats',
+)
+
+
+def popular(database_url, clientes, contatos_por_cliente):
+    """Cria o banco e insere dados sintéticos (benchmarks/generate_data.py)"""
+    os.environ['DATABASE_URL'] = database_url
+    from src.main import create_app
+    from src.bootstrap import bootstrap_database
+    from benchmarks.generate_data import gerar
+
+    app = create_app()
+    bootstrap_database(app, criar_admin=False)
+    return gerar(app, clientes=clientes, contatos_por_cliente=contatos_por_cliente)
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def subir_servidor(modo, workers, threads, env):
+    porta = porta_livre()
+    env = dict(env, SERVER_MODE=modo, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads))
+    processo = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+         '--bind', f'127.0.0.1:{porta}', '--log-level', 'warning',
+         '--access-logfile', '/dev/null', APPS[modo]],
+        cwd=RAIZ, env=env
+    )
+    url = f'http://127.0.0.1:{porta}'
+    fim = time.time() + 60
+    while time.time() < fim:
+        try:
+            urllib.request.urlopen(url + '/health', timeout=1).read()
+            return processo, url
+        except OSError:
+            time.sleep(0.2)
+    processo.kill()
+    raise RuntimeError(f'Servidor {modo} não respondeu a tempo')
+
+
+async def _cliente(host, porta, paths, fim, latencias, erros, indice, cabecalhos=''):
+    leitor = escritor = None
+    i = indice
+    while time.perf_counter() < fim:
+        path = paths[i % len(paths)]
+        i += 1
+        inicio = time.perf_counter()
+        try:
+            if escritor is None:
+                leitor, escritor = await asyncio.open_connection(host, porta)
+            escritor.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\n{cabecalhos}\r\n'.encode())
+            await escritor.drain()
+
+            cabecalho = await leitor.readuntil(b'\r\n\r\n')
+            linhas = cabecalho.decode('latin-1').split('\r\n')
+            status = int(linhas[0].split()[1])
+            tamanho, fechar = 0, False
+            for linha in linhas[1:]:
+                nome, _, valor = linha.partition(':')
+                nome = nome.strip().lower()
+                if nome == 'content-length':
+                    tamanho = int(valor)
+                elif nome == 'connection' and valor.strip().lower() == 'close':
+                    fechar = True
+            await leitor.readexactly(tamanho)
+
+            latencias.append(time.perf_counter() - inicio)
+            if status >= 400:
+                erros.append(status)
+            if fechar:
+                escritor.close()
+                escritor = None
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            erros.append(type(e).__name__)
+            if escritor is not None:
+                escritor.close()
+            escritor = None
+            await asyncio.sleep(0.01)
+    if escritor is not None:
+        escritor.close()
+
+
+async def disparar(url, concorrencia, duracao, paths, cabecalhos=None):
+    partes = urlsplit(url)
+    host, porta = partes.hostname, partes.port or 80
+    latencias, erros = [], []
+    extras = ''.join(f'{nome}: {valor}\r\n' for nome, valor in (cabecalhos or {}).items())
+    fim = time.perf_counter() + duracao
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        _cliente(host, porta, paths, fim, latencias, erros, i, extras) for i in range(concorrencia)
+    ))
+    decorrido = time.perf_counter() - inicio
+
+    latencias.sort()
+
+    def percentil(p):
+        if not latencias:
+            return None
+        return round(latencias[min(len(latencias) - 1, int(len(latencias) * p))] * 1000, 1)
+
+    return {
+        'concorrencia': concorrencia,
+        'requisicoes': len(latencias),
+        'rps': round(len(latencias) / decorrido, 1),
+        'p50_ms': percentil(0.50),
+        'p95_ms': percentil(0.95),
+        'p99_ms': percentil(0.99),
+        'erros': len(erros)
+    }
+
+
+def aumentar_limite_arquivos():
+    suave, rigido = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (rigido, rigido))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', choices=sorted(APPS), default=['wsgi', 'asgi'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[50, 200, 1000])
+    parser.add_argument('--duration', type=float, default=10.0, help='segundos por medição')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4, help='threads por worker no modo WSGI')
+    parser.add_argument('--clientes', type=int, default=5000)
+    parser.add_argument('--contatos-por-cliente', type=int, default=10)
+    parser.add_argument('--url', help='servidor já em execução (não sobe o Gunicorn)')
+    args = parser.parse_args()
+
+    aumentar_limite_arquivos()
+    resultados = []
+
+    if args.url:
+        for concorrencia in args.concurrency:
+            resultado = asyncio.run(disparar(args.url, concorrencia, args.duration, PATHS))
+            resultados.append({'modo': args.url, **resultado})
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ)
+            env['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'loadtest.db')}"
+            env.setdefault('FLASK_ENV', 'production')
+            popular(env['DATABASE_URL'], args.clientes, args.contatos_por_cliente)
+
+            for modo in args.modes:
+                processo, url = subir_servidor(modo, args.workers, args.threads, env)
+                try:
+                    for concorrencia in args.concurrency:
+                        resultado = asyncio.run(disparar(url, concorrencia, args.duration, PATHS))
+                        resultados.append({'modo': modo, **resultado})
+                        print(json.dumps(resultados[-1]), file=sys.stderr)
+                finally:
+                    processo.send_signal(signal.SIGTERM)
+                    processo.wait(timeout=30)
+
+    print(f"\n{'modo':<8} {'conc.':>6} {'req/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'erros':>6}")
+    for r in resultados:
+        print(f"{r['modo']:<8} {r['concorrencia']:>6} {r['rps']:>9} {r['p50_ms']!s:>9} {r['p99_ms']!s:>9} {r['erros']:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Consultas quentes do dashboard e da agenda com e sem particionamento
+
+Popula um PostgreSQL com dados sintéticos (benchmarks/generate_data.py,
+padrão ~10 milhões de contatos), mede os SELECTs de src/consultas.py e a
+listagem de contatos por período na tabela comum, converte
+contatos_registrados em particionada (src/particionamento.py) e mede de
+novo. Para cada consulta: mediana em ms, partições lidas e blocos
+(shared buffers) tocados, via EXPLAIN (ANALYZE, BUFFERS).
+
+O banco informado é apagado. Exemplo (execução rápida):
+    python benchmarks/partitioning.py --database-url postgresql://localhost/crm_bench \\
+        --clientes 50000 --contatos-por-cliente 10
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+_PARTICAO = re.compile(r' on (contatos_registrados_\w+)')
+_BUFFERS = re.compile(r'Buffers: shared(?: hit=(\d+))?(?: read=(\d+))?')
+
+
+def consultas(hoje):
+    """{nome: SELECT} das consultas medidas"""
+    from sqlalchemy import select, desc
+    from src.consultas import consultas_dashboard, consulta_agenda
+    from src.models.cliente import Cliente
+    from src.models.contato import ContatoRegistrado
+
+    mes = {'data_inicio': (hoje - timedelta(days=30)).isoformat(), 'data_fim': hoje.isoformat()}
+    trimestre = {'data_inicio': (hoje - timedelta(days=90)).isoformat(), 'data_fim': hoje.isoformat()}
+    dashboard_mes = consultas_dashboard(mes, hoje)
+    dashboard_trimestre = consultas_dashboard(trimestre, hoje)
+    dashboard_total = consultas_dashboard({}, hoje)
+
+    return {
+        'dashboard total (30 dias)': dashboard_mes['total_contatos'],
+        'dashboard por_tipo (30 dias)': dashboard_mes['por_tipo'],
+        'dashboard por_vendedor (90 dias)': dashboard_trimestre['por_vendedor'],
+        'dashboard total (sem filtro)': dashboard_total['total_contatos'],
+        'dashboard contatos_atrasados': dashboard_total['contatos_atrasados'],
+        'agenda (página 1)': consulta_agenda({}, hoje).limit(50),
+        'agenda atrasados (página 1)': consulta_agenda({'apenas_atrasados': 'true'}, hoje).limit(50),
+        'contatos (30 dias, página 1)': select(ContatoRegistrado).join(Cliente).where(
+            ContatoRegistrado.data_contato >= hoje - timedelta(days=30),
+            ContatoRegistrado.data_contato <= hoje
+        ).order_by(desc(ContatoRegistrado.data_contato), desc(ContatoRegistrado.hora_contato)).limit(50),
+    }
+
+
+def medir(engine, stmts, repeticoes):
+    """{nome: {ms, particoes, buffers}}"""
+    resultados = {}
+    with engine.connect() as conn:
+        for nome, stmt in stmts.items():
+            conn.execute(stmt).all()  # aquecimento
+            tempos = []
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                conn.execute(stmt).all()
+                tempos.append((time.perf_counter() - inicio) * 1000)
+
+            sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True}))
+            plano = '\n'.join(linha for (linha,) in conn.exec_driver_sql(
+                f'EXPLAIN (ANALYZE, BUFFERS) {sql}'.replace('%', '%%')
+            ))
+            buffers = _BUFFERS.search(plano)
+            resultados[nome] = {
+                'ms': round(statistics.median(tempos), 2),
+                'particoes': len(set(_PARTICAO.findall(plano))),
+                'buffers': sum(int(g or 0) for g in buffers.groups()) if buffers else None,
+            }
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'), help='PostgreSQL (será apagado)')
+    parser.add_argument('--clientes', type=int, default=500000)
+    parser.add_argument('--contatos-por-cliente', type=int, default=20)
+    parser.add_argument('--anos', type=int, default=5)
+    parser.add_argument('--granularidade', choices=('ano', 'trimestre'), default='ano')
+    parser.add_argument('--repeticoes', type=int, default=10)
+    parser.add_argument('--json', action='store_true', help='saída em JSON')
+    args = parser.parse_args()
+
+    if not args.database_url or not args.database_url.startswith(('postgres://', 'postgresql')):
+        parser.error('--database-url precisa ser um PostgreSQL')
+
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.environ['SQL_LOG_REQUISICOES'] = 'false'
+
+    from sqlalchemy import text
+    from src.main import create_app
+    from src.bootstrap import bootstrap_database
+    from src.models.user import db
+    from src import particionamento
+    from benchmarks.generate_data import gerar
+
+    app = create_app()
+    with app.app_context():
+        engine = db.engine
+        # Começa sempre da tabela comum
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP TABLE IF EXISTS {particionamento.TABELA} CASCADE'))
+    bootstrap_database(app, criar_admin=False)
+
+    inicio = time.perf_counter()
+    contagens = gerar(app, args.clientes, args.contatos_por_cliente, args.anos)
+    geracao = time.perf_counter() - inicio
+
+    with app.app_context():
+        engine = db.engine
+        stmts = consultas(date.today())
+        sem = medir(engine, stmts, args.repeticoes)
+
+        inicio = time.perf_counter()
+        conversao = particionamento.converter(engine, args.granularidade)
+        duracao_conversao = time.perf_counter() - inicio
+        com = medir(engine, stmts, args.repeticoes)
+
+    resultado = {
+        'contatos': contagens['contatos'],
+        'granularidade': args.granularidade,
+        'particoes': len(conversao['particoes']),
+        'geracao_s': round(geracao, 1),
+        'conversao_s': round(duracao_conversao, 1),
+        'consultas': {nome: {'sem': sem[nome], 'com': com[nome]} for nome in stmts},
+    }
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{resultado['contatos']} contatos, {resultado['particoes']} partições por {args.granularidade} "
+          f"(geração {resultado['geracao_s']}s, conversão {resultado['conversao_s']}s)\n")
+    print(f"{'consulta':<34} {'sem (ms)':>9} {'com (ms)':>9} {'variação':>9} {'partições':>10} {'buffers sem/com':>17}")
+    for nome, r in resultado['consultas'].items():
+        antes, depois = r['sem']['ms'], r['com']['ms']
+        variacao = f"{100 * (depois - antes) / antes:+.0f}%" if antes else '-'
+        print(f"{nome:<34} {antes:>9} {depois:>9} {variacao:>9} {r['com']['particoes']:>10} "
+              f"{r['sem']['buffers']!s:>8}/{r['com']['buffers']!s:<8}")
+
+
+if __name__ == '__main__':
+    main()
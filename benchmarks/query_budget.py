@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Orçamento de consultas por rota (detector de N+1)
+
+Cria o app com TestingConfig (SQLite em memória, DETECTOR_N_MAIS_UM='erro'),
+popula dados de exemplo e chama todas as rotas dos blueprints. Para cada
+chamada confere:
+
+- o status esperado (um N+1 detectado vira erro 500)
+- a quantidade de consultas (cabeçalho Server-Timing) dentro do orçamento
+
+Toda rota registrada em /api precisa ter pelo menos uma chamada em CHAMADAS;
+rotas novas sem orçamento também falham. Sai com código 1 em qualquer falha.
+
+Uso: python benchmarks/query_budget.py [--clientes 60] [--contatos 300] [-v]
+"""
+
+import argparse
+import os
+import re
+import sys
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.environ['FLASK_ENV'] = 'testing'
+
+# Rotas registradas mas inalcançáveis (sombreadas por outra com a mesma URL)
+IGNORADAS = {
+    'dashboard.get_dashboard_stats',  # /api/dashboard/stats atendida por contato_bp
+}
+
+
+# (endpoint, método, url, kwargs do test client, status esperado, orçamento de consultas)
+# A ordem importa: criações antes de atualizações e exclusões. {perfil_id}
+# é o X-Perfil-Id da última requisição perfilada.
+CHAMADAS = [
+    ('health', 'GET', '/health', {}, 200, 1),
+    ('user.get_current_user', 'GET', '/api/me', {}, 200, 1),
+    ('user.get_users', 'GET', '/api/users', {}, 200, 3),
+    ('user.get_user', 'GET', '/api/users/1', {}, 200, 2),
+    ('user.get_user_stats', 'GET', '/api/users/stats', {}, 200, 7),
+    ('user.create_user', 'POST', '/api/users',
+     {'json': {'nome': 'Vendedor', 'email': 'vendedor@crm.com', 'senha': 'segredo123', 'perfil': 'vendedor'}}, 201, 4),
+    ('user.update_user', 'PUT', '/api/users/2', {'json': {'departamento': 'Vendas'}}, 200, 4),
+    ('user.reset_password', 'POST', '/api/users/2/reset-password', {'json': {'nova_senha': 'outra123'}}, 200, 3),
+    ('user.toggle_user_status', 'POST', '/api/users/2/toggle-status', {}, 200, 3),
+    ('user.delete_user', 'DELETE', '/api/users/2', {}, 200, 3),
+    ('user.change_password', 'POST', '/api/change-password',
+     {'json': {'current_password': 'admin123', 'new_password': 'admin123'}}, 200, 2),
+
+    ('cliente.get_clientes', 'GET', '/api/clientes?per_page=50', {}, 200, 2),
+    ('cliente.get_clientes', 'GET', '/api/clientes?search=1&filial=Filial%201', {}, 200, 2),
+    ('cliente.get_cliente', 'GET', '/api/clientes/1', {}, 200, 1),
+    ('cliente.get_cliente_por_codigo', 'GET', '/api/clientes/codigo/1', {}, 200, 1),
+    ('cliente.lookup_clientes', 'POST', '/api/clientes/lookup', {'json': {'codigos': list(range(1, 61)) + [999]}}, 200, 1),
+    ('cliente.search_clientes', 'GET', '/api/clientes/search?q=Cliente&limit=20', {}, 200, 1),
+    ('cliente.get_clientes_stats', 'GET', '/api/clientes/stats', {}, 200, 4),
+    ('cliente.get_filiais', 'GET', '/api/clientes/filiais', {}, 200, 6),
+    ('cliente.create_cliente', 'POST', '/api/clientes',
+     {'json': {'cod_cliente': 900001, 'nome': 'Novo Cliente', 'filial': 'Filial 1'}}, 201, 3),
+    ('cliente.update_cliente', 'PUT', '/api/clientes/1', {'json': {'municipio': 'Outro'}}, 200, 3),
+    ('cliente.delete_cliente', 'DELETE', '/api/clientes/1', {}, 400, 2),
+    ('cliente.reatribuir_consultores', 'POST', '/api/clientes/reatribuir',
+     {'json': {'filtros': {'filial': 'Filial 2'}, 'novo_consultor_pecas': 'Novo', 'dry_run': True}}, 200, 3),
+
+    # + índice dos meses arquivados (src/arquivo.py; em cache por 30s)
+    ('contato.get_contatos', 'GET', '/api/contatos?per_page=50', {}, 200, 3),
+    ('contato.get_contato', 'GET', '/api/contatos/1', {}, 200, 1),
+    ('contato.create_contato', 'POST', '/api/contatos',
+     {'json': {'cliente_id': 2, 'tipo_contato': 'Tipo 1', 'resultado_contato': 'Resultado 1',
+               'vendedor': 'Vendedor 1', 'data_contato': date.today().isoformat()}}, 201, 9),
+    ('contato.update_contato', 'PUT', '/api/contatos/1', {'json': {'observacao': 'Atualizado'}}, 200, 3),
+    ('contato.delete_contato', 'DELETE', '/api/contatos/2', {}, 200, 3),
+    ('contato.get_agenda', 'GET', '/api/agenda?per_page=50', {}, 200, 2),
+    ('contato.get_dashboard_stats', 'GET', '/api/dashboard/stats', {}, 200, 5),
+    ('contato.get_tipos_contato', 'GET', '/api/tipos-contato', {}, 200, 6),
+    ('contato.get_resultados_contato', 'GET', '/api/resultados-contato', {}, 200, 6),
+    ('contato.get_vendedores', 'GET', '/api/contatos/vendedores', {}, 200, 6),
+
+    ('agenda.get_agenda_grouped', 'GET', '/api/agenda/grouped', {}, 200, 1),
+    ('agenda.get_agenda_stats', 'GET', '/api/agenda/stats', {}, 200, 3),
+    ('agenda.get_notifications', 'GET', '/api/agenda/notifications', {}, 200, 1),
+    ('agenda.mark_notification_read', 'POST', '/api/agenda/notifications/atrasado_1/read', {}, 200, 0),
+    ('agenda.mark_all_notifications_read', 'POST', '/api/agenda/notifications/read-all', {}, 200, 0),
+
+    ('upload.download_template', 'GET', '/api/download-template', {}, 200, 0),
+    ('upload.upload_clientes', 'POST', '/api/upload-clientes',
+     {'arquivo': (800000, 40), 'form': {'mode': 'add'}}, 200, 6),
+
+    ('analitico.get_pivot', 'GET', '/api/analytics/pivot?dimensoes=filial,classe,mes', {}, 200, 8),
+    ('analitico.get_cobertura', 'GET', '/api/analytics/coverage?situacao=atrasado&per_page=50', {}, 200, 8),
+    ('analitico.get_cobertura_resumo', 'GET', '/api/analytics/coverage/summary?por=filial', {}, 200, 8),
+    ('analitico.get_projecao', 'GET', '/api/analytics/projection?semanas=13', {}, 200, 8),
+    ('analitico.get_projecao_clientes', 'GET', '/api/analytics/projection/clients?k=6&per_page=50', {}, 200, 8),
+    ('fila.gerar_fila', 'POST', '/api/work-queue/generate', {'json': {'capacidade': 5, 'dias': 5}}, 200, 6),
+    ('fila.get_fila', 'GET', '/api/work-queue?per_page=50', {}, 200, 5),
+    ('fila.get_fila_resumo', 'GET', '/api/work-queue/summary', {}, 200, 2),
+    ('sistema.get_pool_stats', 'GET', '/api/sistema/pool', {}, 200, 1),
+    ('sistema.reset_pool_stats', 'POST', '/api/sistema/pool/reset', {}, 200, 1),
+    ('sistema.get_sql_stats', 'GET', '/api/sistema/sql', {}, 200, 1),
+    ('sistema.reset_sql_stats', 'POST', '/api/sistema/sql/reset', {}, 200, 1),
+    ('contato.get_agenda', 'GET', '/api/agenda?per_page=50&_perfil=1', {}, 200, 3),
+    ('sistema.get_perfis', 'GET', '/api/sistema/perfis', {}, 200, 1),
+    ('sistema.download_perfil', 'GET', '/api/sistema/perfis/{perfil_id}?formato=collapsed', {}, 200, 1),
+
+    ('user.login', 'POST', '/api/login', {'json': {'email': 'admin@crm.com', 'password': 'admin123'}}, 200, 3),
+]
+
+CONSULTAS = re.compile(r'desc="(\d+) consultas"')
+
+
+def popular(app, clientes, contatos):
+    from src.models.user import db, User
+    from src.models.cliente import Cliente
+    from src.models.contato import ContatoRegistrado, TipoContato, ResultadoContato, Feriado
+
+    with app.app_context():
+        User.create_default_master()
+        tipos = [TipoContato(codigo=f'T{i}', descricao=f'Tipo {i}') for i in range(5)]
+        resultados = [ResultadoContato(codigo=f'R{i}', descricao=f'Resultado {i}') for i in range(5)]
+        db.session.add_all(tipos + resultados)
+        db.session.flush()
+        db.session.add(Feriado(data=date.today() + timedelta(days=3), descricao='Feriado'))
+        db.session.bulk_insert_mappings(Cliente, [{
+            'cod_cliente': i + 1,
+            'nome': f'Cliente {i:04d}',
+            'municipio': f'Municipio {i % 7}',
+            'filial': f'Filial {i % 3}',
+            'classe': 'ABC'[i % 3],
+        } for i in range(clientes)])
+        hoje = date.today()
+        db.session.bulk_insert_mappings(ContatoRegistrado, [{
+            'cliente_id': i % clientes + 1,
+            'data_contato': hoje - timedelta(days=i % 90),
+            'tipo_contato_id': tipos[i % 5].id,
+            'resultado_contato_id': resultados[i % 5].id,
+            'vendedor': f'Vendedor {i % 6}',
+            'proximo_contato': hoje + timedelta(days=(i % 21) - 10),
+        } for i in range(contatos)])
+        db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clientes', type=int, default=60)
+    parser.add_argument('--contatos', type=int, default=300)
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args()
+
+    from src.main import create_app
+    from src.bootstrap import bootstrap_database
+
+    app = create_app()
+    bootstrap_database(app, criar_admin=False)
+    popular(app, args.clientes, args.contatos)
+
+    cliente = app.test_client()
+    token = cliente.post('/api/login', json={'email': 'admin@crm.com', 'password': 'admin123'}).get_json()['token']
+    autorizacao = {'Authorization': f'Bearer {token}'}
+
+    falhas = []
+    cobertas = set()
+    perfil_id = None
+    for endpoint, metodo, url, kwargs, status_esperado, orcamento in CHAMADAS:
+        kwargs = dict(kwargs)
+        if 'arquivo' in kwargs:
+            from benchmarks.generate_data import planilha_clientes
+            inicio, quantidade = kwargs.pop('arquivo')
+            kwargs['data'] = dict(kwargs.pop('form', {}), file=(planilha_clientes(quantidade, inicio), 'clientes.xlsx'))
+            kwargs['content_type'] = 'multipart/form-data'
+
+        url = url.format(perfil_id=perfil_id)
+        resposta = cliente.open(url, method=metodo, headers=autorizacao, **kwargs)
+        cobertas.add(endpoint)
+        perfil_id = resposta.headers.get('X-Perfil-Id', perfil_id)
+
+        m = CONSULTAS.search(resposta.headers.get('Server-Timing', ''))
+        consultas = int(m.group(1)) if m else 0
+
+        problemas = []
+        if resposta.status_code != status_esperado:
+            corpo = resposta.get_json(silent=True) or {}
+            problemas.append(f'status {resposta.status_code} (esperado {status_esperado}) '
+                             f'{corpo.get("error") or corpo.get("message") or ""}'.strip())
+        if consultas > orcamento:
+            problemas.append(f'{consultas} consultas (orçamento {orcamento})')
+
+        if problemas:
+            falhas.append(f'{metodo} {url}: ' + '; '.join(problemas))
+            print(f'❌ {metodo:6} {url} — ' + '; '.join(problemas))
+        elif args.verbose:
+            print(f'✅ {metodo:6} {url} — {consultas}/{orcamento} consultas')
+
+    registradas = {
+        regra.endpoint for regra in app.url_map.iter_rules()
+        if regra.rule.startswith('/api/') or regra.endpoint == 'health'
+    }
+    for endpoint in sorted(registradas - cobertas - IGNORADAS):
+        falhas.append(f'rota sem orçamento: {endpoint}')
+        print(f'❌ rota sem orçamento: {endpoint}')
+
+    if falhas:
+        print(f'\n{len(falhas)} falha(s)')
+        sys.exit(1)
+    print(f'✅ {len(CHAMADAS)} chamadas dentro do orçamento ({len(cobertas)} rotas)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Suíte de benchmark da API (resultados em JSON para comparar commits)
+
+Gera um banco com benchmarks/generate_data.py (ou usa --database-url) e mede:
+
+1. test client: todas as rotas de /api (e /health) pelo test client do
+   Flask. Leituras rodam --repeticoes vezes; escritas rodam em --ciclos
+   ciclos criar → alterar → excluir. Por rota: p50/p95/p99 e consultas
+   por requisição (lidas do cabeçalho Server-Timing).
+2. carga HTTP: Gunicorn em cada --modes (SERVER_MODE) com o gerador de
+   carga de loadtest.py sobre as leituras mais acessadas: req/s,
+   p50/p95/p99 e erros por nível de concorrência.
+
+O resultado vai para benchmarks/resultados/<data>-<commit>.json com o
+commit, as versões e os parâmetros dos dados. Para comparar duas
+execuções: python benchmarks/compare.py antes.json depois.json
+
+Uso:
+    python benchmarks/run.py [--clientes 5000] [--repeticoes 30]
+    python benchmarks/run.py --sem-carga                 # só o test client
+    python benchmarks/run.py --database-url postgresql://... --reusar
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+RESULTADOS = os.path.join(RAIZ, 'benchmarks', 'resultados')
+
+# Rotas registradas mas inalcançáveis (sombreadas por outra com a mesma URL)
+IGNORADAS = {
+    'dashboard.get_dashboard_stats',  # /api/dashboard/stats atendida por contato_bp
+}
+
+# (endpoint, url); {cliente_id}, {cod_cliente}, {contato_id}, {user_id} e
+# {filial} são preenchidos com registros do banco gerado
+LEITURAS = [
+    ('health', '/health'),
+    ('user.get_current_user', '/api/me'),
+    ('user.get_users', '/api/users'),
+    ('user.get_user', '/api/users/{user_id}'),
+    ('user.get_user_stats', '/api/users/stats'),
+    ('cliente.get_clientes', '/api/clientes?per_page=50&filial={filial}'),
+    ('cliente.get_cliente', '/api/clientes/{cliente_id}'),
+    ('cliente.get_cliente_por_codigo', '/api/clientes/codigo/{cod_cliente}'),
+    ('cliente.search_clientes', '/api/clientes/search?q=Cliente%20001&limit=20'),
+    ('cliente.get_clientes_stats', '/api/clientes/stats'),
+    ('cliente.get_filiais', '/api/clientes/filiais'),
+    ('contato.get_contatos', '/api/contatos?per_page=50'),
+    ('contato.get_contato', '/api/contatos/{contato_id}'),
+    ('contato.get_agenda', '/api/agenda?per_page=50'),
+    ('contato.get_dashboard_stats', '/api/dashboard/stats'),
+    ('contato.get_tipos_contato', '/api/tipos-contato'),
+    ('contato.get_resultados_contato', '/api/resultados-contato'),
+    ('contato.get_vendedores', '/api/contatos/vendedores'),
+    ('agenda.get_agenda_grouped', '/api/agenda/grouped'),
+    ('agenda.get_agenda_stats', '/api/agenda/stats'),
+    ('agenda.get_notifications', '/api/agenda/notifications'),
+    ('upload.download_template', '/api/download-template'),
+    ('analitico.get_pivot', '/api/analytics/pivot?dimensoes=filial,classe,mes'),
+    ('analitico.get_cobertura', '/api/analytics/coverage?situacao=atrasado&per_page=50'),
+    ('analitico.get_cobertura_resumo', '/api/analytics/coverage/summary?por=consultor'),
+    ('analitico.get_projecao', '/api/analytics/projection?semanas=13'),
+    ('analitico.get_projecao_clientes', '/api/analytics/projection/clients?k=6&per_page=50'),
+    ('fila.get_fila', '/api/work-queue?per_page=50'),
+    ('fila.get_fila_resumo', '/api/work-queue/summary'),
+    ('sistema.get_pool_stats', '/api/sistema/pool'),
+    ('sistema.get_sql_stats', '/api/sistema/sql'),
+    ('sistema.get_perfis', '/api/sistema/perfis'),
+]
+
+# Leituras da fase de carga HTTP (as mais acessadas pelo front-end)
+PATHS_CARGA = (
+    '/api/clientes?search=1&per_page=20',
+    '/api/agenda?per_page=20',
+    '/api/dashboard/stats',
+    '/api/tipos-contato',
+)
+
+SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) consultas"')
+
+
+def percentis(valores):
+    ordenados = sorted(valores)
+
+    def p(q):
+        return round(ordenados[min(len(ordenados) - 1, int(len(ordenados) * q))], 2)
+
+    return {'p50_ms': p(0.50), 'p95_ms': p(0.95), 'p99_ms': p(0.99)}
+
+
+class Medidor:
+    """Chama rotas pelo test client e guarda latência e consultas por endpoint"""
+
+    def __init__(self, cliente, cabecalhos):
+        self.cliente = cliente
+        self.cabecalhos = cabecalhos
+        self.amostras = defaultdict(list)
+        self.metodos = {}
+
+    def __call__(self, endpoint, metodo, url, status=200, **kwargs):
+        inicio = time.perf_counter()
+        resposta = self.cliente.open(url, method=metodo, headers=self.cabecalhos, **kwargs)
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+
+        m = SERVER_TIMING.search(resposta.headers.get('Server-Timing', ''))
+        db_ms, consultas = (float(m.group(1)), int(m.group(2))) if m else (0.0, 0)
+        self.amostras[endpoint].append((duracao_ms, consultas, db_ms, resposta.status_code))
+        self.metodos[endpoint] = metodo
+
+        if resposta.status_code != status:
+            corpo = resposta.get_json(silent=True) or {}
+            raise RuntimeError(
+                f'{metodo} {url}: status {resposta.status_code} (esperado {status}) '
+                f'{corpo.get("error") or corpo.get("message") or ""}'.strip()
+            )
+        return resposta
+
+    def resumo(self):
+        rotas = {}
+        for endpoint, amostras in sorted(self.amostras.items()):
+            rotas[endpoint] = {
+                'metodo': self.metodos[endpoint],
+                'requisicoes': len(amostras),
+                **percentis([a[0] for a in amostras]),
+                'consultas_media': round(sum(a[1] for a in amostras) / len(amostras), 2),
+                'consultas_max': max(a[1] for a in amostras),
+                'db_ms_medio': round(sum(a[2] for a in amostras) / len(amostras), 2),
+            }
+        return rotas
+
+
+def ciclo_escrita(medir, i, ids):
+    """Um ciclo criar → alterar → excluir que passa por todas as rotas de escrita"""
+    from benchmarks.generate_data import planilha_clientes
+
+    cliente = medir('cliente.create_cliente', 'POST', '/api/clientes', 201, json={
+        'cod_cliente': 9000000 + i, 'nome': f'Benchmark {i}', 'filial': ids['filial']
+    }).get_json()['data']
+    medir('cliente.update_cliente', 'PUT', f"/api/clientes/{cliente['id']}", json={'municipio': 'Benchmark'})
+
+    contato = medir('contato.create_contato', 'POST', '/api/contatos', 201, json={
+        'cliente_id': cliente['id'], 'tipo_contato': 'Visita', 'resultado_contato': 'Orçamento enviado',
+        'vendedor': 'Vendedor 001', 'data_contato': date.today().isoformat()
+    }).get_json()['data']
+    medir('contato.update_contato', 'PUT', f"/api/contatos/{contato['id']}", json={'observacao': 'Benchmark'})
+    medir('contato.delete_contato', 'DELETE', f"/api/contatos/{contato['id']}")
+    medir('cliente.delete_cliente', 'DELETE', f"/api/clientes/{cliente['id']}")
+
+    medir('cliente.reatribuir_consultores', 'POST', '/api/clientes/reatribuir', json={
+        'filtros': {'filial': ids['filial']}, 'novo_consultor_pecas': 'Benchmark', 'dry_run': True
+    })
+
+    usuario = medir('user.create_user', 'POST', '/api/users', 201, json={
+        'nome': f'Benchmark {i}', 'email': f'benchmark{i}@crm.com', 'senha': 'segredo123', 'perfil': 'vendedor'
+    }).get_json()['data']
+    medir('user.update_user', 'PUT', f"/api/users/{usuario['id']}", json={'departamento': 'Benchmark'})
+    medir('user.reset_password', 'POST', f"/api/users/{usuario['id']}/reset-password", json={'nova_senha': 'outra123'})
+    medir('user.toggle_user_status', 'POST', f"/api/users/{usuario['id']}/toggle-status")
+    medir('user.delete_user', 'DELETE', f"/api/users/{usuario['id']}")
+    medir('user.change_password', 'POST', '/api/change-password',
+          json={'current_password': 'admin123', 'new_password': 'admin123'})
+    medir('user.login', 'POST', '/api/login', json={'email': 'admin@crm.com', 'password': 'admin123'})
+
+    medir('agenda.mark_notification_read', 'POST', f"/api/agenda/notifications/atrasado_{ids['contato_id']}/read")
+    medir('agenda.mark_all_notifications_read', 'POST', '/api/agenda/notifications/read-all')
+
+    # Importação incremental de 200 clientes novos por ciclo
+    medir('upload.upload_clientes', 'POST', '/api/upload-clientes', content_type='multipart/form-data',
+          data={'mode': 'add', 'file': (planilha_clientes(200, 8000000 + i * 200), 'clientes.xlsx')})
+
+    # Perfilamento sob demanda e download do perfil gerado
+    perfil_id = medir('contato.get_agenda[perfil]', 'GET', '/api/agenda?per_page=50&_perfil=1').headers['X-Perfil-Id']
+    medir('sistema.download_perfil', 'GET', f'/api/sistema/perfis/{perfil_id}')
+
+    medir('sistema.reset_pool_stats', 'POST', '/api/sistema/pool/reset')
+    medir('sistema.reset_sql_stats', 'POST', '/api/sistema/sql/reset')
+
+
+def fase_test_client(app, repeticoes, ciclos):
+    from src.models.user import db, User
+    from src.models.cliente import Cliente
+    from src.models.contato import ContatoRegistrado
+
+    with app.app_context():
+        cliente = db.session.query(Cliente).order_by(Cliente.id).first()
+        ids = {
+            'cliente_id': cliente.id,
+            'cod_cliente': cliente.cod_cliente,
+            'filial': cliente.filial,
+            'contato_id': db.session.query(ContatoRegistrado.id).order_by(ContatoRegistrado.id).limit(1).scalar(),
+            'user_id': db.session.query(User.id).filter(User.perfil == 'vendedor').order_by(User.id).limit(1).scalar(),
+        }
+
+    cliente_http = app.test_client()
+    token = cliente_http.post('/api/login', json={'email': 'admin@crm.com', 'password': 'admin123'}).get_json()['token']
+    medir = Medidor(cliente_http, {'Authorization': f'Bearer {token}'})
+
+    # Aquecimento: primeira chamada de cada rota (caches, compilação de consultas)
+    for endpoint, url in LEITURAS:
+        cliente_http.get(url.format(**ids), headers=medir.cabecalhos)
+
+    # Consulta em lote (colagem de planilha): 200 códigos, parte inexistente
+    codigos = list(range(ids['cod_cliente'], ids['cod_cliente'] + 180)) + list(range(1, 21))
+    for _ in range(repeticoes):
+        for endpoint, url in LEITURAS:
+            medir(endpoint, 'GET', url.format(**ids))
+        medir('cliente.lookup_clientes', 'POST', '/api/clientes/lookup', json={'codigos': codigos})
+    for i in range(ciclos):
+        ciclo_escrita(medir, i, ids)
+
+    registradas = {
+        regra.endpoint for regra in app.url_map.iter_rules()
+        if regra.rule.startswith('/api/') or regra.endpoint == 'health'
+    }
+    sem_medicao = sorted(registradas - set(medir.amostras) - IGNORADAS)
+    for endpoint in sem_medicao:
+        print(f'⚠️  rota sem medição: {endpoint}', file=sys.stderr)
+
+    return medir.resumo(), sem_medicao, token
+
+
+def fase_carga(env, modos, concorrencias, duracao, workers, threads, token):
+    from benchmarks.loadtest import subir_servidor, disparar, aumentar_limite_arquivos
+
+    aumentar_limite_arquivos()
+    resultados = []
+    for modo in modos:
+        processo, url = subir_servidor(modo, workers, threads, env)
+        try:
+            for concorrencia in concorrencias:
+                resultado = asyncio.run(disparar(
+                    url, concorrencia, duracao, PATHS_CARGA,
+                    cabecalhos={'Authorization': f'Bearer {token}'}
+                ))
+                resultados.append({'modo': modo, **resultado})
+                print(json.dumps(resultados[-1]), file=sys.stderr)
+        finally:
+            processo.send_signal(signal.SIGTERM)
+            processo.wait(timeout=30)
+    return resultados
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        sujo = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=RAIZ,
+                              capture_output=True, text=True).stdout.strip()
+        return commit + ('-sujo' if sujo else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecido'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', help='padrão: SQLite temporário')
+    parser.add_argument('--reusar', action='store_true', help='não gerar dados (banco já populado)')
+    parser.add_argument('--clientes', type=int, default=5000)
+    parser.add_argument('--contatos-por-cliente', type=int, default=10)
+    parser.add_argument('--anos', type=int, default=2)
+    parser.add_argument('--usuarios', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeticoes', type=int, default=30, help='execuções de cada leitura')
+    parser.add_argument('--ciclos', type=int, default=3, help='ciclos de escrita')
+    parser.add_argument('--sem-carga', action='store_true', help='pular a fase de carga HTTP')
+    parser.add_argument('--modes', nargs='+', choices=['wsgi', 'asgi'], default=['wsgi'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[20, 100])
+    parser.add_argument('--duration', type=float, default=10.0, help='segundos por medição de carga')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--saida', help=f'arquivo JSON (padrão: {os.path.relpath(RESULTADOS, RAIZ)}/<data>-<commit>.json)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'benchmark.db')}"
+        os.environ['DATABASE_URL'] = database_url
+        os.environ.setdefault('FLASK_ENV', 'production')
+        os.environ['SQL_LOG_REQUISICOES'] = 'false'
+
+        from src.main import create_app
+        from src.bootstrap import bootstrap_database
+        from benchmarks.generate_data import gerar
+
+        app = create_app()
+        bootstrap_database(app, criar_admin=False)
+        dados = None
+        if not args.reusar:
+            dados = gerar(app, args.clientes, args.contatos_por_cliente, args.anos, args.usuarios, args.seed)
+
+        rotas, sem_medicao, token = fase_test_client(app, args.repeticoes, args.ciclos)
+
+        carga = []
+        if not args.sem_carga:
+            carga = fase_carga(dict(os.environ), args.modes, args.concurrency, args.duration,
+                               args.workers, args.threads, token)
+
+    commit = git_commit()
+    resultado = {
+        'commit': commit,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'banco': database_url.split(':', 1)[0] if args.database_url else 'sqlite (temporário)',
+        'parametros': {
+            'clientes': args.clientes, 'contatos_por_cliente': args.contatos_por_cliente,
+            'anos': args.anos, 'usuarios': args.usuarios, 'seed': args.seed,
+            'repeticoes': args.repeticoes, 'ciclos': args.ciclos,
+            'workers': args.workers, 'threads': args.threads, 'duracao_carga': args.duration,
+        },
+        'dados': dados,
+        'rotas': rotas,
+        'sem_medicao': sem_medicao,
+        'carga': carga,
+    }
+
+    saida = args.saida or os.path.join(RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    print(f"\n{'rota':<36} {'req':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'consultas':>10}")
+    for endpoint, r in rotas.items():
+        print(f"{endpoint:<36} {r['requisicoes']:>5} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+              f"{r['p99_ms']:>8} {r['consultas_media']:>10}")
+    for r in carga:
+        print(f"carga {r['modo']} c={r['concorrencia']}: {r['rps']} req/s, "
+              f"p50 {r['p50_ms']} ms, p95 {r['p95_ms']} ms, p99 {r['p99_ms']} ms, {r['erros']} erros")
+    print(f'\n✅ Resultado salvo em {saida}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark de inicialização de um worker
+
+Mede, em processos Python novos (como um worker do Gunicorn recém-criado):
+- import: tempo para importar src.main
+- create_app: tempo para criar o app (config, extensões, blueprints)
+- primeira_requisicao: tempo da primeira requisição que toca o banco
+- total: do início do processo até a primeira resposta
+
+Uso: python benchmarks/startup.py [--runs 10] [--path /api/clientes]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Código executado em cada processo filho
+WORKER = r'''
+import time
+t0 = time.perf_counter()
+import sys, json
+sys.path.insert(0, {raiz!r})
+from src.main import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+resposta = app.test_client().get({path!r})
+t3 = time.perf_counter()
+print(json.dumps({{
+    'status': resposta.status_code,
+    'import': t1 - t0,
+    'create_app': t2 - t1,
+    'primeira_requisicao': t3 - t2,
+    'total': t3 - t0
+}}))
+'''
+
+
+def medir(runs, path, env):
+    codigo = WORKER.format(raiz=RAIZ, path=path)
+    amostras = []
+    for _ in range(runs):
+        saida = subprocess.run(
+            [sys.executable, '-c', codigo],
+            env=env, capture_output=True, text=True, check=True
+        )
+        amostras.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    return amostras
+
+
+def resumir(amostras):
+    resumo = {}
+    for chave in ('import', 'create_app', 'primeira_requisicao', 'total'):
+        valores = sorted(a[chave] * 1000 for a in amostras)
+        resumo[chave] = {
+            'mediana_ms': round(statistics.median(valores), 1),
+            'min_ms': round(valores[0], 1),
+            'max_ms': round(valores[-1], 1)
+        }
+    return resumo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--path', default='/api/clientes')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Banco SQLite próprio, preparado uma vez (como no deploy)
+        if 'DATABASE_URL' not in env:
+            env['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        env.setdefault('FLASK_ENV', 'production')
+        subprocess.run([sys.executable, os.path.join(RAIZ, 'bootstrap_db.py')],
+                       env=env, capture_output=True, check=True)
+
+        amostras = medir(args.runs, args.path, env)
+
+    print(json.dumps({
+        'runs': args.runs,
+        'path': args.path,
+        'status': sorted({a['status'] for a in amostras}),
+        'resultado': resumir(amostras)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Memória por worker do Gunicorn, com e sem --preload
+
+Sobe o Gunicorn (gunicorn.conf.py) com 4, 8 e 16 workers, faz algumas
+requisições aquecendo os caches de cada worker e lê de
+/proc/<pid>/smaps_rollup:
+- rss: memória residente (conta páginas compartilhadas em todos)
+- pss: páginas compartilhadas divididas entre os processos
+- uss: páginas privadas (o que cada worker realmente acrescenta)
+
+Somente Linux. Uso:
+    python benchmarks/worker_memory.py [--workers 4 8 16] [--requests 200]
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# App factory (não usa wsgi.py, que fixa o DATABASE_URL de produção)
+APP = 'src.main:create_app()'
+PATHS = ('/health', '/api/tipos-contato', '/api/resultados-contato', '/api/clientes/filiais')
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def smaps(pid):
+    """Retorna rss/pss/uss em KB de um processo"""
+    valores = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for linha in f:
+            partes = linha.split()
+            if len(partes) >= 3 and partes[-1] == 'kB':
+                valores[partes[0].rstrip(':')] = int(partes[1])
+    return {
+        'rss': valores.get('Rss', 0),
+        'pss': valores.get('Pss', 0),
+        'uss': valores.get('Private_Clean', 0) + valores.get('Private_Dirty', 0)
+    }
+
+
+def filhos(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(p) for p in f.read().split()]
+
+
+def aguardar(url, workers_esperados, master_pid, limite=60):
+    fim = time.time() + limite
+    while time.time() < fim:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            if len(filhos(master_pid)) >= workers_esperados:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError('Gunicorn não respondeu a tempo')
+
+
+def medir(workers, preload, requisicoes, env):
+    porta = porta_livre()
+    env = dict(env, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS='1',
+               GUNICORN_PRELOAD='true' if preload else 'false')
+    processo = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+         '--bind', f'127.0.0.1:{porta}', '--log-level', 'warning', APP],
+        cwd=RAIZ, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        base = f'http://127.0.0.1:{porta}'
+        aguardar(base + '/health', workers, processo.pid)
+
+        # Rotas públicas de referência falham sem token; o que importa é
+        # carregar código e caches em todos os workers
+        for i in range(requisicoes):
+            try:
+                urllib.request.urlopen(base + PATHS[i % len(PATHS)], timeout=5).read()
+            except OSError:
+                pass
+
+        master = smaps(processo.pid)
+        por_worker = [smaps(pid) for pid in filhos(processo.pid)]
+    finally:
+        processo.send_signal(signal.SIGTERM)
+        processo.wait(timeout=30)
+
+    def media(chave):
+        return round(sum(w[chave] for w in por_worker) / len(por_worker) / 1024, 1)
+
+    return {
+        'workers': workers,
+        'preload': preload,
+        'master_pss_mb': round(master['pss'] / 1024, 1),
+        'worker_rss_mb': media('rss'),
+        'worker_pss_mb': media('pss'),
+        'worker_uss_mb': media('uss'),
+        'total_pss_mb': round((master['pss'] + sum(w['pss'] for w in por_worker)) / 1024, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[4, 8, 16])
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        if 'DATABASE_URL' not in env:
+            env['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        env.setdefault('FLASK_ENV', 'production')
+        subprocess.run([sys.executable, os.path.join(RAIZ, 'bootstrap_db.py')],
+                       env=env, capture_output=True, check=True)
+
+        for workers in args.workers:
+            for preload in (False, True):
+                resultados.append(medir(workers, preload, args.requests, env))
+
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == '__main__':
+    main()
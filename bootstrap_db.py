@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Prepara o banco de dados para o deploy (idempotente)
+
+Cria tabelas inexistentes, aplica migrações de colunas e garante o
+usuário master padrão. Diferente do init_db.py, não apaga nenhum dado.
+Também gera as variantes .br/.gz do front-end que faltarem (o app só as lê).
+
+Uso: python bootstrap_db.py
+"""
+
+import os
+import sys
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.main import create_app
+from src.bootstrap import bootstrap_database
+from src.estaticos import precomprimir
+
+
+if __name__ == '__main__':
+    app = create_app()
+    print(f"Banco de dados: {app.config['SQLALCHEMY_DATABASE_URI'].split('@')[-1]}")
+
+    resultado = bootstrap_database(app)
+
+    if resultado['migracoes']:
+        print(f"Migrações aplicadas: {', '.join(resultado['migracoes'])}")
+    else:
+        print("Nenhuma migração pendente")
+    if resultado['particoes']:
+        print(f"Partições criadas: {', '.join(resultado['particoes'])}")
+    print(f"Usuário master: {resultado['master']}")
+    if app.static_folder and os.path.isdir(app.static_folder):
+        print(f"Estáticos: {precomprimir(app.static_folder)} variante(s) comprimida(s) gerada(s)")
+    print("✅ Banco de dados pronto")
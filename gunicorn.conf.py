@@ -0,0 +1,109 @@
+"""
+Configuração do Gunicorn (gunicorn -c gunicorn.conf.py)
+
+O app é carregado uma vez no processo master (preload_app) e os workers
+são criados por fork, compartilhando copy-on-write o código importado e
+o snapshot de dados de referência (src/referencias.py).
+
+Conexões de banco nunca atravessam o fork: o master descarta as engines
+depois de aquecer os caches e cada worker abre seu próprio pool.
+
+As métricas Prometheus de todos os workers são gravadas em arquivos mmap
+em PROMETHEUS_MULTIPROC_DIR e somadas em /metrics.
+
+SERVER_MODE escolhe o modo de servir:
+- wsgi (padrão): wsgi:app em workers gthread
+- asgi: asgi:app em workers Uvicorn (ver src/asgi.py)
+"""
+
+import gc
+import os
+import shutil
+import tempfile
+
+# Precisa existir antes de o app (e o prometheus_client) ser importado. O
+# padrão leva a porta: duas instâncias no mesmo host não dividem arquivos.
+# A limpeza fica em on_starting (uma vez por início do master), não aqui:
+# este arquivo é lido de novo a cada HUP, com os workers vivos gravando nele
+os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(tempfile.gettempdir(), f"crm-metricas-{os.environ.get('PORT', '8080')}")
+)
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+timeout = 120
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+server_mode = os.environ.get('SERVER_MODE', 'wsgi').lower()
+if server_mode == 'asgi':
+    wsgi_app = 'asgi:app'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'wsgi:app'
+
+accesslog = '-'
+errorlog = '-'
+loglevel = 'info'
+
+
+def _flask_app(server):
+    # No modo ASGI o app carregado é o AppAssincrono, que embrulha o Flask
+    app = server.app.wsgi()
+    return getattr(app, 'flask_app', app)
+
+
+def _engines(app):
+    from src.models.user import db
+    with app.app_context():
+        return list(db.engines.values())
+
+
+def on_starting(server):
+    """Descarta as métricas de execuções anteriores (não roda no HUP)"""
+    diretorio = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(diretorio, ignore_errors=True)
+    os.makedirs(diretorio, exist_ok=True)
+
+
+def when_ready(server):
+    """Aquece os caches de referência no master, antes do primeiro fork"""
+    if not preload_app:
+        return
+
+    from src.referencias import carregar_referencias, carregar_registro
+
+    app = _flask_app(server)
+    try:
+        with app.app_context():
+            carregar_registro()
+            carregar_referencias()
+        server.log.info("Dados de referência carregados no master")
+    except Exception as e:
+        # Workers carregam sob demanda se o banco não estiver acessível agora
+        server.log.warning(f"Falha ao carregar dados de referência: {e}")
+
+    for engine in _engines(app):
+        engine.dispose()
+
+
+def pre_fork(server, worker):
+    # Objetos do master não são coletados nos workers: evita que o GC
+    # toque nas páginas compartilhadas e force cópias
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    # Conexões herdadas pertencem ao master: abandonar sem fechá-las
+    for engine in _engines(_flask_app(server)):
+        engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    # Gauges "livesum" do worker encerrado deixam de contar
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
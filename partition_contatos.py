@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Particionamento de contatos_registrados por data (somente PostgreSQL)
+
+Uso:
+    python partition_contatos.py status
+    python partition_contatos.py converter [--granularidade ano|trimestre] [--adiante 2]
+    python partition_contatos.py manter [--adiante 2]
+    python partition_contatos.py arquivar --antes-de 2022-01-01 [--modo desanexar|comprimir]
+
+converter recria a tabela como particionada (PARTITION BY RANGE em
+data_contato) e copia os dados numa única transação, com a tabela
+bloqueada: rode numa janela de manutenção. Os comandos rodam sem
+statement_timeout e desistem se não obtiverem o bloqueio da tabela em
+--lock-timeout-ms (padrão 10 s). manter cria as partições dos
+próximos períodos (também chamado pelo bootstrap_db.py). arquivar tira
+das consultas as partições que terminam até a data informada.
+"""
+
+import argparse
+import os
+import sys
+from datetime import date
+from sqlalchemy.exc import OperationalError
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.main import create_app
+from src.models.user import db
+from src import particionamento
+
+
+def _tamanho(n):
+    for unidade in ('B', 'KB', 'MB', 'GB'):
+        if n < 1024:
+            return f'{n:.0f} {unidade}'
+        n /= 1024
+    return f'{n:.1f} TB'
+
+
+def status(engine):
+    with engine.connect() as conn:
+        if not particionamento.eh_particionada(conn):
+            print(f"{particionamento.TABELA} não é particionada")
+            return
+        particoes = particionamento.listar_particoes(conn)
+
+    print(f"Granularidade: {particionamento.granularidade_atual(particoes)}")
+    for p in particoes:
+        faixa = f"{p['inicio']} a {p['fim']}" if p['inicio'] else 'padrão'
+        print(f"{p['nome']:<40} {faixa:<26} {p['linhas_estimadas']:>12} linhas  {_tamanho(p['bytes']):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lock-timeout-ms', type=int, default=particionamento.LOCK_TIMEOUT_MS,
+                        help='espera máxima pelo bloqueio da tabela')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    comandos.add_parser('status', help='lista as partições')
+
+    converter = comandos.add_parser('converter', help='converte a tabela em particionada')
+    converter.add_argument('--granularidade', choices=particionamento.GRANULARIDADES, default='ano')
+    converter.add_argument('--adiante', type=int, default=particionamento.PERIODOS_ADIANTE,
+                           help='períodos futuros criados além do atual')
+
+    manter = comandos.add_parser('manter', help='cria as partições futuras')
+    manter.add_argument('--adiante', type=int, default=particionamento.PERIODOS_ADIANTE)
+
+    arquivar = comandos.add_parser('arquivar', help='tira partições antigas das consultas')
+    arquivar.add_argument('--antes-de', type=date.fromisoformat, required=True,
+                          help='arquiva as partições que terminam até esta data (AAAA-MM-DD)')
+    arquivar.add_argument('--modo', choices=particionamento.MODOS_ARQUIVO, default='desanexar')
+
+    args = parser.parse_args()
+    app = create_app()
+
+    with app.app_context():
+        engine = db.engine
+        try:
+            if args.comando == 'status':
+                status(engine)
+
+            elif args.comando == 'converter':
+                resultado = particionamento.converter(engine, args.granularidade, args.adiante, args.lock_timeout_ms)
+                print(f"{resultado['linhas']} contatos copiados para {len(resultado['particoes'])} partições")
+                for nome in resultado['indices_ignorados']:
+                    print(f"⚠️  Índice único sem data_contato não recriado: {nome}")
+                print("✅ Tabela particionada")
+
+            elif args.comando == 'manter':
+                criadas = particionamento.manter(engine, args.adiante, args.lock_timeout_ms)
+                print(f"Partições criadas: {', '.join(criadas)}" if criadas else "Nenhuma partição pendente")
+
+            elif args.comando == 'arquivar':
+                arquivadas = particionamento.arquivar(engine, args.antes_de, args.modo, args.lock_timeout_ms)
+                for item in arquivadas:
+                    print(f"{item['particao']}: {item['linhas']} contatos ({args.modo})")
+                print(f"✅ {len(arquivadas)} partição(ões) arquivada(s)")
+
+        except particionamento.ParticionamentoInvalido as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        except OperationalError as e:
+            # lock_timeout: a tabela estava ocupada; nada foi alterado
+            print(f"❌ {e.orig}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Gera a fila de trabalho dos consultores (fila_trabalho)
+
+Clientes vencidos e a vencer nos próximos FILA_DIAS dias úteis são
+distribuídos pelos dias úteis de cada consultor de peças, por prioridade
+(classe, potencial e dias de atraso) e até FILA_CAPACIDADE_DIARIA clientes
+por dia (src/fila.py). O plano anterior é substituído. Rode diariamente
+antes do expediente (cron); o master também pode gerar pelo
+POST /api/work-queue/generate.
+
+Uso: python plan_work_queue.py [--capacidade 20] [--dias 10] [--capacidades capacidades.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.main import create_app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--capacidade', type=int, help='clientes por dia por consultor (padrão: FILA_CAPACIDADE_DIARIA)')
+    parser.add_argument('--dias', type=int, help='dias úteis planejados (padrão: FILA_DIAS)')
+    parser.add_argument('--capacidades', help='JSON {consultor: clientes por dia} com exceções à capacidade padrão')
+    args = parser.parse_args()
+
+    capacidades = None
+    if args.capacidades:
+        with open(args.capacidades, encoding='utf-8') as f:
+            capacidades = json.load(f)
+
+    app = create_app()
+
+    from src import fila
+
+    with app.app_context():
+        inicio = time.perf_counter()
+        resumo = fila.gerar(args.capacidade, capacidades, args.dias)
+
+    print(f"Dias: {resumo['dias'][0]} a {resumo['dias'][-1]} ({len(resumo['dias'])} dias úteis)")
+    for consultor, quantidade in list(resumo['excedentes_por_consultor'].items())[:10]:
+        print(f"  {consultor}: {quantidade} cliente(s) além da capacidade")
+    if resumo['sem_consultor']:
+        print(f"⚠️  {resumo['sem_consultor']} cliente(s) vencido(s) sem consultor de peças")
+    print(f"✅ {resumo['agendados']} cliente(s) para {resumo['consultores']} consultor(es), "
+          f"{resumo['excedentes']} excedente(s) ({time.perf_counter() - inicio:.1f}s)")
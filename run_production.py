@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Script de produção que inicia Gunicorn programaticamente
-Usa a instância correta de app e db do main.py
+Prepara o banco uma única vez (bootstrap) antes de iniciar os workers
 """
 
 import os
@@ -24,46 +24,39 @@ print("\n📊 ETAPA 1: Configuração do Banco de Dados")
 print("-" * 70)
 
 try:
-    # Importar app e db do main.py (instância correta)
-    from src.main import app, db
-    from src.models.user import User
+    # Etapa única de preparação do banco (os workers do Gunicorn não criam tabelas)
+    from src.main import create_app
+    from src.bootstrap import bootstrap_database
     
-    with app.app_context():
-        # Criar tabelas (já está no main.py mas garantir)
-        print("📝 Criando tabelas no PostgreSQL...")
-        db.create_all()
-        print("✅ Tabelas criadas com sucesso!")
-        
-        # Verificar/criar admin
-        print("\n👤 Verificando usuário admin...")
-        admin = User.query.filter_by(email='admin@crm.com').first()
-        
-        if admin:
-            print("✅ Usuário admin já existe")
-        else:
-            print("📝 Criando usuário admin...")
-            admin = User(
-                nome='Administrador',
-                email='admin@crm.com',
-                perfil='master'
-            )
-            admin.set_password('admin123')
-            db.session.add(admin)
-            db.session.commit()
-            print("✅ Usuário admin criado com sucesso!")
-            print("   📧 Email: admin@crm.com")
-            print("   🔑 Senha: admin123")
-            print("   ⚠️  ALTERE A SENHA APÓS O PRIMEIRO LOGIN!")
-        
-        print("\n" + "=" * 70)
-        print("✅ CONFIGURAÇÃO DO BANCO CONCLUÍDA!")
-        print("=" * 70)
+    app = create_app()
+    
+    print("📝 Criando tabelas e aplicando migrações no PostgreSQL...")
+    resultado = bootstrap_database(app)
+    print("✅ Tabelas criadas com sucesso!")
+    if resultado['migracoes']:
+        print(f"✅ Migrações aplicadas: {', '.join(resultado['migracoes'])}")
+    print(f"✅ Usuário master: {resultado['master']}")
+
+    # Variantes .br/.gz do front-end (o app só lê as existentes; no Docker já vêm do build)
+    from src.estaticos import precomprimir
+    if app.static_folder and os.path.isdir(app.static_folder):
+        try:
+            print(f"✅ Estáticos: {precomprimir(app.static_folder)} variante(s) comprimida(s) gerada(s)")
+        except OSError as e:
+            print(f"⚠️  Não foi possível pré-comprimir os estáticos: {e}")
+    
+    print("\n" + "=" * 70)
+    print("✅ CONFIGURAÇÃO DO BANCO CONCLUÍDA!")
+    print("=" * 70)
         
 except Exception as e:
+    # Sem as migrações o código novo não funciona sobre o esquema antigo:
+    # não subir o servidor
     print(f"\n❌ ERRO NA CONFIGURAÇÃO: {e}")
     import traceback
     traceback.print_exc()
-    print("\n⚠️  Tentando continuar...\n")
+    print("\n❌ Banco de dados não preparado; servidor não iniciado\n")
+    sys.exit(1)
 
 # Etapa 2: Iniciar Gunicorn
 print("\n🚀 ETAPA 2: Iniciando Servidor Gunicorn")
@@ -72,23 +65,19 @@ print("-" * 70)
 port = os.environ.get('PORT', '8080')
 
 print(f"📡 Porta: {port}")
+print(f"🔧 Modo: {os.environ.get('SERVER_MODE', 'wsgi').upper()}")
 print(f"🔧 Workers: 2")
 print(f"🔧 Threads por worker: 4")
 print(f"🔧 Timeout: 120s")
+print(f"🔧 Preload: app e dados de referência carregados antes do fork")
 print(f"💾 Banco: PostgreSQL")
 print()
 
 # Comando Gunicorn
 gunicorn_cmd = [
     'gunicorn',
-    '--bind', f'0.0.0.0:{port}',
-    '--workers', '2',
-    '--threads', '4',
-    '--timeout', '120',
-    '--access-logfile', '-',
-    '--error-logfile', '-',
-    '--log-level', 'info',
-    'wsgi:app'
+    '-c', 'gunicorn.conf.py',
+    '--bind', f'0.0.0.0:{port}'
 ]
 
 print(f"🎯 Executando: {' '.join(gunicorn_cmd)}")
@@ -105,7 +94,8 @@ except Exception as e:
     print("\n⚠️  Tentando iniciar com Flask development server como fallback...")
     
     # Fallback para Flask development server
-    from src.main import app as flask_app
+    from src.main import create_app
+    flask_app = create_app(servidor_web=True)
     flask_app.run(
         host='0.0.0.0',
         port=int(port),
@@ -0,0 +1,707 @@
+"""
+Snapshot colunar de clientes e contatos para análises gerenciais
+
+Quebras por filial × classe × consultor × mês ao longo de anos não cabem
+nas rotas linha a linha do ORM. Aqui cada processo mantém arrays NumPy:
+
+- clientes: id, filial, classe, consultor (peças e serviços) e potencial
+  (peças + serviços), uma posição por cliente; a posição 0 é um cliente
+  vazio (contato sem cliente)
+- contatos: id, posição do cliente, dia (int32, dias desde 1970-01-01),
+  tipo e resultado (ids das tabelas de referência) e vendedor
+- arquivo: os mesmos campos dos contatos de contatos_arquivados
+  (src/arquivo.py), recarregados só quando o índice do arquivo muda
+
+Textos (filial, classe, consultor, vendedor) são codificados por
+dicionário (Categorias): código int32, 0 = vazio. Pivots são group-bys
+vetorizados (np.bincount sobre a chave combinada das dimensões).
+
+Atualização incremental: no máximo a cada ANALITICO_ATUALIZAR_SEGUNDOS
+relê as linhas com updated_at a partir da última marca (menos uma margem
+para transações longas). Exclusões não mudam updated_at: quando a contagem
+no banco difere da do snapshot, os ids são comparados e as linhas que
+faltam são removidas/lidas. Com ANALITICO_DIRETORIO o snapshot é gravado
+em disco (.npy) depois de uma carga completa e reaproveitado pelos
+próximos processos, que só leem o que mudou.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+import numpy as np
+from flask import current_app
+from sqlalchemy import select, func
+from src.models.user import db
+from src.models.cliente import Cliente
+from src.models.contato import ContatoRegistrado, ContatoArquivado
+from src import arquivo
+from src.referencias import obter_registro, descricao
+from src.metricas import registrar_cache
+
+_CLIENTES = Cliente.__table__
+_CONTATOS = ContatoRegistrado.__table__
+
+EPOCA = date(1970, 1, 1).toordinal()
+LOTE = 50000
+# Linhas alteradas durante uma transação longa podem ter updated_at
+# anterior à última marca: a releitura começa um pouco antes
+MARGEM = timedelta(minutes=5)
+# Faltando mais que essa fração dos contatos, refaz a carga completa
+LIMITE_INCREMENTAL = 0.2
+# Acima desse número de grupos o bincount dá lugar ao np.unique
+MAX_GRUPOS_DENSOS = 1 << 22
+
+CATEGORIAS = ('filial', 'classe', 'consultor', 'vendedor')
+COLUNAS_CLIENTES = ('ids', 'filial', 'classe', 'consultor', 'consultor_servicos', 'potencial')
+# Versão do layout gravado por salvar(); outra versão força carga completa
+FORMATO = 2
+# Dimensões do pivot: (origem, categoria ou coluna)
+DIMENSOES = {
+    'filial': ('cliente', 'filial'),
+    'classe': ('cliente', 'classe'),
+    'consultor': ('cliente', 'consultor'),
+    'consultor_servicos': ('cliente', 'consultor_servicos'),
+    'vendedor': ('contato', 'vendedor'),
+    'tipo_contato': ('contato', 'tipo'),
+    'resultado_contato': ('contato', 'resultado'),
+    'ano': ('tempo', 'ano'),
+    'mes': ('tempo', 'mes'),
+}
+MEDIDAS = ('contatos', 'clientes')
+# Máximo de grupos devolvidos pelo pivot (limite maior é reduzido a este)
+MAX_LIMITE = 100000
+
+
+class ParametroInvalido(ValueError):
+    pass
+
+
+class Categorias:
+    """Codificação por dicionário texto <-> código int32 (0 = vazio)"""
+
+    def __init__(self, valores=('',)):
+        self.valores = list(valores)
+        self.codigos = {valor: codigo for codigo, valor in enumerate(self.valores)}
+
+    def codificar(self, valores):
+        codigos = self.codigos
+        saida = np.empty(len(valores), dtype=np.int32)
+        for i, valor in enumerate(valores):
+            valor = valor or ''
+            codigo = codigos.get(valor)
+            if codigo is None:
+                codigo = codigos[valor] = len(self.valores)
+                self.valores.append(valor)
+            saida[i] = codigo
+        return saida
+
+    def __len__(self):
+        return len(self.valores)
+
+
+class Segmento:
+    """Contatos em colunas (arrays do mesmo tamanho)"""
+
+    COLUNAS = ('cliente', 'dia', 'tipo', 'resultado', 'vendedor')
+
+    def __init__(self, ids=None, **colunas):
+        self.ids = ids  # só no segmento da tabela quente
+        for nome in self.COLUNAS:
+            setattr(self, nome, colunas.get(nome, np.empty(0, dtype=np.int32)))
+
+    def __len__(self):
+        return len(self.dia)
+
+    def filtrar(self, manter):
+        return Segmento(
+            self.ids[manter] if self.ids is not None else None,
+            **{nome: getattr(self, nome)[manter] for nome in self.COLUNAS}
+        )
+
+    @staticmethod
+    def juntar(partes, com_ids=True):
+        partes = [p for p in partes if len(p)]
+        if not partes:
+            return Segmento(np.empty(0, dtype=np.int64) if com_ids else None)
+        return Segmento(
+            np.concatenate([p.ids for p in partes]) if com_ids else None,
+            **{nome: np.concatenate([getattr(p, nome) for p in partes]) for nome in Segmento.COLUNAS}
+        )
+
+
+class Snapshot:
+    """Estado imutável: cada atualização produz um Snapshot novo"""
+
+    def __init__(self, categorias, clientes, contatos, arquivados, marcas, chave_arquivo):
+        self.categorias = categorias   # {nome: Categorias}
+        self.clientes = clientes       # {nome: array} para cada nome em COLUNAS_CLIENTES
+        self.contatos = contatos       # Segmento (tabela quente, ordenado por id)
+        self.arquivados = arquivados   # Segmento (contatos_arquivados)
+        self.marcas = marcas           # {'clientes': datetime|None, 'contatos': datetime|None}
+        self.chave_arquivo = chave_arquivo
+        self.atualizado_em = datetime.utcnow()
+        self._derivadas = {}
+        self._lock = threading.Lock()
+
+    def coluna(self, segmento, nome):
+        """Coluna por contato de uma dimensão de cliente ou de tempo (memorizada)"""
+        chave = (id(segmento), nome)
+        valor = self._derivadas.get(chave)
+        if valor is None:
+            if nome in ('ano', 'mes'):
+                meses = segmento.dia.astype('datetime64[D]').astype('datetime64[M]').astype(np.int32)
+                valor = meses // 12 if nome == 'ano' else meses
+            else:
+                valor = self.clientes[nome][segmento.cliente]
+            with self._lock:
+                self._derivadas[chave] = valor
+        return valor
+
+
+# --- leitura do banco --------------------------------------------------------
+
+def _dia(valor):
+    if isinstance(valor, str):
+        valor = date.fromisoformat(valor[:10])
+    return valor.toordinal() - EPOCA
+
+
+def _maior(marca, valores):
+    """Maior updated_at entre a marca atual e os valores (None é ignorado)"""
+    valores = [v for v in valores if v is not None]
+    if marca is not None:
+        valores.append(marca)
+    return max(valores) if valores else None
+
+
+def _lotes(conn, stmt):
+    # Opções no statement: Connection.execution_options() alteraria a
+    # conexão da sessão para as consultas seguintes
+    resultado = conn.execute(stmt.execution_options(stream_results=True, yield_per=LOTE))
+    yield from resultado.partitions(LOTE)
+
+
+def _ler_clientes(conn, categorias, filtro=None):
+    stmt = select(
+        _CLIENTES.c.id, _CLIENTES.c.filial, _CLIENTES.c.classe,
+        _CLIENTES.c.consultor_pecas, _CLIENTES.c.consultor_servicos, _CLIENTES.c.updated_at,
+        _CLIENTES.c.potencial_pecas, _CLIENTES.c.potencial_servico
+    )
+    if filtro is not None:
+        stmt = stmt.where(filtro)
+    ids, filial, classe, consultor, servicos, potencial, marca = [], [], [], [], [], [], None
+    for lote in _lotes(conn, stmt):
+        ids.append(np.array([l[0] for l in lote], dtype=np.int64))
+        filial.append(categorias['filial'].codificar([l[1] for l in lote]))
+        classe.append(categorias['classe'].codificar([(l[2] or '').strip().upper() for l in lote]))
+        consultor.append(categorias['consultor'].codificar([l[3] for l in lote]))
+        servicos.append(categorias['consultor'].codificar([l[4] for l in lote]))
+        potencial.append(np.array([(l[6] or 0.0) + (l[7] or 0.0) for l in lote], dtype=np.float64))
+        marca = _maior(marca, [l[5] for l in lote])
+    vazio = np.empty(0, dtype=np.int32)
+    return {
+        'ids': np.concatenate(ids) if ids else np.empty(0, dtype=np.int64),
+        'filial': np.concatenate(filial) if filial else vazio,
+        'classe': np.concatenate(classe) if classe else vazio,
+        'consultor': np.concatenate(consultor) if consultor else vazio,
+        'consultor_servicos': np.concatenate(servicos) if servicos else vazio,
+        'potencial': np.concatenate(potencial) if potencial else np.empty(0, dtype=np.float64),
+    }, marca
+
+
+def _posicoes(clientes, cliente_ids):
+    """Posição de cada cliente_id nos arrays de clientes (0 se ausente)"""
+    ids = clientes['ids']
+    posicoes = np.searchsorted(ids, cliente_ids)
+    posicoes[posicoes >= len(ids)] = 0
+    posicoes[ids[posicoes] != cliente_ids] = 0
+    return posicoes.astype(np.int32)
+
+
+def _ler_contatos(conn, categorias, clientes, filtro=None):
+    stmt = select(
+        _CONTATOS.c.id, _CONTATOS.c.cliente_id, _CONTATOS.c.data_contato, _CONTATOS.c.tipo_contato_id,
+        _CONTATOS.c.resultado_contato_id, _CONTATOS.c.vendedor, _CONTATOS.c.updated_at
+    )
+    if filtro is not None:
+        stmt = stmt.where(filtro)
+    partes, marca = [], None
+    for lote in _lotes(conn, stmt):
+        partes.append(Segmento(
+            np.array([l[0] for l in lote], dtype=np.int64),
+            cliente=_posicoes(clientes, np.array([l[1] for l in lote], dtype=np.int64)),
+            dia=np.array([_dia(l[2]) for l in lote], dtype=np.int32),
+            tipo=np.array([l[3] for l in lote], dtype=np.int32),
+            resultado=np.array([l[4] for l in lote], dtype=np.int32),
+            vendedor=categorias['vendedor'].codificar([l[5] for l in lote]),
+        ))
+        marca = _maior(marca, [l[6] for l in lote])
+    segmento = Segmento.juntar(partes)
+    ordem = np.argsort(segmento.ids, kind='stable')
+    return segmento.filtrar(ordem), marca
+
+
+def _ler_arquivo(sessao, categorias, clientes, meses):
+    """Segmento com todos os meses de contatos_arquivados"""
+    registro = obter_registro()
+    tabela = ContatoArquivado.__table__
+    partes = []
+    if not meses:
+        return Segmento.juntar(partes, com_ids=False)
+    # Uma consulta em streaming (um mês por vez na memória), sem ocupar o
+    # cache de meses da listagem
+    stmt = select(tabela.c.dados).where(tabela.c.mes.in_([mes for mes, _, _ in meses]))
+    resultado = sessao.execute(stmt.execution_options(stream_results=True, yield_per=1))
+    for (dados,) in resultado:
+        linhas = arquivo.descomprimir_linhas(dados) if dados else []
+        if not linhas:
+            continue
+        # Blobs anteriores à normalização guardam só o texto de tipo/resultado
+        tipos = [l.get('tipo_contato_id') or registro.tipos.por_descricao.get(l.get('tipo_contato'), 0) for l in linhas]
+        resultados = [
+            l.get('resultado_contato_id') or registro.resultados.por_descricao.get(l.get('resultado_contato'), 0)
+            for l in linhas
+        ]
+        partes.append(Segmento(
+            cliente=_posicoes(clientes, np.array([l['cliente_id'] for l in linhas], dtype=np.int64)),
+            dia=np.array([_dia(l['data_contato']) for l in linhas], dtype=np.int32),
+            tipo=np.array(tipos, dtype=np.int32),
+            resultado=np.array(resultados, dtype=np.int32),
+            vendedor=categorias['vendedor'].codificar([l['vendedor'] for l in linhas]),
+        ))
+    return Segmento.juntar(partes, com_ids=False)
+
+
+def _com_sentinela(clientes):
+    """Posição 0 = cliente vazio (id 0, todas as categorias vazias)"""
+    return {nome: np.concatenate([np.zeros(1, dtype=valores.dtype), valores]) for nome, valores in clientes.items()}
+
+
+def construir(sessao=None):
+    """Carga completa a partir do banco"""
+    sessao = sessao or db.session
+    categorias = {nome: Categorias() for nome in CATEGORIAS}
+    conn = sessao.connection()
+    clientes, marca_clientes = _ler_clientes(conn, categorias)
+    ordem = np.argsort(clientes['ids'], kind='stable')
+    clientes = _com_sentinela({nome: valores[ordem] for nome, valores in clientes.items()})
+    contatos, marca_contatos = _ler_contatos(conn, categorias, clientes)
+    meses = arquivo.indice(sessao)
+    arquivados = _ler_arquivo(sessao, categorias, clientes, meses)
+    return Snapshot(categorias, clientes, contatos, arquivados,
+                    {'clientes': marca_clientes, 'contatos': marca_contatos}, tuple(meses))
+
+
+# --- atualização incremental -------------------------------------------------
+
+def _atualizar_clientes(conn, snapshot):
+    """(clientes, remapear, marca) — remapear[posição antiga] = posição nova (0 se excluído)
+
+    remapear é None quando nada mudou.
+    """
+    clientes = snapshot.clientes
+    ids = clientes['ids']
+    marca = snapshot.marcas['clientes']
+    novos, marca_nova = _ler_clientes(
+        conn, snapshot.categorias, _CLIENTES.c.updated_at >= marca - MARGEM if marca else None
+    )
+    total = conn.execute(select(func.count()).select_from(_CLIENTES)).scalar()
+    posicoes = _posicoes(clientes, novos['ids'])
+    conhecidos = posicoes > 0
+    esperado = len(ids) - 1 + int((~conhecidos).sum())
+    iguais = conhecidos.all() and all(
+        (clientes[nome][posicoes] == novos[nome]).all() for nome in clientes
+    )
+    if iguais and total == esperado:
+        # Só a releitura da margem: nada mudou
+        return clientes, None, marca_nova
+
+    manter = np.ones(len(ids), dtype=bool)
+    if total != esperado:
+        no_banco = _ids_no_banco(conn, _CLIENTES)
+        manter[1:] = np.isin(ids[1:], no_banco)
+        faltando = np.setdiff1d(no_banco, np.union1d(ids, novos['ids']))
+        if len(faltando):
+            extras, _ = _ler_clientes(conn, snapshot.categorias, _CLIENTES.c.id.in_(faltando.tolist()))
+            novos = {nome: np.concatenate([novos[nome], extras[nome]]) for nome in novos}
+
+    # Mantidos + lidos agora, ordenados por id; no id repetido vale o lido agora
+    juntos = {nome: np.concatenate([clientes[nome][manter], novos[nome]]) for nome in clientes}
+    ordem = np.argsort(juntos['ids'], kind='stable')
+    ordenados = juntos['ids'][ordem]
+    ultimo = np.ones(len(ordem), dtype=bool)
+    ultimo[:-1] = ordenados[1:] != ordenados[:-1]
+    atualizados = {nome: valores[ordem[ultimo]] for nome, valores in juntos.items()}
+
+    remapear = np.searchsorted(atualizados['ids'], ids).astype(np.int32)
+    remapear[~manter] = 0
+    return atualizados, remapear, marca_nova
+
+
+def _substituir(atual, novos):
+    """Aplica linhas novas/alteradas (ordenadas por id) a um Segmento ordenado por id"""
+    if not len(novos):
+        return atual
+    if len(atual):
+        posicoes = np.minimum(np.searchsorted(atual.ids, novos.ids), len(atual) - 1)
+        existentes = atual.ids[posicoes] == novos.ids
+    else:
+        posicoes = np.zeros(len(novos), dtype=np.int64)
+        existentes = np.zeros(len(novos), dtype=bool)
+
+    # A margem relê linhas já conhecidas: só copia se algum valor mudou
+    if existentes.any() and any(
+        (getattr(atual, nome)[posicoes[existentes]] != getattr(novos, nome)[existentes]).any()
+        for nome in Segmento.COLUNAS
+    ):
+        colunas = {}
+        for nome in Segmento.COLUNAS:
+            coluna = getattr(atual, nome).copy()
+            coluna[posicoes[existentes]] = getattr(novos, nome)[existentes]
+            colunas[nome] = coluna
+        atual = Segmento(atual.ids, **colunas)
+
+    inseridos = novos.filtrar(~existentes)
+    if not len(inseridos):
+        return atual
+    juntos = Segmento.juntar([atual, inseridos])
+    if len(atual) and inseridos.ids[0] < atual.ids[-1]:
+        # Ids novos no meio (raro): reordena tudo
+        juntos = juntos.filtrar(np.argsort(juntos.ids, kind='stable'))
+    return juntos
+
+
+def _ids_no_banco(conn, tabela):
+    return np.sort(np.fromiter((i for (i,) in conn.execute(select(tabela.c.id))), dtype=np.int64))
+
+
+def atualizar(snapshot, sessao=None):
+    """Snapshot com o que mudou no banco desde as marcas de updated_at"""
+    sessao = sessao or db.session
+    conn = sessao.connection()
+    categorias = snapshot.categorias
+
+    clientes, remapear, marca_clientes = _atualizar_clientes(conn, snapshot)
+    mudou = remapear is not None
+    contatos, arquivados = snapshot.contatos, snapshot.arquivados
+    if mudou and not (remapear == np.arange(len(remapear))).all():
+        contatos = Segmento(contatos.ids, **dict(
+            {nome: getattr(contatos, nome) for nome in Segmento.COLUNAS}, cliente=remapear[contatos.cliente]
+        ))
+        arquivados = Segmento(**dict(
+            {nome: getattr(arquivados, nome) for nome in Segmento.COLUNAS}, cliente=remapear[arquivados.cliente]
+        ))
+
+    # Contatos alterados ou novos por updated_at
+    marca = snapshot.marcas['contatos']
+    novos, marca_contatos = _ler_contatos(
+        conn, categorias, clientes, _CONTATOS.c.updated_at >= marca - MARGEM if marca else None
+    )
+    anteriores = contatos
+    contatos = _substituir(contatos, novos)
+    mudou = mudou or contatos is not anteriores
+
+    # Exclusões (e inserções com updated_at antigo) aparecem na contagem
+    total = conn.execute(select(func.count()).select_from(_CONTATOS)).scalar()
+    if total != len(contatos):
+        mudou = True
+        no_banco = _ids_no_banco(conn, _CONTATOS)
+        posicoes = np.minimum(np.searchsorted(no_banco, contatos.ids), max(len(no_banco) - 1, 0))
+        if len(no_banco):
+            contatos = contatos.filtrar(no_banco[posicoes] == contatos.ids)
+        else:
+            contatos = contatos.filtrar(np.zeros(len(contatos), dtype=bool))
+        faltando = np.setdiff1d(no_banco, contatos.ids, assume_unique=True)
+        if len(faltando) > LIMITE_INCREMENTAL * max(len(contatos), 1):
+            return construir(sessao)
+        for inicio in range(0, len(faltando), LOTE):
+            extras, _ = _ler_contatos(
+                conn, categorias, clientes, _CONTATOS.c.id.in_(faltando[inicio:inicio + LOTE].tolist())
+            )
+            contatos = _substituir(contatos, extras)
+
+    meses = tuple(arquivo.indice(sessao))
+    if meses != snapshot.chave_arquivo:
+        mudou = True
+        arquivados = _ler_arquivo(sessao, categorias, clientes, meses)
+
+    if not mudou:
+        return snapshot
+    marcas = {
+        'clientes': _maior(snapshot.marcas['clientes'], [marca_clientes]),
+        'contatos': _maior(snapshot.marcas['contatos'], [marca_contatos]),
+    }
+    return Snapshot(categorias, clientes, contatos, arquivados, marcas, meses)
+
+
+# --- persistência ------------------------------------------------------------
+
+_ARRAYS_CONTATOS = ('ids',) + Segmento.COLUNAS
+
+
+def salvar(snapshot, diretorio):
+    """Grava o snapshot em diretorio (troca atômica do diretório inteiro)"""
+    pai = os.path.dirname(os.path.abspath(diretorio)) or '.'
+    os.makedirs(pai, exist_ok=True)
+    temporario = tempfile.mkdtemp(prefix='.analitico-', dir=pai)
+    for nome, valores in snapshot.clientes.items():
+        np.save(os.path.join(temporario, f'clientes_{nome}.npy'), valores)
+    for nome in _ARRAYS_CONTATOS:
+        np.save(os.path.join(temporario, f'contatos_{nome}.npy'), getattr(snapshot.contatos, nome))
+    for nome in Segmento.COLUNAS:
+        np.save(os.path.join(temporario, f'arquivados_{nome}.npy'), getattr(snapshot.arquivados, nome))
+    with open(os.path.join(temporario, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'formato': FORMATO,
+            'categorias': {nome: c.valores for nome, c in snapshot.categorias.items()},
+            'marcas': {nome: m.isoformat() if m else None for nome, m in snapshot.marcas.items()},
+            'chave_arquivo': [[m.isoformat(), n, a.isoformat() if a else None] for m, n, a in snapshot.chave_arquivo],
+        }, f, ensure_ascii=False)
+
+    antigo = f'{diretorio}.antigo'
+    shutil.rmtree(antigo, ignore_errors=True)
+    if os.path.exists(diretorio):
+        os.replace(diretorio, antigo)
+    os.replace(temporario, diretorio)
+    shutil.rmtree(antigo, ignore_errors=True)
+
+
+def carregar(diretorio):
+    """Snapshot gravado por salvar(), ou None se não houver (ou for de outro formato)"""
+    caminho_meta = os.path.join(diretorio, 'meta.json')
+    if not os.path.exists(caminho_meta):
+        return None
+    with open(caminho_meta, encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('formato') != FORMATO:
+        return None
+
+    def ler(nome):
+        return np.load(os.path.join(diretorio, f'{nome}.npy'))
+
+    clientes = {nome: ler(f'clientes_{nome}') for nome in COLUNAS_CLIENTES}
+    contatos = Segmento(ler('contatos_ids'), **{nome: ler(f'contatos_{nome}') for nome in Segmento.COLUNAS})
+    arquivados = Segmento(**{nome: ler(f'arquivados_{nome}') for nome in Segmento.COLUNAS})
+    marcas = {nome: datetime.fromisoformat(m) if m else None for nome, m in meta['marcas'].items()}
+    chave = tuple(
+        (date.fromisoformat(m), n, datetime.fromisoformat(a) if a else None) for m, n, a in meta['chave_arquivo']
+    )
+    categorias = {nome: Categorias(valores) for nome, valores in meta['categorias'].items()}
+    return Snapshot(categorias, clientes, contatos, arquivados, marcas, chave)
+
+
+# --- snapshot do processo ----------------------------------------------------
+
+_lock = threading.Lock()
+_snapshot = None
+_verificado_em = 0.0
+
+
+def obter_snapshot():
+    """Snapshot do processo, atualizado no máximo a cada ANALITICO_ATUALIZAR_SEGUNDOS
+
+    Enquanto uma thread atualiza, as demais respondem com o snapshot atual.
+    """
+    global _snapshot, _verificado_em
+
+    intervalo = current_app.config.get('ANALITICO_ATUALIZAR_SEGUNDOS', 60)
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - _verificado_em < intervalo:
+        registrar_cache('analitico', True)
+        return snapshot
+    if not _lock.acquire(blocking=snapshot is None):
+        registrar_cache('analitico', True)
+        return snapshot
+
+    try:
+        if _snapshot is not None and time.monotonic() - _verificado_em < intervalo:
+            return _snapshot
+        registrar_cache('analitico', False)
+        diretorio = current_app.config.get('ANALITICO_DIRETORIO')
+        atual = _snapshot
+        if atual is None and diretorio:
+            atual = carregar(diretorio)
+        if atual is None:
+            atual = construir()
+            if diretorio:
+                salvar(atual, diretorio)
+        else:
+            atual = atualizar(atual)
+        _snapshot = atual
+        _verificado_em = time.monotonic()
+        return atual
+    finally:
+        _lock.release()
+
+
+# --- pivot -------------------------------------------------------------------
+
+def _rotulo_mes(mes):
+    return f'{1970 + mes // 12:04d}-{mes % 12 + 1:02d}'
+
+
+def _codigos_de(snapshot, dimensao, valores):
+    """Códigos internos dos valores (textos) pedidos num filtro"""
+    origem, nome = DIMENSOES[dimensao]
+    if origem == 'tempo':
+        raise ParametroInvalido(f'filtre {dimensao} com data_inicio/data_fim')
+    if nome in ('tipo', 'resultado'):
+        registro = obter_registro()
+        dicionario = registro.tipos if nome == 'tipo' else registro.resultados
+        return np.array([i for i, d in zip(dicionario.ids, dicionario.descricoes) if d in valores], dtype=np.int32)
+    categorias = snapshot.categorias['consultor' if nome == 'consultor_servicos' else nome]
+    return np.array([categorias.codigos[v] for v in valores if v in categorias.codigos], dtype=np.int32)
+
+
+def _e(manter, condicao):
+    return condicao if manter is None else manter & condicao
+
+
+def _colunas_do_segmento(snapshot, segmento, dimensao):
+    origem, nome = DIMENSOES[dimensao]
+    if origem == 'contato':
+        return getattr(segmento, nome)
+    return snapshot.coluna(segmento, nome)
+
+
+def pivot(snapshot, dimensoes, medida='contatos', filtros=None, limite=10000):
+    """Contagem por combinação das dimensões, sobre contatos quentes e arquivados
+
+    filtros: {'data_inicio': date, 'data_fim': date, <dimensão>: [textos]}.
+    Retorna {'linhas': [{dim: rótulo, ..., medida: n}], 'total', 'grupos', 'truncado'};
+    limite (1 a MAX_LIMITE) é o número máximo de grupos, os maiores primeiro.
+    """
+    filtros = filtros or {}
+    if limite < 1:
+        raise ParametroInvalido('limite deve ser ao menos 1')
+    limite = min(limite, MAX_LIMITE)
+    for dimensao in dimensoes:
+        if dimensao not in DIMENSOES:
+            raise ParametroInvalido(f'dimensão desconhecida: {dimensao}')
+    if len(set(dimensoes)) != len(dimensoes):
+        raise ParametroInvalido('dimensão repetida')
+    if medida not in MEDIDAS:
+        raise ParametroInvalido(f'medida desconhecida: {medida}')
+
+    segmentos = [s for s in (snapshot.contatos, snapshot.arquivados) if len(s)]
+    inicio = filtros.get('data_inicio')
+    fim = filtros.get('data_fim')
+    filtros_dimensao = {
+        dimensao: _codigos_de(snapshot, dimensao, valores)
+        for dimensao, valores in filtros.items() if dimensao in DIMENSOES and valores
+    }
+
+    def mascara(segmento):
+        """Contatos que passam nos filtros (None = todos, evita cópias)"""
+        manter = None
+        if inicio:
+            manter = segmento.dia >= inicio.toordinal() - EPOCA
+        if fim:
+            manter = _e(manter, segmento.dia <= fim.toordinal() - EPOCA)
+        for dimensao, codigos in filtros_dimensao.items():
+            manter = _e(manter, np.isin(_colunas_do_segmento(snapshot, segmento, dimensao), codigos))
+        return manter
+
+    def selecionar(valores, manter):
+        return valores if manter is None else valores[manter]
+
+    mascaras = [mascara(s) for s in segmentos]
+
+    # Cardinalidade e deslocamento de cada dimensão (iguais nos dois segmentos)
+    bases = []
+    for dimensao in dimensoes:
+        origem, nome = DIMENSOES[dimensao]
+        if origem == 'tempo':
+            valores = [selecionar(_colunas_do_segmento(snapshot, s, dimensao), m) for s, m in zip(segmentos, mascaras)]
+            valores = [v for v in valores if len(v)]
+            minimo = min((int(v.min()) for v in valores), default=0)
+            maximo = max((int(v.max()) for v in valores), default=0)
+            bases.append((minimo, maximo - minimo + 1))
+        elif nome in ('tipo', 'resultado'):
+            maximo = max((int(getattr(s, nome).max()) for s in segmentos), default=0)
+            bases.append((0, maximo + 1))
+        else:
+            bases.append((0, len(snapshot.categorias['consultor' if nome == 'consultor_servicos' else nome])))
+
+    grupos_possiveis = 1
+    for _, cardinalidade in bases:
+        grupos_possiveis *= cardinalidade
+
+    chaves_segmentos = []
+    for segmento, manter in zip(segmentos, mascaras):
+        chave = np.zeros(len(segmento) if manter is None else int(manter.sum()), dtype=np.int64)
+        for dimensao, (minimo, cardinalidade) in zip(dimensoes, bases):
+            coluna = selecionar(_colunas_do_segmento(snapshot, segmento, dimensao), manter)
+            chave *= cardinalidade
+            chave += coluna
+            if minimo:
+                chave -= minimo
+        if medida == 'clientes':
+            chaves_segmentos.append((chave, selecionar(segmento.cliente, manter)))
+        else:
+            chaves_segmentos.append((chave, None))
+
+    if medida == 'clientes':
+        # Clientes distintos por grupo: pares (grupo, cliente) únicos
+        numero_clientes = len(snapshot.clientes['ids'])
+        pares = np.unique(np.concatenate([
+            chave * numero_clientes + clientes for chave, clientes in chaves_segmentos
+        ])) if chaves_segmentos else np.empty(0, dtype=np.int64)
+        todas = pares // numero_clientes
+    else:
+        todas = np.concatenate([chave for chave, _ in chaves_segmentos]) if chaves_segmentos else np.empty(0, np.int64)
+
+    if grupos_possiveis <= MAX_GRUPOS_DENSOS:
+        densa = np.bincount(todas, minlength=grupos_possiveis)
+        chaves = np.flatnonzero(densa)
+        valores = densa[chaves]
+    else:
+        chaves, valores = np.unique(todas, return_counts=True)
+
+    truncado = len(chaves) > limite
+    if truncado:
+        # Os maiores grupos primeiro quando não cabem todos
+        maiores = np.argsort(-valores, kind='stable')[:limite]
+        maiores.sort()
+        chaves, valores = chaves[maiores], valores[maiores]
+
+    # Decodifica a chave combinada de volta em códigos por dimensão
+    codigos = []
+    resto = chaves.copy()
+    for minimo, cardinalidade in reversed(bases):
+        codigos.append(resto % cardinalidade + minimo)
+        resto //= cardinalidade
+    codigos.reverse()
+
+    registro = obter_registro()
+    rotuladores = []
+    for dimensao in dimensoes:
+        origem, nome = DIMENSOES[dimensao]
+        if nome == 'mes':
+            rotuladores.append(_rotulo_mes)
+        elif nome == 'ano':
+            rotuladores.append(lambda ano: 1970 + ano)
+        elif nome in ('tipo', 'resultado'):
+            dicionario = registro.tipos if nome == 'tipo' else registro.resultados
+            rotuladores.append(lambda id_, d=dicionario: descricao(d, id_))
+        else:
+            valores_categoria = snapshot.categorias['consultor' if nome == 'consultor_servicos' else nome].valores
+            rotuladores.append(lambda codigo, v=valores_categoria: v[codigo] or None)
+
+    linhas = []
+    colunas = [c.tolist() for c in codigos]
+    for i, valor in enumerate(valores.tolist()):
+        linha = {dimensao: rotular(colunas[d][i]) for d, (dimensao, rotular) in enumerate(zip(dimensoes, rotuladores))}
+        linha[medida] = valor
+        linhas.append(linha)
+
+    return {
+        'linhas': linhas,
+        'total': int(len(np.unique(pares % numero_clientes)) if medida == 'clientes' else len(todas)),
+        'grupos': len(linhas),
+        'truncado': truncado,
+    }
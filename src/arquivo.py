@@ -0,0 +1,248 @@
+"""
+Arquivo compacto de contatos antigos
+
+Contatos que saem de contatos_registrados ficam em contatos_arquivados:
+uma linha por mês com todas as colunas dos contatos daquele mês em JSON
+Lines comprimido com gzip. Arquivar de novo um mês já arquivado
+acrescenta as linhas ao blob existente. Entram no arquivo:
+- contatos além do horizonte (ARQUIVO_HORIZONTE_DIAS), movidos por
+  archive_contatos.py; o último contato de cada cliente fica sempre na
+  tabela quente (agenda e cadência dependem dele)
+- partições antigas arquivadas com --modo comprimir (src/particionamento.py)
+
+Leitura: GET /api/contatos consulta o arquivo só quando o período pedido
+alcança algum mês arquivado. O índice de meses (tabela pequena) e os
+meses já descomprimidos ficam em cache por processo.
+"""
+
+import gzip
+import json
+from datetime import date, datetime, timedelta
+from sqlalchemy import select, func
+from src.cache import CacheLRU
+from src.metricas import registrar_cache
+from src.models.contato import ContatoRegistrado, ContatoArquivado, TipoContato, ResultadoContato
+
+COLUNAS = [coluna.name for coluna in ContatoRegistrado.__table__.columns]
+_TABELA = ContatoArquivado.__table__
+_CONTATOS = ContatoRegistrado.__table__
+
+LOTE_EXCLUSAO = 500
+# O índice é relido a cada INDICE_TTL segundos: arquivamentos feitos por
+# outro processo aparecem nas leituras depois desse prazo
+INDICE_TTL = 30
+MESES_EM_CACHE = 24
+# GET /api/contatos percorre no máximo esta quantidade de contatos do período
+# arquivado (quentes antigos + arquivo) para montar uma página
+PROFUNDIDADE_MAXIMA = 10000
+
+_indice = CacheLRU('arquivo', tamanho=1, ttl=INDICE_TTL)
+_meses = CacheLRU('arquivo', tamanho=MESES_EM_CACHE, ttl=3600)
+
+
+def proximo_mes(mes):
+    return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+
+def _json(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    raise TypeError(f'{type(valor).__name__} não é serializável')
+
+
+def comprimir_linhas(linhas):
+    """Lista de dicts -> JSON Lines comprimido (gzip)"""
+    texto = '\n'.join(json.dumps(linha, default=_json, ensure_ascii=False) for linha in linhas)
+    return gzip.compress(texto.encode('utf-8'), compresslevel=9, mtime=0)
+
+
+def descomprimir_linhas(dados):
+    """JSON Lines comprimido -> lista de dicts (datas continuam em ISO 8601)"""
+    return [json.loads(linha) for linha in gzip.decompress(dados).decode('utf-8').splitlines() if linha]
+
+
+def _descricoes(conn):
+    """({id: tipo}, {id: resultado}) para gravar o texto junto dos ids"""
+    tipos = dict(conn.execute(select(TipoContato.id, TipoContato.descricao)).all())
+    resultados = dict(conn.execute(select(ResultadoContato.id, ResultadoContato.descricao)).all())
+    return tipos, resultados
+
+
+def arquivar_linhas(conn, linhas):
+    """Grava contatos (dicts com COLUNAS) em contatos_arquivados, um blob por mês
+
+    Tipo e resultado vão também como texto: o arquivo se lê sozinho, mesmo
+    que a tabela de referência mude. Usa a conexão (e a transação)
+    recebida; retorna {mês: quantidade}.
+    """
+    tipos, resultados = _descricoes(conn)
+    por_mes = {}
+    for linha in linhas:
+        linha = dict(linha)
+        linha.setdefault('tipo_contato', tipos.get(linha.get('tipo_contato_id')))
+        linha.setdefault('resultado_contato', resultados.get(linha.get('resultado_contato_id')))
+        por_mes.setdefault(linha['data_contato'].replace(day=1), []).append(linha)
+
+    agora = datetime.utcnow()
+    for mes, novas in por_mes.items():
+        existente = conn.execute(select(_TABELA.c.dados).where(_TABELA.c.mes == mes)).scalar()
+        if existente is None:
+            conn.execute(_TABELA.insert().values(
+                mes=mes, linhas=len(novas), dados=comprimir_linhas(novas), created_at=agora, updated_at=agora
+            ))
+            continue
+        todas = descomprimir_linhas(existente) + novas
+        conn.execute(_TABELA.update().where(_TABELA.c.mes == mes).values(
+            linhas=len(todas), dados=comprimir_linhas(todas), updated_at=agora
+        ))
+
+    return {mes: len(novas) for mes, novas in por_mes.items()}
+
+
+def corte_do_horizonte(horizonte_dias, hoje=None):
+    """Primeiro dia do mês do horizonte: contatos anteriores vão para o arquivo"""
+    return ((hoje or date.today()) - timedelta(days=horizonte_dias)).replace(day=1)
+
+
+def arquivar_antigos(engine, horizonte_dias):
+    """Move para o arquivo os contatos anteriores ao horizonte, mês a mês
+
+    Cada mês é uma transação (cópia comprimida + DELETE). O contato mais
+    recente de cada cliente nunca é arquivado. Retorna {mês: quantidade}.
+    """
+    corte = corte_do_horizonte(horizonte_dias)
+    recentes = _CONTATOS.alias('recentes')
+    ultimo_do_cliente = select(func.max(recentes.c.data_contato)).where(
+        recentes.c.cliente_id == _CONTATOS.c.cliente_id
+    ).scalar_subquery()
+
+    with engine.connect() as conn:
+        primeira = conn.execute(
+            select(func.min(_CONTATOS.c.data_contato)).where(_CONTATOS.c.data_contato < corte)
+        ).scalar()
+
+    arquivados = {}
+    mes = primeira.replace(day=1) if primeira else corte
+    while mes < corte:
+        seguinte = proximo_mes(mes)
+        no_mes = (_CONTATOS.c.data_contato >= mes, _CONTATOS.c.data_contato < seguinte)
+        with engine.begin() as conn:
+            linhas = conn.execute(
+                select(_CONTATOS).where(*no_mes, _CONTATOS.c.data_contato < ultimo_do_cliente).order_by(_CONTATOS.c.id)
+            ).mappings().all()
+            if linhas:
+                arquivar_linhas(conn, linhas)
+                ids = [linha['id'] for linha in linhas]
+                # data_contato no filtro: numa tabela particionada lê só a partição do mês
+                for inicio in range(0, len(ids), LOTE_EXCLUSAO):
+                    conn.execute(_CONTATOS.delete().where(*no_mes, _CONTATOS.c.id.in_(ids[inicio:inicio + LOTE_EXCLUSAO])))
+                arquivados[mes] = len(linhas)
+        mes = seguinte
+    return arquivados
+
+
+def indice(sessao):
+    """[(mês, linhas, updated_at)] dos meses arquivados, do mais recente ao mais antigo"""
+    em_cache = _indice.obter_varios(['meses'])
+    registrar_cache('arquivo_indice', bool(em_cache))
+    if em_cache:
+        return em_cache['meses']
+
+    meses = [tuple(linha) for linha in sessao.execute(
+        select(_TABELA.c.mes, _TABELA.c.linhas, _TABELA.c.updated_at).order_by(_TABELA.c.mes.desc())
+    )]
+    _indice.guardar_varios({'meses': meses})
+    return meses
+
+
+def meses_no_periodo(meses, data_inicio=None, data_fim=None):
+    """Meses do índice que têm dias entre data_inicio e data_fim (inclusive)"""
+    return [
+        item for item in meses
+        if (data_fim is None or item[0] <= data_fim)
+        and (data_inicio is None or proximo_mes(item[0]) > data_inicio)
+    ]
+
+
+def _linhas_do_mes(sessao, mes, atualizado_em):
+    """Contatos do mês em ordem decrescente de data/hora (cache por versão do mês)"""
+    chave = (mes, atualizado_em)
+    em_cache = _meses.obter_varios([chave])
+    registrar_cache('arquivo_meses', bool(em_cache))
+    if em_cache:
+        return em_cache[chave]
+
+    dados = sessao.execute(select(_TABELA.c.dados).where(_TABELA.c.mes == mes)).scalar()
+    linhas = tuple(sorted(
+        descomprimir_linhas(dados) if dados else [],
+        key=lambda l: (l['data_contato'], l['hora_contato'] or ''), reverse=True
+    ))
+    _meses.guardar_varios({chave: linhas})
+    return linhas
+
+
+def _contem(valor, termo):
+    return termo in (valor or '').lower()
+
+
+def consultar(sessao, meses, limite, data_inicio=None, data_fim=None, vendedor='',
+              tipo_contato='', resultado_contato='', busca='', clientes_busca=()):
+    """(total, até `limite` contatos) do arquivo que atendem os filtros
+
+    Mesmos filtros de GET /api/contatos (ILIKE vira "contém", sem
+    diferenciar maiúsculas); a busca textual casa a observação ou os
+    clientes de clientes_busca. Meses inteiros dentro do período, sem
+    outros filtros, são contados pelo índice, sem descomprimir.
+    """
+    inicio_iso = data_inicio.isoformat() if data_inicio else None
+    fim_iso = data_fim.isoformat() if data_fim else None
+    vendedor, tipo_contato, resultado_contato, busca = (
+        termo.lower() for termo in (vendedor, tipo_contato, resultado_contato, busca)
+    )
+    sem_filtros = not (vendedor or tipo_contato or resultado_contato or busca)
+
+    def atende(linha):
+        return (
+            (inicio_iso is None or linha['data_contato'] >= inicio_iso)
+            and (fim_iso is None or linha['data_contato'] <= fim_iso)
+            and (not vendedor or _contem(linha['vendedor'], vendedor))
+            and (not tipo_contato or _contem(linha['tipo_contato'], tipo_contato))
+            and (not resultado_contato or _contem(linha['resultado_contato'], resultado_contato))
+            and (not busca or linha['cliente_id'] in clientes_busca or _contem(linha['observacao'], busca))
+        )
+
+    total = 0
+    encontrados = []
+    for mes, quantidade, atualizado_em in meses:
+        inteiro = (data_inicio is None or data_inicio <= mes) and (
+            data_fim is None or proximo_mes(mes) - timedelta(days=1) <= data_fim
+        )
+        if sem_filtros and inteiro and len(encontrados) >= limite:
+            total += quantidade
+            continue
+        for linha in _linhas_do_mes(sessao, mes, atualizado_em):
+            if atende(linha):
+                total += 1
+                if len(encontrados) < limite:
+                    encontrados.append(linha)
+    return total, encontrados
+
+
+def item_arquivado(linha, cliente=None):
+    """Contato arquivado no formato de ContatoRegistrado.to_dict()"""
+    return {
+        'id': linha['id'],
+        'cliente_id': linha['cliente_id'],
+        'cliente_nome': cliente.nome if cliente else None,
+        'cliente_cod': cliente.cod_cliente if cliente else None,
+        'data_contato': linha['data_contato'],
+        'tipo_contato': linha['tipo_contato'],
+        'resultado_contato': linha['resultado_contato'],
+        'observacao': linha['observacao'],
+        'vendedor': linha['vendedor'],
+        'proximo_contato': linha['proximo_contato'],
+        'hora_contato': linha['hora_contato'],
+        'created_at': linha['created_at'],
+        'updated_at': linha['updated_at'],
+        'arquivado': True
+    }
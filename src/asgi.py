@@ -0,0 +1,234 @@
+"""
+Modo de servir ASGI (SERVER_MODE=asgi)
+
+O app Flask completo continua atendendo todas as rotas através do
+adaptador WsgiToAsgi (asgiref), que executa cada requisição numa thread.
+As leituras mais acessadas (busca de clientes, agenda e estatísticas do
+dashboard) têm handlers assíncronos nativos: usam a extensão asyncio do
+SQLAlchemy (asyncpg/aiosqlite) e não ocupam uma thread enquanto esperam o
+banco. Os SELECTs são os mesmos do modo WSGI (src/consultas.py).
+
+Leituras assíncronas vão para a réplica quando DATABASE_REPLICA_URL está
+configurada, respeitando o cookie de escrita recente (src/replica.py);
+se a réplica falhar, a consulta é repetida no primário. Requisições com
+perfilamento solicitado (X-Perfil) passam pelo Flask para serem perfiladas.
+"""
+
+import re
+import time
+from datetime import date
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qsl
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy import select, func
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_accept_header
+from src.main import create_app
+from src.replica import BIND_REPLICA, COOKIE_ESCRITA
+from src.metricas import em_andamento, registrar_requisicao
+from src.perfilamento import perfil_solicitado, CABECALHO
+from src.compressao import escolher_codificacao, comprimir
+from src.consultas import (
+    consulta_clientes, consulta_agenda, item_agenda, consultas_dashboard,
+    montar_dashboard, parametros_paginacao, paginacao
+)
+
+
+def url_assincrona(url):
+    """Troca o driver da URL do banco pelo equivalente assíncrono"""
+    if url.startswith('postgres://'):
+        url = url.replace('postgres://', 'postgresql://', 1)
+    for prefixo in ('postgresql://', 'postgresql+psycopg2://'):
+        if url.startswith(prefixo):
+            return 'postgresql+asyncpg://' + url[len(prefixo):]
+    if url.startswith('sqlite://'):
+        return 'sqlite+aiosqlite://' + url[len('sqlite://'):]
+    return url
+
+
+def opcoes_assincronas(opcoes):
+    """Adapta SQLALCHEMY_ENGINE_OPTIONS para create_async_engine
+
+    O pool instrumentado é síncrono (o asyncio usa AsyncAdaptedQueuePool) e
+    o statement_timeout do psycopg2 vira server_settings do asyncpg.
+    """
+    resultado = {k: v for k, v in opcoes.items() if k not in ('poolclass', 'connect_args')}
+    m = re.search(r'statement_timeout=(\d+)', opcoes.get('connect_args', {}).get('options', ''))
+    if m:
+        resultado['connect_args'] = {'server_settings': {'statement_timeout': m.group(1)}}
+    return resultado
+
+
+async def _paginar(sessao, stmt, args, serializar):
+    page, per_page, pagina, por_pagina = parametros_paginacao(args)
+    total = await sessao.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+    resultado = await sessao.execute(stmt.limit(por_pagina).offset((pagina - 1) * por_pagina))
+    return {
+        'success': True,
+        'data': [serializar(item) for item in resultado.unique().scalars()],
+        'pagination': paginacao(page, per_page, por_pagina, total)
+    }
+
+
+async def listar_clientes(sessao, args):
+    return await _paginar(sessao, consulta_clientes(args), args, lambda cliente: cliente.to_dict())
+
+
+async def listar_agenda(sessao, args):
+    hoje = date.today()
+    return await _paginar(sessao, consulta_agenda(args, hoje), args,
+                          lambda contato: item_agenda(contato, hoje))
+
+
+async def estatisticas_dashboard(sessao, args):
+    consultas = consultas_dashboard(args, date.today())
+    resultados = {}
+    for nome, stmt in consultas.items():
+        if nome in ('total_contatos', 'contatos_atrasados'):
+            resultados[nome] = await sessao.scalar(stmt)
+        else:
+            resultados[nome] = (await sessao.execute(stmt)).all()
+    return {'success': True, 'data': montar_dashboard(resultados)}
+
+
+# Rotas GET atendidas sem passar pelo Flask: path -> (endpoint equivalente, handler)
+# O nome do endpoint Flask é usado nas métricas, igual nos dois modos.
+ROTAS_ASSINCRONAS = {
+    '/api/clientes': ('cliente.get_clientes', listar_clientes),
+    '/api/agenda': ('contato.get_agenda', listar_agenda),
+    '/api/dashboard/stats': ('contato.get_dashboard_stats', estatisticas_dashboard),
+}
+
+
+class AppAssincrono:
+    """Aplicação ASGI: rotas assíncronas nativas + Flask via WsgiToAsgi"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        # Engines criadas no primeiro uso, já dentro do worker (após o fork)
+        self._engines = {}
+        self._sessoes = None
+
+    def _fabricas(self):
+        if self._sessoes is None:
+            config = self.flask_app.config
+            engines = {
+                'primario': create_async_engine(
+                    url_assincrona(config['SQLALCHEMY_DATABASE_URI']),
+                    **opcoes_assincronas(config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+                )
+            }
+            replica = config.get('SQLALCHEMY_BINDS', {}).get(BIND_REPLICA)
+            if replica:
+                engines[BIND_REPLICA] = create_async_engine(
+                    url_assincrona(replica['url']), **opcoes_assincronas(replica)
+                )
+            self._engines = engines
+            self._sessoes = {
+                nome: async_sessionmaker(engine, expire_on_commit=False)
+                for nome, engine in engines.items()
+            }
+        return self._sessoes
+
+    async def fechar(self):
+        if self._sessoes:
+            for engine in self._engines.values():
+                await engine.dispose()
+            self._sessoes = None
+
+    async def _executar(self, handler, args, cookies):
+        fabricas = self._fabricas()
+        if BIND_REPLICA in fabricas and not cookies.get(COOKIE_ESCRITA):
+            try:
+                async with fabricas[BIND_REPLICA]() as sessao:
+                    return await handler(sessao, args)
+            except DBAPIError as e:
+                print(f"Réplica indisponível, usando primário: {e}")
+        async with fabricas['primario']() as sessao:
+            return await handler(sessao, args)
+
+    async def _responder(self, endpoint, handler, scope, send):
+        inicio = time.perf_counter()
+        em_andamento.labels(endpoint=endpoint).inc()
+        try:
+            status = await self._responder_json(handler, scope, send)
+        finally:
+            em_andamento.labels(endpoint=endpoint).dec()
+        registrar_requisicao(scope['method'], endpoint, status, time.perf_counter() - inicio)
+
+    async def _responder_json(self, handler, scope, send):
+        cabecalhos = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+        args = MultiDict(parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True))
+        cookies = {k: m.value for k, m in SimpleCookie(cabecalhos.get('cookie', '')).items()}
+
+        try:
+            status, payload = 200, await self._executar(handler, args, cookies)
+        except Exception as e:
+            status, payload = 500, {'success': False, 'error': str(e)}
+
+        corpo = self._json(payload)
+        headers = [(b'content-type', b'application/json')]
+        config = self.flask_app.config
+        if config.get('COMPRESSAO_ATIVA', True):
+            # Mesma regra do after_request de src/compressao.py
+            headers.append((b'vary', b'Accept-Encoding'))
+            codificacao = escolher_codificacao(parse_accept_header(cabecalhos.get('accept-encoding')))
+            if codificacao and len(corpo) >= config.get('COMPRESSAO_MINIMO_BYTES', 1024):
+                corpo = comprimir(corpo, codificacao, config)
+                headers.append((b'content-encoding', codificacao.encode()))
+        headers.append((b'content-length', str(len(corpo)).encode()))
+        headers += self._cabecalhos_cors(cabecalhos.get('origin'))
+
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': corpo if scope['method'] == 'GET' else b''})
+        return status
+
+    def _json(self, payload):
+        """Serializa como o jsonify (compacto fora do modo debug)"""
+        if self.flask_app.debug:
+            texto = self.flask_app.json.dumps(payload, indent=2)
+        else:
+            texto = self.flask_app.json.dumps(payload, separators=(',', ':'))
+        return f"{texto}\n".encode('utf-8')
+
+    def _cabecalhos_cors(self, origem):
+        """Mesmo Access-Control-Allow-Origin que o flask-cors aplicaria"""
+        if not origem:
+            return []
+        permitidas = self.flask_app.config.get('CORS_ORIGINS', '*')
+        if '*' in permitidas:
+            return [(b'access-control-allow-origin', b'*')]
+        if origem in permitidas:
+            return [(b'access-control-allow-origin', origem.encode('latin-1')), (b'vary', b'Origin')]
+        return []
+
+    def _perfilar(self, scope):
+        """Perfilamento pedido: a requisição vai para o Flask (src/perfilamento.py)"""
+        nome = CABECALHO.lower().encode('latin-1')
+        cabecalhos = {CABECALHO: v.decode('latin-1') for k, v in scope['headers'] if k == nome}
+        args = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+        return perfil_solicitado(cabecalhos, args)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                mensagem = await receive()
+                if mensagem['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif mensagem['type'] == 'lifespan.shutdown':
+                    await self.fechar()
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+
+        rota = ROTAS_ASSINCRONAS.get(scope.get('path')) if scope['type'] == 'http' else None
+        if rota and scope['method'] in ('GET', 'HEAD') and not self._perfilar(scope):
+            return await self._responder(*rota, scope, send)
+        return await self.wsgi(scope, receive, send)
+
+
+def create_asgi_app(config=None):
+    """Cria a aplicação ASGI sobre o mesmo create_app do modo WSGI"""
+    return AppAssincrono(create_app(config, servidor_web=True))
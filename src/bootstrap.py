@@ -0,0 +1,31 @@
+"""
+Preparação do banco de dados (executar uma vez por deploy)
+
+Cria as tabelas que faltam, aplica as migrações incrementais, cria as
+partições futuras de contatos_registrados (se particionada, ver
+src/particionamento.py) e garante o usuário master padrão. Não roda na importação do app nem nos workers
+do Gunicorn; é chamado por bootstrap_db.py e run_production.py.
+"""
+
+from src.models.user import db, User
+from src.models import cliente, contato, auditoria, fila  # noqa: F401 (registrar tabelas)
+from src.migrations import aplicar_migracoes
+from src.particionamento import manter
+
+
+def bootstrap_database(app, criar_admin=True):
+    """Cria tabelas, aplica migrações, mantém partições e garante o usuário master"""
+    with app.app_context():
+        db.create_all()
+        migracoes = aplicar_migracoes()
+        particoes = manter(db.engine)
+
+        master_email = None
+        if criar_admin:
+            master_email = User.create_default_master().email
+
+    return {
+        'migracoes': migracoes,
+        'particoes': particoes,
+        'master': master_email
+    }
@@ -0,0 +1,89 @@
+"""
+Registro de caches em memória e invalidação por domínio
+
+Cada cache em memória (por processo) se registra em um domínio
+(ex.: 'clientes') e é limpo sempre que esse domínio for invalidado.
+Além dos callbacks, cada domínio mantém um contador de versão que pode
+ser usado como parte da chave de caches derivados.
+
+CacheLRU é um cache chave → valor de tamanho limitado (LRU) com validade
+por entrada, limpo automaticamente quando o seu domínio é invalidado.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+_lock = threading.Lock()
+_invalidadores = {}
+_versoes = {}
+
+
+def registrar_invalidador(dominio, funcao):
+    """Registra uma função chamada sempre que o domínio for invalidado"""
+    with _lock:
+        _invalidadores.setdefault(dominio, []).append(funcao)
+    return funcao
+
+
+def invalidar(dominio):
+    """Invalida todos os caches registrados no domínio e incrementa sua versão"""
+    with _lock:
+        _versoes[dominio] = _versoes.get(dominio, 0) + 1
+        funcoes = list(_invalidadores.get(dominio, []))
+
+    for funcao in funcoes:
+        try:
+            funcao()
+        except Exception as e:
+            print(f"Erro ao invalidar cache '{dominio}': {e}")
+
+
+def versao(dominio):
+    """Retorna a versão atual do domínio (muda a cada invalidação)"""
+    return _versoes.get(dominio, 0)
+
+
+class CacheLRU:
+    """Cache LRU por processo, com TTL por entrada, limpo com o domínio"""
+
+    def __init__(self, dominio, tamanho=1000, ttl=60):
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._itens = OrderedDict()
+        registrar_invalidador(dominio, self.limpar)
+
+    def obter_varios(self, chaves):
+        """Retorna {chave: valor} das chaves presentes e válidas"""
+        agora = time.monotonic()
+        encontrados = {}
+        with self._lock:
+            for chave in chaves:
+                item = self._itens.get(chave)
+                if item is None:
+                    continue
+                valor, expira_em = item
+                if expira_em < agora:
+                    del self._itens[chave]
+                    continue
+                self._itens.move_to_end(chave)
+                encontrados[chave] = valor
+        return encontrados
+
+    def guardar_varios(self, itens):
+        """Guarda {chave: valor}, descartando os menos usados além do tamanho"""
+        expira_em = time.monotonic() + self.ttl
+        with self._lock:
+            for chave, valor in itens.items():
+                self._itens[chave] = (valor, expira_em)
+                self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho:
+                self._itens.popitem(last=False)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
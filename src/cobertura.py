@@ -0,0 +1,250 @@
+"""
+Cobertura da carteira: quais clientes estão fora da cadência da classe
+
+Para todos os clientes de uma vez, a partir do snapshot colunar de
+src/analitico.py:
+
+- último contato (maior data_contato, incluindo o arquivo)
+- vencimento: último contato + CADENCIA_DIAS da classe, levado ao próximo
+  dia útil (mesma regra de calcular_proximo_contato)
+- dias de atraso em dias úteis (np.busday_count com os feriados do registro)
+- cobertura % (clientes em dia / clientes) por consultor, filial ou classe
+
+O resultado fica em memória enquanto o snapshot, a versão do registro de
+referências (feriados) e o dia forem os mesmos; o snapshot se atualiza de
+forma incremental e o último contato dos arquivados é reaproveitado
+enquanto o arquivo não muda.
+"""
+
+import threading
+from datetime import date, datetime
+import numpy as np
+from src.models.cliente import cadencia_dias
+from src.referencias import obter_registro
+from src.metricas import registrar_cache
+from src import analitico
+
+SITUACOES = ('em_dia', 'atrasado', 'sem_contato')
+EM_DIA, ATRASADO, SEM_CONTATO = range(3)
+# Dimensões do resumo: categoria do snapshot de cada uma
+AGRUPAMENTOS = {
+    'consultor': 'consultor',
+    'consultor_servicos': 'consultor',
+    'filial': 'filial',
+    'classe': 'classe',
+}
+ORDENACOES = ('dias_atraso', 'ultimo_contato', 'vencimento', 'cadencia_dias')
+SEM_DATA = np.iinfo(np.int32).min
+
+
+class Cobertura:
+    """Arrays alinhados às posições de clientes do snapshot (posição 0 = vazio)"""
+
+    def __init__(self, snapshot, hoje, versao, ultimo, cadencia, vencimento, atraso, situacao):
+        self.snapshot = snapshot
+        self.hoje = hoje
+        self.versao = versao          # versão do registro (feriados) usada
+        self.ultimo = ultimo          # dia do último contato (SEM_DATA se nunca)
+        self.cadencia = cadencia      # dias corridos da classe
+        self.vencimento = vencimento  # dia útil do próximo contato devido
+        self.atraso = atraso          # dias úteis de atraso (0 se em dia)
+        self.situacao = situacao      # EM_DIA, ATRASADO ou SEM_CONTATO
+        self.calculado_em = datetime.utcnow()
+
+
+def _dias(valores):
+    return valores.astype('datetime64[D]')
+
+
+def _ultimo_por_cliente(segmento, clientes):
+    ultimo = np.full(clientes, SEM_DATA, dtype=np.int32)
+    if len(segmento):
+        np.maximum.at(ultimo, segmento.cliente, segmento.dia)
+    return ultimo
+
+
+_arquivo = (None, None)  # (Segmento de arquivados, último contato por cliente)
+
+
+def _ultimo_arquivado(segmento, clientes):
+    """Último contato arquivado por cliente, recalculado só quando o arquivo muda"""
+    global _arquivo
+    anterior, ultimo = _arquivo
+    if anterior is not segmento or len(ultimo) != clientes:
+        ultimo = _ultimo_por_cliente(segmento, clientes)
+        _arquivo = (segmento, ultimo)
+    return ultimo
+
+
+def calcular(snapshot, feriados, hoje, versao=None):
+    """Cobertura de todos os clientes do snapshot na data `hoje`"""
+    clientes = len(snapshot.clientes['ids'])
+    ultimo = np.maximum(
+        _ultimo_por_cliente(snapshot.contatos, clientes),
+        _ultimo_arquivado(snapshot.arquivados, clientes)
+    )
+
+    # Cadência por código de classe, depois por cliente
+    classes = snapshot.categorias['classe'].valores
+    cadencia = np.array([cadencia_dias(c) for c in classes], dtype=np.int32)[snapshot.clientes['classe']]
+
+    feriados = np.array(feriados, dtype='datetime64[D]')
+    sem_contato = ultimo == SEM_DATA
+    base = np.where(sem_contato, 0, ultimo) + cadencia
+    vencimento = np.busday_offset(_dias(base), 0, roll='forward', holidays=feriados)
+    dia_hoje = np.datetime64(hoje, 'D')
+    atraso = np.maximum(np.busday_count(vencimento, dia_hoje, holidays=feriados), 0).astype(np.int32)
+
+    situacao = np.where(atraso > 0, ATRASADO, EM_DIA).astype(np.int8)
+    situacao[sem_contato] = SEM_CONTATO
+    atraso[sem_contato] = 0
+    vencimento = (vencimento - np.datetime64(0, 'D')).astype(np.int32)
+    vencimento[sem_contato] = SEM_DATA
+
+    return Cobertura(snapshot, hoje, versao, ultimo, cadencia, vencimento, atraso, situacao)
+
+
+_lock = threading.Lock()
+_cobertura = None
+
+
+def obter_cobertura():
+    """Cobertura atual, recalculada quando snapshot, feriados ou o dia mudam"""
+    global _cobertura
+
+    snapshot = analitico.obter_snapshot()
+    registro = obter_registro()
+    hoje = datetime.now().date()
+    cobertura = _cobertura
+    acerto = (
+        cobertura is not None and cobertura.snapshot is snapshot
+        and cobertura.versao == registro.versao and cobertura.hoje == hoje
+    )
+    registrar_cache('cobertura', acerto)
+    if acerto:
+        return cobertura
+
+    with _lock:
+        cobertura = calcular(snapshot, registro.feriados, hoje, registro.versao)
+        _cobertura = cobertura
+    return cobertura
+
+
+def _codigos(cobertura, categoria, valores):
+    categorias = cobertura.snapshot.categorias[categoria]
+    if categoria == 'classe':
+        valores = [v.strip().upper() for v in valores]
+    return np.array([categorias.codigos[v] for v in valores if v in categorias.codigos], dtype=np.int32)
+
+
+def selecionar(cobertura, filtros=None):
+    """Posições dos clientes que passam nos filtros ({dimensão: [textos], 'situacao': [...]})"""
+    filtros = filtros or {}
+    clientes = cobertura.snapshot.clientes
+    manter = np.ones(len(clientes['ids']), dtype=bool)
+    manter[0] = False  # posição vazia (contatos sem cliente)
+    for dimensao, valores in filtros.items():
+        if not valores:
+            continue
+        if dimensao == 'situacao':
+            desconhecidas = set(valores) - set(SITUACOES)
+            if desconhecidas:
+                raise analitico.ParametroInvalido(f'situação desconhecida: {", ".join(sorted(desconhecidas))}')
+            manter &= np.isin(cobertura.situacao, [SITUACOES.index(v) for v in valores])
+        elif dimensao in AGRUPAMENTOS:
+            manter &= np.isin(clientes[dimensao], _codigos(cobertura, AGRUPAMENTOS[dimensao], valores))
+        else:
+            raise analitico.ParametroInvalido(f'filtro desconhecido: {dimensao}')
+    return np.flatnonzero(manter)
+
+
+def ordenar(cobertura, posicoes, campo='dias_atraso', decrescente=True):
+    """Posições ordenadas pelo campo; clientes sem contato contam como os mais atrasados"""
+    if campo not in ORDENACOES:
+        raise analitico.ParametroInvalido(f'ordenação desconhecida: {campo}')
+    if campo == 'dias_atraso':
+        # Sem contato acima de qualquer atraso
+        chave = np.where(cobertura.situacao == SEM_CONTATO, np.iinfo(np.int32).max, cobertura.atraso)
+    elif campo == 'cadencia_dias':
+        chave = cobertura.cadencia
+    else:
+        # Sem contato/vencimento como a data mais antiga
+        chave = cobertura.ultimo if campo == 'ultimo_contato' else cobertura.vencimento
+    chave = chave[posicoes].astype(np.int64)
+    if decrescente:
+        chave = -chave
+    # Desempate estável pelo id do cliente
+    ordem = np.lexsort((cobertura.snapshot.clientes['ids'][posicoes], chave))
+    return posicoes[ordem]
+
+
+def _data(dia):
+    return None if dia == SEM_DATA else date.fromordinal(int(dia) + analitico.EPOCA)
+
+
+def linhas(cobertura, posicoes):
+    """Dicts de uma página de clientes (sem nome/código, que vêm do banco)"""
+    clientes = cobertura.snapshot.clientes
+    categorias = cobertura.snapshot.categorias
+    resultado = []
+    for p in posicoes.tolist():
+        ultimo, vencimento = _data(cobertura.ultimo[p]), _data(cobertura.vencimento[p])
+        sem_contato = cobertura.situacao[p] == SEM_CONTATO
+        resultado.append({
+            'id': int(clientes['ids'][p]),
+            'filial': categorias['filial'].valores[clientes['filial'][p]] or None,
+            'classe': categorias['classe'].valores[clientes['classe'][p]] or None,
+            'consultor_pecas': categorias['consultor'].valores[clientes['consultor'][p]] or None,
+            'consultor_servicos': categorias['consultor'].valores[clientes['consultor_servicos'][p]] or None,
+            'ultimo_contato': ultimo.isoformat() if ultimo else None,
+            'vencimento': vencimento.isoformat() if vencimento else None,
+            'cadencia_dias': int(cobertura.cadencia[p]),
+            'dias_atraso': None if sem_contato else int(cobertura.atraso[p]),
+            'situacao': SITUACOES[cobertura.situacao[p]],
+        })
+    return resultado
+
+
+def totais(cobertura, posicoes):
+    situacoes = np.bincount(cobertura.situacao[posicoes], minlength=len(SITUACOES))
+    total = len(posicoes)
+    return {
+        'clientes': total,
+        'em_dia': int(situacoes[EM_DIA]),
+        'atrasados': int(situacoes[ATRASADO]),
+        'sem_contato': int(situacoes[SEM_CONTATO]),
+        'cobertura': round(100 * int(situacoes[EM_DIA]) / total, 1) if total else None,
+    }
+
+
+def resumo(cobertura, por='consultor', posicoes=None):
+    """Cobertura por grupo (consultor, consultor_servicos, filial ou classe), pior cobertura primeiro"""
+    if por not in AGRUPAMENTOS:
+        raise analitico.ParametroInvalido(f'agrupamento desconhecido: {por}')
+    if posicoes is None:
+        posicoes = selecionar(cobertura)
+    valores = cobertura.snapshot.categorias[AGRUPAMENTOS[por]].valores
+    grupos = cobertura.snapshot.clientes[por][posicoes]
+    situacao = cobertura.situacao[posicoes]
+
+    clientes = np.bincount(grupos, minlength=len(valores))
+    em_dia = np.bincount(grupos[situacao == EM_DIA], minlength=len(valores))
+    atrasados = np.bincount(grupos[situacao == ATRASADO], minlength=len(valores))
+    atrasos = cobertura.atraso[posicoes]
+    soma_atraso = np.bincount(grupos, weights=atrasos, minlength=len(valores))
+    maior_atraso = np.zeros(len(valores), dtype=np.int32)
+    np.maximum.at(maior_atraso, grupos, atrasos)
+
+    presentes = np.flatnonzero(clientes)
+    percentual = em_dia[presentes] / clientes[presentes]
+    ordem = presentes[np.lexsort((presentes, percentual))]
+    return [{
+        por: valores[g] or None,
+        'clientes': int(clientes[g]),
+        'em_dia': int(em_dia[g]),
+        'atrasados': int(atrasados[g]),
+        'sem_contato': int(clientes[g] - em_dia[g] - atrasados[g]),
+        'cobertura': round(100 * int(em_dia[g]) / int(clientes[g]), 1),
+        'atraso_medio': round(float(soma_atraso[g]) / int(atrasados[g]), 1) if atrasados[g] else 0,
+        'atraso_maximo': int(maior_atraso[g]),
+    } for g in ordem.tolist()]
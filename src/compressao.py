@@ -0,0 +1,110 @@
+"""
+Compressão das respostas da API (zstd ou gzip)
+
+Um after_request comprime as respostas cujo tipo está em
+TIPOS_COMPRIMIVEIS e cujo corpo tem pelo menos COMPRESSAO_MINIMO_BYTES,
+usando zstd quando o cliente aceita (e o pacote zstandard está instalado)
+e gzip nos demais casos. Respostas em streaming (geradores) são
+comprimidas pedaço a pedaço, sem juntar o corpo em memória.
+
+Não são recomprimidas respostas que já têm Content-Encoding (estáticos
+pré-comprimidos, src/estaticos.py), parciais (206) nem sem corpo.
+O modo ASGI usa as mesmas funções nos handlers assíncronos (src/asgi.py).
+
+Custo de CPU x bytes economizados: benchmarks/compression.py
+"""
+
+import zlib
+from flask import request
+
+try:
+    import zstandard
+except ImportError:  # zstd é opcional: sem ele só gzip
+    zstandard = None
+
+TIPOS_COMPRIMIVEIS = (
+    'application/json', 'text/html', 'text/plain', 'text/csv',
+    'text/css', 'text/javascript', 'application/javascript', 'image/svg+xml'
+)
+
+
+def escolher_codificacao(aceitas):
+    """zstd, gzip ou None conforme o Accept-Encoding (werkzeug Accept)"""
+    if zstandard is not None and aceitas['zstd']:
+        return 'zstd'
+    if aceitas['gzip']:
+        return 'gzip'
+    return None
+
+
+def comprimivel(mimetype, status):
+    return (
+        mimetype in TIPOS_COMPRIMIVEIS
+        and 200 <= status < 600
+        and status not in (204, 206, 304)
+    )
+
+
+def _compressor(codificacao, config):
+    if codificacao == 'zstd':
+        return zstandard.ZstdCompressor(level=config.get('COMPRESSAO_NIVEL_ZSTD', 1)).compressobj()
+    # wbits 31: formato gzip (cabeçalho + CRC)
+    return zlib.compressobj(config.get('COMPRESSAO_NIVEL_GZIP', 6), zlib.DEFLATED, 31)
+
+
+def comprimir(dados, codificacao, config):
+    """Comprime um corpo completo"""
+    compressor = _compressor(codificacao, config)
+    return compressor.compress(dados) + compressor.flush()
+
+
+def comprimir_fluxo(partes, codificacao, config):
+    """Comprime um iterável de bytes sob demanda (respostas em streaming)"""
+    compressor = _compressor(codificacao, config)
+    try:
+        for parte in partes:
+            if isinstance(parte, str):
+                parte = parte.encode('utf-8')
+            saida = compressor.compress(parte)
+            if saida:
+                yield saida
+        yield compressor.flush()
+    finally:
+        if hasattr(partes, 'close'):
+            partes.close()
+
+
+def init_compressao(app):
+    """Registra o after_request que comprime as respostas"""
+    if not app.config.get('COMPRESSAO_ATIVA', True):
+        return
+
+    @app.after_request
+    def comprimir_resposta(response):
+        if (
+            request.method == 'HEAD'
+            or 'Content-Encoding' in response.headers
+            or not comprimivel(response.mimetype, response.status_code)
+        ):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        codificacao = escolher_codificacao(request.accept_encodings)
+        if codificacao is None:
+            return response
+
+        if response.is_streamed:
+            response.response = comprimir_fluxo(response.response, codificacao, app.config)
+            response.headers.pop('Content-Length', None)
+        else:
+            dados = response.get_data()
+            if len(dados) < app.config.get('COMPRESSAO_MINIMO_BYTES', 1024):
+                return response
+            response.set_data(comprimir(dados, codificacao, app.config))
+
+        response.headers['Content-Encoding'] = codificacao
+        # ETag forte identifica a representação: muda com a codificação
+        etag, fraca = response.get_etag()
+        if etag and not fraca:
+            response.set_etag(f'{etag}-{codificacao}')
+        return response
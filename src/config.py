@@ -1,9 +1,81 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
+
+def _env_int(nome, padrao):
+    valor = os.environ.get(nome)
+    return int(valor) if valor not in (None, '') else padrao
+
+
+def montar_engine_options(database_uri, pool_size=5, max_overflow=10, pool_timeout=30,
+                          pool_recycle=300, pool_pre_ping=True):
+    """Monta SQLALCHEMY_ENGINE_OPTIONS para o ambiente
+
+    Os valores passados são os padrões do ambiente; as variáveis
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE e
+    DB_POOL_PRE_PING têm prioridade. O statement_timeout não entra aqui:
+    vale só para o servidor web (aplicar_statement_timeout).
+    """
+    pre_ping = os.environ.get('DB_POOL_PRE_PING', str(pool_pre_ping)).strip().lower()
+    opcoes = {
+        'pool_pre_ping': pre_ping in ('1', 'true', 'sim', 'yes'),  # Verificar conexão antes de usar
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', pool_recycle),  # Reciclar conexões periodicamente
+    }
+
+    # SQLite em memória usa StaticPool (uma única conexão), sem fila
+    if database_uri.startswith('sqlite') and ':memory:' in database_uri:
+        return opcoes
+
+    from src.pool_stats import QueuePoolInstrumentado
+    opcoes.update({
+        'poolclass': QueuePoolInstrumentado,
+        'pool_size': _env_int('DB_POOL_SIZE', pool_size),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', max_overflow),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', pool_timeout),
+    })
+
+    return opcoes
+
+
+def _com_statement_timeout(database_uri, opcoes, statement_timeout):
+    if not database_uri.startswith('postgresql'):
+        return opcoes
+    return {**opcoes, 'connect_args': {'options': f'-c statement_timeout={statement_timeout}'}}
+
+
+def aplicar_statement_timeout(config):
+    """Limita o tempo de cada comando nas engines do Postgres (DB_STATEMENT_TIMEOUT_MS)
+
+    Chamado pelo create_app só para o servidor web. Bootstrap, migrações,
+    particionamento, arquivamento e os demais comandos de manutenção usam
+    o mesmo create_app sem limite: um UPDATE ou uma cópia de milhões de
+    linhas seria cancelado no meio.
+    """
+    statement_timeout = config.get('DB_STATEMENT_TIMEOUT_MS')
+    if not statement_timeout:
+        return
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = _com_statement_timeout(
+        config['SQLALCHEMY_DATABASE_URI'], config.get('SQLALCHEMY_ENGINE_OPTIONS', {}), statement_timeout
+    )
+    config['SQLALCHEMY_BINDS'] = {
+        nome: _com_statement_timeout(bind['url'], bind, statement_timeout) if isinstance(bind, dict) else bind
+        for nome, bind in config.get('SQLALCHEMY_BINDS', {}).items()
+    }
+
+
+def montar_binds(replica_url, **pool):
+    """Monta SQLALCHEMY_BINDS com a réplica somente leitura, se configurada"""
+    if not replica_url:
+        return {}
+    if replica_url.startswith('postgres://'):
+        replica_url = replica_url.replace('postgres://', 'postgresql://', 1)
+    return {'replica': {'url': replica_url, **montar_engine_options(replica_url, **pool)}}
+
+
 class Config:
     """Configuração base do aplicativo"""
     
@@ -42,10 +114,66 @@ class Config:
     
     # Outras configurações do SQLAlchemy
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_pre_ping': True,  # Verificar conexão antes de usar
-        'pool_recycle': 300,    # Reciclar conexões a cada 5 minutos
-    }
+    SQLALCHEMY_ENGINE_OPTIONS = montar_engine_options(SQLALCHEMY_DATABASE_URI)
+    
+    # Réplica somente leitura (opcional) para dashboards e relatórios
+    DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+    SQLALCHEMY_BINDS = montar_binds(DATABASE_REPLICA_URL)
+    REPLICA_READ_YOUR_WRITES_SECONDS = _env_int('REPLICA_READ_YOUR_WRITES_SECONDS', 10)
+    REPLICA_CHECK_INTERVAL = _env_int('REPLICA_CHECK_INTERVAL', 30)
+    
+    # Tempo máximo de cada comando SQL (ms) nas requisições do servidor web;
+    # comandos de manutenção rodam sem limite (ver aplicar_statement_timeout)
+    DB_STATEMENT_TIMEOUT_MS = _env_int('DB_STATEMENT_TIMEOUT_MS', None)
+    
+    # Dados de referência (tipos, resultados, feriados, filiais, vendedores)
+    # mantidos em memória por worker; ver src/referencias.py
+    REFERENCIAS_TTL = _env_int('REFERENCIAS_TTL', 300)
+    # Tipos, resultados e feriados: a versão no banco é conferida no máximo
+    # a cada N segundos e o registro só é recarregado quando ela muda
+    REFERENCIAS_VERIFICAR_SEGUNDOS = _env_int('REFERENCIAS_VERIFICAR_SEGUNDOS', 5)
+    
+    # Instrumentação de SQL por requisição (Server-Timing, log JSON e
+    # relatório de endpoints lentos em /api/sistema/sql); ver src/instrumentacao.py
+    SQL_INSTRUMENTACAO = os.environ.get('SQL_INSTRUMENTACAO', 'true').lower() in ('1', 'true', 'sim', 'yes')
+    SQL_LOG_REQUISICOES = os.environ.get('SQL_LOG_REQUISICOES', 'true').lower() in ('1', 'true', 'sim', 'yes')
+    
+    # Detector de N+1: None (desligado), 'avisar' ou 'erro' quando o mesmo
+    # SELECT roda mais de DETECTOR_N_MAIS_UM_LIMITE vezes numa requisição
+    DETECTOR_N_MAIS_UM = os.environ.get('DETECTOR_N_MAIS_UM') or None
+    DETECTOR_N_MAIS_UM_LIMITE = _env_int('DETECTOR_N_MAIS_UM_LIMITE', 10)
+    
+    # Perfilamento sob demanda (X-Perfil: 1 de um master ou amostragem de uma
+    # fração das requisições); ver src/perfilamento.py
+    PERFIL_AMOSTRAGEM = float(os.environ.get('PERFIL_AMOSTRAGEM') or 0)
+    PERFIL_INTERVALO_MS = _env_int('PERFIL_INTERVALO_MS', 2)
+    PERFIL_DIRETORIO = os.environ.get('PERFIL_DIRETORIO') or os.path.join(tempfile.gettempdir(), 'crm-perfis')
+    PERFIL_MAXIMO = _env_int('PERFIL_MAXIMO', 100)
+    
+    # Contatos anteriores ao horizonte (em dias) vão para contatos_arquivados
+    # com archive_contatos.py; ver src/arquivo.py
+    ARQUIVO_HORIZONTE_DIAS = _env_int('ARQUIVO_HORIZONTE_DIAS', 730)
+    
+    # Snapshot colunar para /api/analytics/pivot (src/analitico.py): intervalo
+    # mínimo entre atualizações incrementais e diretório opcional onde o
+    # snapshot é gravado para os próximos processos
+    ANALITICO_ATUALIZAR_SEGUNDOS = _env_int('ANALITICO_ATUALIZAR_SEGUNDOS', 60)
+    ANALITICO_DIRETORIO = os.environ.get('ANALITICO_DIRETORIO')
+    
+    # Fila de trabalho dos consultores (src/fila.py): contatos por dia por
+    # consultor e dias úteis planejados
+    FILA_CAPACIDADE_DIARIA = _env_int('FILA_CAPACIDADE_DIARIA', 20)
+    FILA_DIAS = _env_int('FILA_DIAS', 10)
+    
+    # Token exigido em /metrics (Authorization: Bearer ...); sem token, aberto
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    
+    # Compressão das respostas (zstd ou gzip) acima de um tamanho mínimo;
+    # ver src/compressao.py e benchmarks/compression.py
+    COMPRESSAO_ATIVA = os.environ.get('COMPRESSAO_ATIVA', 'true').lower() in ('1', 'true', 'sim', 'yes')
+    COMPRESSAO_MINIMO_BYTES = _env_int('COMPRESSAO_MINIMO_BYTES', 1024)
+    COMPRESSAO_NIVEL_GZIP = _env_int('COMPRESSAO_NIVEL_GZIP', 6)
+    COMPRESSAO_NIVEL_ZSTD = _env_int('COMPRESSAO_NIVEL_ZSTD', 1)
     
     # Configurações de upload
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads')
@@ -59,12 +187,24 @@ class DevelopmentConfig(Config):
     """Configuração para desenvolvimento"""
     DEBUG = True
     TESTING = False
+    DETECTOR_N_MAIS_UM = os.environ.get('DETECTOR_N_MAIS_UM', 'avisar')
 
 
 class ProductionConfig(Config):
     """Configuração para produção"""
     DEBUG = False
     TESTING = False
+    # Gunicorn roda 4 threads por worker: uma conexão por thread, folga pequena
+    # e sem pre-ping (pool_recycle já descarta conexões antigas)
+    _pool_producao = dict(
+        pool_size=4,
+        max_overflow=2,
+        pool_timeout=10,
+        pool_pre_ping=False
+    )
+    SQLALCHEMY_ENGINE_OPTIONS = montar_engine_options(Config.SQLALCHEMY_DATABASE_URI, **_pool_producao)
+    SQLALCHEMY_BINDS = montar_binds(Config.DATABASE_REPLICA_URL, **_pool_producao)
+    DB_STATEMENT_TIMEOUT_MS = _env_int('DB_STATEMENT_TIMEOUT_MS', 30000)
 
 
 class TestingConfig(Config):
@@ -73,6 +213,10 @@ class TestingConfig(Config):
     TESTING = True
     # Sempre usar SQLite em memória para testes
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = montar_engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_BINDS = {}
+    SQL_LOG_REQUISICOES = False
+    DETECTOR_N_MAIS_UM = 'erro'
 
 
 # Dicionário de configurações
@@ -0,0 +1,181 @@
+"""
+Consultas de leitura compartilhadas entre o modo WSGI e o modo ASGI
+
+Cada função recebe os parâmetros da requisição (um dict como request.args)
+e monta apenas o SELECT; quem executa é a rota Flask (db.session) ou o
+handler assíncrono (src/asgi.py, AsyncSession). Assim os dois modos de
+servir geram exatamente o mesmo SQL e a mesma resposta.
+"""
+
+from datetime import datetime
+from math import ceil
+from sqlalchemy import select, func, and_, or_, cast, Integer
+from src.models.cliente import Cliente
+from src.models.contato import ContatoRegistrado, TipoContato, ResultadoContato
+
+
+def _data(valor):
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _inteiro(args, nome, padrao):
+    try:
+        return int(args.get(nome, padrao))
+    except (TypeError, ValueError):
+        return padrao
+
+
+def parametros_paginacao(args):
+    """(page, per_page) informados e os efetivos, como no db.paginate"""
+    page = _inteiro(args, 'page', 1)
+    per_page = _inteiro(args, 'per_page', 50)
+    return page, per_page, max(page, 1), per_page if per_page >= 1 else 20
+
+
+def paginacao(page, per_page, per_page_efetivo, total):
+    """Bloco 'pagination' das respostas paginadas"""
+    paginas = ceil(total / per_page_efetivo) if total else 0
+    return {
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': paginas,
+        'has_next': max(page, 1) < paginas,
+        'has_prev': page > 1
+    }
+
+
+def consulta_clientes(args):
+    """Busca de clientes (GET /api/clientes)"""
+    search = args.get('search', '')
+    filial = args.get('filial', '')
+    classe = args.get('classe', '')
+    consultor_pecas = args.get('consultor_pecas', '')
+    consultor_servicos = args.get('consultor_servicos', '')
+
+    stmt = select(Cliente)
+
+    if search:
+        stmt = stmt.where(
+            or_(
+                Cliente.nome.ilike(f'%{search}%'),
+                Cliente.cod_cliente.like(f'%{search}%'),
+                Cliente.municipio.ilike(f'%{search}%')
+            )
+        )
+
+    if filial:
+        stmt = stmt.where(Cliente.filial == filial)
+
+    if classe:
+        stmt = stmt.where(Cliente.classe == classe)
+
+    if consultor_pecas:
+        stmt = stmt.where(Cliente.consultor_pecas.ilike(f'%{consultor_pecas}%'))
+
+    if consultor_servicos:
+        stmt = stmt.where(Cliente.consultor_servicos.ilike(f'%{consultor_servicos}%'))
+
+    return stmt.order_by(Cliente.nome)
+
+
+def consulta_agenda(args, hoje):
+    """Último contato de cada cliente com próximo contato agendado (GET /api/agenda)"""
+    vendedor = args.get('vendedor', '')
+    data_inicio = _data(args.get('data_inicio'))
+    data_fim = _data(args.get('data_fim'))
+    apenas_atrasados = str(args.get('apenas_atrasados', 'false')).lower() == 'true'
+
+    ultimos = select(
+        ContatoRegistrado.cliente_id,
+        func.max(ContatoRegistrado.data_contato).label('ultima_data')
+    ).group_by(ContatoRegistrado.cliente_id).subquery()
+
+    stmt = select(ContatoRegistrado).join(Cliente).join(
+        ultimos,
+        and_(
+            ContatoRegistrado.cliente_id == ultimos.c.cliente_id,
+            ContatoRegistrado.data_contato == ultimos.c.ultima_data
+        )
+    ).where(ContatoRegistrado.proximo_contato.isnot(None))
+
+    if vendedor:
+        stmt = stmt.where(ContatoRegistrado.vendedor.ilike(f'%{vendedor}%'))
+
+    if data_inicio:
+        stmt = stmt.where(ContatoRegistrado.proximo_contato >= data_inicio)
+
+    if data_fim:
+        stmt = stmt.where(ContatoRegistrado.proximo_contato <= data_fim)
+
+    if apenas_atrasados:
+        stmt = stmt.where(ContatoRegistrado.proximo_contato < hoje)
+
+    return stmt.order_by(ContatoRegistrado.proximo_contato)
+
+
+def item_agenda(contato, hoje):
+    """Serializa um contato da agenda com dias de atraso e status"""
+    contato_dict = contato.to_dict()
+    if contato.proximo_contato:
+        dias_atraso = (hoje - contato.proximo_contato).days
+        contato_dict['dias_atraso'] = dias_atraso if dias_atraso > 0 else 0
+        contato_dict['status'] = 'ATRASADO' if dias_atraso > 0 else 'AGENDADO'
+    return contato_dict
+
+
+def consultas_dashboard(args, hoje):
+    """SELECTs das estatísticas de contatos (GET /api/dashboard/stats)
+
+    Retorna um dict nome -> SELECT; os agrupamentos filtram pelo período
+    diretamente, sem carregar os contatos.
+    """
+    filtros = []
+
+    data_inicio = _data(args.get('data_inicio'))
+    if data_inicio:
+        filtros.append(ContatoRegistrado.data_contato >= data_inicio)
+
+    data_fim = _data(args.get('data_fim'))
+    if data_fim:
+        filtros.append(ContatoRegistrado.data_contato <= data_fim)
+
+    vendedor = args.get('vendedor', '')
+    if vendedor:
+        filtros.append(ContatoRegistrado.vendedor.ilike(f'%{vendedor}%'))
+
+    def agrupado(coluna):
+        return select(coluna, func.count(ContatoRegistrado.id)).where(*filtros).group_by(coluna)
+
+    def agrupado_por_referencia(coluna, modelo):
+        # Agrupa pelo id (inteiro) e só depois troca pela descrição
+        contagem = select(coluna.label('ref_id'), func.count(ContatoRegistrado.id).label('total')).where(
+            *filtros
+        ).group_by(coluna).subquery()
+        return select(modelo.descricao, cast(func.sum(contagem.c.total), Integer)).join_from(
+            contagem, modelo, modelo.id == contagem.c.ref_id
+        ).group_by(modelo.descricao)
+
+    return {
+        'total_contatos': select(func.count(ContatoRegistrado.id)).where(*filtros),
+        'contatos_atrasados': select(func.count(ContatoRegistrado.id)).where(
+            ContatoRegistrado.proximo_contato < hoje
+        ),
+        'por_tipo': agrupado_por_referencia(ContatoRegistrado.tipo_contato_id, TipoContato),
+        'por_resultado': agrupado_por_referencia(ContatoRegistrado.resultado_contato_id, ResultadoContato),
+        'por_vendedor': agrupado(ContatoRegistrado.vendedor)
+    }
+
+
+def montar_dashboard(resultados):
+    """Monta o 'data' do dashboard a partir dos resultados de consultas_dashboard"""
+    return {
+        'total_contatos': resultados['total_contatos'],
+        'contatos_atrasados': resultados['contatos_atrasados'],
+        'por_tipo': [{'tipo': t[0], 'count': t[1]} for t in resultados['por_tipo']],
+        'por_resultado': [{'resultado': r[0], 'count': r[1]} for r in resultados['por_resultado']],
+        'por_vendedor': [{'vendedor': v[0], 'count': v[1]} for v in resultados['por_vendedor']]
+    }
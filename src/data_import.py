@@ -4,6 +4,7 @@ Script para importar dados da planilha Excel CRM para o banco de dados
 """
 
 import pandas as pd
+import hashlib
 import sys
 import os
 from datetime import datetime, date
@@ -15,88 +16,118 @@ sys.path.insert(0, parent_dir)
 
 from flask import Flask
 from src.models.user import db
-from src.models.cliente import Cliente
+from src.models.cliente import Cliente, CAMPOS_IMPORTACAO
 from src.models.contato import ContatoRegistrado, TipoContato, ResultadoContato, Feriado
 
+# Colunas da aba Clientes -> campos do modelo
+COLUNAS_CLIENTES = {
+    'Cliente': 'nome',
+    'Municipio': 'municipio',
+    'Filial': 'filial',
+    'Potencial Mensal de Compra Peças': 'potencial_pecas',
+    'Potencial Serviço Mês': 'potencial_servico',
+    'Status 6M': 'status_6m',
+    'Classe': 'classe',
+    'Consultor Peças': 'consultor_pecas',
+    'Consultor Serviços': 'consultor_servicos',
+    'Última Mov.': 'ultima_mov'
+}
+
+
+def calcular_hashes(df):
+    """Calcula o hash de conteúdo de cada linha (mesmo formato de Cliente.calcular_hash)"""
+    partes = []
+    for campo in CAMPOS_IMPORTACAO:
+        serie = df[campo]
+        if campo in ('potencial_pecas', 'potencial_servico'):
+            partes.append(serie.fillna(0.0).astype(float).map('{:.2f}'.format))
+        elif campo == 'ultima_mov':
+            partes.append(serie.map(lambda d: d.strftime('%Y-%m-%d') if d is not None else ''))
+        else:
+            partes.append(serie.fillna('').astype(str).str.strip())
+    
+    texto = partes[0].str.cat(partes[1:], sep='\x1f')
+    return texto.map(lambda t: hashlib.sha1(t.encode('utf-8')).hexdigest())
+
+
+def _converter_ultima_mov(valor):
+    if pd.isna(valor):
+        return None
+    try:
+        if isinstance(valor, str):
+            return datetime.strptime(valor, '%Y-%m-%d').date()
+        return valor.date()
+    except Exception:
+        return None
+
+
 def importar_clientes(excel_file, session):
-    """Importar dados da aba Clientes"""
+    """Importar dados da aba Clientes
+    
+    Compara o hash de conteúdo de cada linha com o hash gravado no banco
+    e só grava (e atualiza updated_at) os clientes novos ou alterados.
+    """
     print("Importando clientes...")
     
     try:
         df_clientes = pd.read_excel(excel_file, sheet_name='Clientes')
         print(f"Encontrados {len(df_clientes)} clientes na planilha")
         
-        clientes_importados = 0
-        clientes_atualizados = 0
+        # Normalizar colunas para os campos do modelo
+        df = pd.DataFrame({'cod_cliente': pd.to_numeric(df_clientes['Cod Cliente'], errors='coerce')})
+        for coluna, campo in COLUNAS_CLIENTES.items():
+            df[campo] = df_clientes[coluna]
+        df = df[df['cod_cliente'].notna() & (df['cod_cliente'] != 0)]
+        df['cod_cliente'] = df['cod_cliente'].astype(int)
+        df = df.drop_duplicates(subset='cod_cliente', keep='last')
         
-        for index, row in df_clientes.iterrows():
-            try:
-                # Verificar se cliente já existe
-                cod_cliente = int(row['Cod Cliente']) if pd.notna(row['Cod Cliente']) else None
-                if not cod_cliente:
-                    continue
-                    
-                cliente_existente = session.query(Cliente).filter_by(cod_cliente=cod_cliente).first()
-                
-                if cliente_existente:
-                    # Atualizar cliente existente
-                    cliente_existente.nome = str(row['Cliente']) if pd.notna(row['Cliente']) else ''
-                    cliente_existente.municipio = str(row['Municipio']) if pd.notna(row['Municipio']) else ''
-                    cliente_existente.filial = str(row['Filial']) if pd.notna(row['Filial']) else ''
-                    cliente_existente.potencial_pecas = float(row['Potencial Mensal de Compra Peças']) if pd.notna(row['Potencial Mensal de Compra Peças']) else 0.0
-                    cliente_existente.potencial_servico = float(row['Potencial Serviço Mês']) if pd.notna(row['Potencial Serviço Mês']) else 0.0
-                    cliente_existente.status_6m = str(row['Status 6M']) if pd.notna(row['Status 6M']) else ''
-                    cliente_existente.classe = str(row['Classe']) if pd.notna(row['Classe']) else ''
-                    cliente_existente.consultor_pecas = str(row['Consultor Peças']) if pd.notna(row['Consultor Peças']) else ''
-                    cliente_existente.consultor_servicos = str(row['Consultor Serviços']) if pd.notna(row['Consultor Serviços']) else ''
-                    
-                    # Converter data da última movimentação
-                    if pd.notna(row['Última Mov.']):
-                        try:
-                            if isinstance(row['Última Mov.'], str):
-                                cliente_existente.ultima_mov = datetime.strptime(row['Última Mov.'], '%Y-%m-%d').date()
-                            else:
-                                cliente_existente.ultima_mov = row['Última Mov.'].date()
-                        except:
-                            cliente_existente.ultima_mov = None
-                    
-                    cliente_existente.updated_at = datetime.utcnow()
-                    clientes_atualizados += 1
-                    
-                else:
-                    # Criar novo cliente
-                    cliente = Cliente()
-                    cliente.nome = str(row['Cliente']) if pd.notna(row['Cliente']) else ''
-                    cliente.cod_cliente = cod_cliente
-                    cliente.municipio = str(row['Municipio']) if pd.notna(row['Municipio']) else ''
-                    cliente.filial = str(row['Filial']) if pd.notna(row['Filial']) else ''
-                    cliente.potencial_pecas = float(row['Potencial Mensal de Compra Peças']) if pd.notna(row['Potencial Mensal de Compra Peças']) else 0.0
-                    cliente.potencial_servico = float(row['Potencial Serviço Mês']) if pd.notna(row['Potencial Serviço Mês']) else 0.0
-                    cliente.status_6m = str(row['Status 6M']) if pd.notna(row['Status 6M']) else ''
-                    cliente.classe = str(row['Classe']) if pd.notna(row['Classe']) else ''
-                    cliente.consultor_pecas = str(row['Consultor Peças']) if pd.notna(row['Consultor Peças']) else ''
-                    cliente.consultor_servicos = str(row['Consultor Serviços']) if pd.notna(row['Consultor Serviços']) else ''
-                    
-                    # Converter data da última movimentação
-                    if pd.notna(row['Última Mov.']):
-                        try:
-                            if isinstance(row['Última Mov.'], str):
-                                cliente.ultima_mov = datetime.strptime(row['Última Mov.'], '%Y-%m-%d').date()
-                            else:
-                                cliente.ultima_mov = row['Última Mov.'].date()
-                        except:
-                            cliente.ultima_mov = None
-                    
-                    session.add(cliente)
-                    clientes_importados += 1
-                
-            except Exception as e:
-                print(f"Erro ao processar cliente linha {index}: {e}")
-                continue
+        for campo in ('nome', 'municipio', 'filial', 'status_6m', 'classe', 'consultor_pecas', 'consultor_servicos'):
+            df[campo] = df[campo].map(lambda v: str(v) if pd.notna(v) else '')
+        for campo in ('potencial_pecas', 'potencial_servico'):
+            df[campo] = pd.to_numeric(df[campo], errors='coerce').fillna(0.0)
+        df['ultima_mov'] = df['ultima_mov'].map(_converter_ultima_mov).astype(object)
+        
+        df['hash_conteudo'] = calcular_hashes(df)
+        
+        # Hashes atuais do banco (uma consulta) e comparação vetorizada
+        existentes = pd.DataFrame(
+            session.query(Cliente.cod_cliente, Cliente.id, Cliente.hash_conteudo).all(),
+            columns=['cod_cliente', 'id', 'hash_atual']
+        )
+        df = df.merge(existentes, on='cod_cliente', how='left')
+        
+        novos = df['id'].isna()
+        alterados = ~novos & (df['hash_atual'] != df['hash_conteudo'])
+        clientes_inalterados = int((~novos & ~alterados).sum())
+        
+        campos = ['cod_cliente'] + list(CAMPOS_IMPORTACAO) + ['hash_conteudo']
+        agora = datetime.utcnow()
+        
+        registros_novos = df.loc[novos, campos].to_dict('records')
+        for registro in registros_novos:
+            registro['created_at'] = agora
+            registro['updated_at'] = agora
+        
+        registros_alterados = df.loc[alterados, ['id'] + campos].to_dict('records')
+        for registro in registros_alterados:
+            registro['id'] = int(registro['id'])
+            registro['updated_at'] = agora
+        
+        if registros_novos:
+            session.bulk_insert_mappings(Cliente, registros_novos)
+        if registros_alterados:
+            session.bulk_update_mappings(Cliente, registros_alterados)
         
         session.commit()
-        print(f"Clientes importados: {clientes_importados}")
-        print(f"Clientes atualizados: {clientes_atualizados}")
+        print(f"Clientes importados: {len(registros_novos)}")
+        print(f"Clientes atualizados: {len(registros_alterados)}")
+        print(f"Clientes sem alteração: {clientes_inalterados}")
+        
+        return {
+            'importados': len(registros_novos),
+            'atualizados': len(registros_alterados),
+            'inalterados': clientes_inalterados
+        }
         
     except Exception as e:
         print(f"Erro ao importar clientes: {e}")
@@ -0,0 +1,201 @@
+"""
+Arquivos estáticos do front-end (build do Vite em src/static)
+
+Na criação do app a pasta é lida uma vez para um manifesto em memória
+(caminho -> tipo, ETag, Cache-Control e variantes comprimidas), então a
+rota catch-all não consulta o disco para decidir o que servir. O
+index.html (original, gzip e brotli) também fica em memória.
+
+- Variantes .gz e .br ao lado de cada arquivo comprimível, geradas fora
+  do app: no build (python -m src.estaticos, no Dockerfile) ou no deploy
+  (bootstrap_db.py, run_production.py). O app só lê as que já existem;
+  sem elas, serve o original. A variante servida segue o Accept-Encoding
+  do navegador (br antes de gzip).
+- Arquivos com hash de conteúdo no nome (assets/index-C-CBEx41.js) saem
+  com Cache-Control immutable de um ano; o index.html com no-cache
+  (revalidado pelo ETag), para que um build novo apareça na hora.
+
+Em modo debug o manifesto é relido a cada requisição (build em andamento).
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import sys
+from collections import namedtuple
+from flask import request, send_file, Response
+
+try:
+    import brotli
+except ImportError:  # Brotli é opcional: sem ele só há variantes gzip
+    brotli = None
+
+EXTENSOES_COMPRIMIVEIS = ('.js', '.mjs', '.css', '.html', '.svg', '.json', '.map', '.txt', '.xml', '.ico')
+TAMANHO_MINIMO = 1024
+
+# Nomes gerados pelo Vite: <nome>-<hash>.<ext>
+_NOME_COM_HASH = re.compile(r'-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$')
+
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+CACHE_PADRAO = 'public, max-age=3600'
+CACHE_INDEX = 'no-cache'
+
+# (Content-Encoding, extensão da variante) em ordem de preferência
+CODIFICACOES = (('br', '.br'), ('gzip', '.gz'))
+
+Arquivo = namedtuple('Arquivo', [
+    'caminho',        # caminho absoluto do original
+    'mimetype',
+    'etag',           # ETag do original (variantes recebem sufixo)
+    'cache_control',
+    'variantes',      # {'br': caminho, 'gzip': caminho} existentes no disco
+    'conteudo'        # {None: bytes, 'br': bytes, 'gzip': bytes} em memória, ou None
+])
+
+
+def _codificacoes_disponiveis():
+    return [(c, e) for c, e in CODIFICACOES if c != 'br' or brotli is not None]
+
+
+def _comprimir(dados, codificacao):
+    if codificacao == 'br':
+        return brotli.compress(dados, quality=11)
+    return gzip.compress(dados, compresslevel=9, mtime=0)
+
+
+def _comprimivel(caminho):
+    return caminho.endswith(EXTENSOES_COMPRIMIVEIS) and os.path.getsize(caminho) >= TAMANHO_MINIMO
+
+
+def _variante_atual(caminho, extensao):
+    variante = caminho + extensao
+    return os.path.exists(variante) and os.path.getmtime(variante) >= os.path.getmtime(caminho)
+
+
+def precomprimir(pasta):
+    """Gera as variantes .br/.gz que faltam ou estão desatualizadas; retorna quantas"""
+    geradas = 0
+    for raiz, _, nomes in os.walk(pasta):
+        for nome in nomes:
+            caminho = os.path.join(raiz, nome)
+            if not _comprimivel(caminho):
+                continue
+            dados = None
+            for codificacao, extensao in _codificacoes_disponiveis():
+                if _variante_atual(caminho, extensao):
+                    continue
+                if dados is None:
+                    with open(caminho, 'rb') as f:
+                        dados = f.read()
+                comprimido = _comprimir(dados, codificacao)
+                if len(comprimido) >= len(dados):
+                    continue
+                temporario = f'{caminho}{extensao}.{os.getpid()}.tmp'
+                with open(temporario, 'wb') as f:
+                    f.write(comprimido)
+                os.replace(temporario, caminho + extensao)
+                geradas += 1
+    return geradas
+
+
+def carregar_manifesto(pasta):
+    """Lê a pasta e monta o manifesto {caminho relativo: Arquivo}"""
+    manifesto = {}
+    for raiz, _, nomes in os.walk(pasta):
+        for nome in nomes:
+            if nome.endswith(('.br', '.gz', '.tmp')):
+                continue
+            caminho = os.path.join(raiz, nome)
+            relativo = os.path.relpath(caminho, pasta).replace(os.sep, '/')
+            info = os.stat(caminho)
+            mimetype = mimetypes.guess_type(nome)[0] or 'application/octet-stream'
+            variantes = {
+                codificacao: caminho + extensao
+                for codificacao, extensao in CODIFICACOES
+                if _variante_atual(caminho, extensao)
+            }
+
+            if relativo == 'index.html':
+                with open(caminho, 'rb') as f:
+                    dados = f.read()
+                conteudo = {None: dados}
+                for codificacao, _ in _codificacoes_disponiveis():
+                    conteudo[codificacao] = _comprimir(dados, codificacao)
+                manifesto[relativo] = Arquivo(
+                    caminho, mimetype, hashlib.sha1(dados).hexdigest()[:16], CACHE_INDEX, {}, conteudo
+                )
+                continue
+
+            manifesto[relativo] = Arquivo(
+                caminho, mimetype, f'{info.st_mtime_ns:x}-{info.st_size:x}',
+                CACHE_IMUTAVEL if _NOME_COM_HASH.search(nome) else CACHE_PADRAO,
+                variantes, None
+            )
+    return manifesto
+
+
+def _escolher_codificacao(arquivo):
+    """Melhor variante aceita pelo cliente (None = original)"""
+    disponiveis = arquivo.conteudo if arquivo.conteudo is not None else arquivo.variantes
+    for codificacao, _ in CODIFICACOES:
+        if codificacao in disponiveis and request.accept_encodings[codificacao]:
+            return codificacao
+    return None
+
+
+def responder(arquivo):
+    """Resposta condicional (ETag) com a variante adequada ao Accept-Encoding"""
+    codificacao = _escolher_codificacao(arquivo)
+    etag = f'{arquivo.etag}-{codificacao}' if codificacao else arquivo.etag
+
+    if arquivo.conteudo is not None:
+        resposta = Response(arquivo.conteudo[codificacao], mimetype=arquivo.mimetype)
+        resposta.set_etag(etag)
+        resposta.make_conditional(request)
+    else:
+        caminho = arquivo.variantes[codificacao] if codificacao else arquivo.caminho
+        resposta = send_file(caminho, mimetype=arquivo.mimetype, etag=etag, conditional=True)
+
+    if codificacao:
+        resposta.headers['Content-Encoding'] = codificacao
+    if arquivo.variantes or arquivo.conteudo:
+        resposta.vary.add('Accept-Encoding')
+    resposta.headers['Cache-Control'] = arquivo.cache_control
+    return resposta
+
+
+def init_estaticos(app):
+    """Monta o manifesto e registra a rota catch-all do front-end"""
+    pasta = app.static_folder
+    estado = {'manifesto': {}}
+
+    def recarregar():
+        if pasta and os.path.isdir(pasta):
+            estado['manifesto'] = carregar_manifesto(pasta)
+
+    recarregar()
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        if pasta is None:
+            return "Static folder not configured", 404
+        if app.debug:
+            recarregar()
+
+        manifesto = estado['manifesto']
+        arquivo = manifesto.get(path) if path else None
+        if arquivo is None:
+            # Rotas do front-end (SPA) recebem o index.html
+            arquivo = manifesto.get('index.html')
+            if arquivo is None:
+                return "index.html not found", 404
+        return responder(arquivo)
+
+
+if __name__ == '__main__':
+    # Passo de build (Dockerfile): python -m src.estaticos [pasta]
+    pasta = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), 'static')
+    print(f"✅ {precomprimir(pasta)} variante(s) comprimida(s) geradas em {pasta}")
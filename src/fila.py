@@ -0,0 +1,208 @@
+"""
+Fila de trabalho dos consultores: quem ligar em cada dia útil
+
+A partir da cobertura da carteira (src/cobertura.py), os clientes vencidos
+e os que vencem dentro dos próximos FILA_DIAS dias úteis entram na fila do
+consultor de peças, com prioridade
+
+    peso da classe × (1 + log10(1 + potencial)) × (1 + dias úteis de atraso / 5)
+
+onde o peso da classe é CADENCIA_PADRAO_DIAS / cadência (AA pesa mais que
+QQ) e um cliente sem contato conta como atrasado há uma cadência inteira.
+
+Cada consultor atende até FILA_CAPACIDADE_DIARIA clientes por dia útil
+(fins de semana e feriados do registro ficam de fora). Dia a dia, os
+clientes já vencidos entram num heap por prioridade e os maiores saem para
+a lista do dia; o que não cabe fica para o dia útil seguinte e o que sobra
+no fim do horizonte é contado como excedente.
+
+O plano é gravado em fila_trabalho (ItemFila), substituindo o anterior,
+e lido direto do banco pelas rotas.
+"""
+
+import heapq
+from collections import namedtuple
+from datetime import date, datetime
+import numpy as np
+from flask import current_app
+from sqlalchemy import delete, insert
+from src.models.user import db
+from src.models.cliente import CADENCIA_PADRAO_DIAS
+from src.models.fila import ItemFila
+from src.referencias import obter_registro
+from src import analitico, cobertura as cobertura_
+
+LOTE = 5000
+
+Plano = namedtuple('Plano', [
+    'dias',          # tuple de datas (dias úteis do horizonte)
+    'clientes',      # posições no snapshot, na ordem consultor, dia, posição
+    'consultores',   # código do consultor de cada item
+    'dia',           # índice em dias de cada item
+    'posicao',       # ordem na lista do dia (1 = primeiro)
+    'prioridade',    # prioridade de cada item
+    'excedentes',    # {código do consultor: clientes que não couberam}
+    'sem_consultor', # clientes vencidos sem consultor de peças
+])
+
+
+def prioridades(cobertura):
+    """Prioridade de todos os clientes (alinhada às posições do snapshot)"""
+    potencial = cobertura.snapshot.clientes['potencial']
+    cadencia = cobertura.cadencia
+    sem_contato = cobertura.situacao == cobertura_.SEM_CONTATO
+    # Sem contato: atrasado há uma cadência inteira (em dias úteis)
+    atraso = np.where(sem_contato, cadencia * 5 // 7, cobertura.atraso)
+    peso_classe = CADENCIA_PADRAO_DIAS / np.maximum(cadencia, 1)
+    return peso_classe * (1 + np.log10(1 + np.maximum(potencial, 0))) * (1 + atraso / 5)
+
+
+def dias_uteis(hoje, quantidade, feriados):
+    """Os próximos `quantidade` dias úteis a partir de hoje (inclusive)"""
+    return np.busday_offset(
+        np.datetime64(hoje, 'D'), np.arange(quantidade), roll='forward',
+        holidays=np.array(feriados, dtype='datetime64[D]')
+    )
+
+
+def planejar(cobertura, feriados, hoje, capacidade=20, capacidades=None, dias=10):
+    """Distribui os clientes devidos pelos dias úteis de cada consultor
+
+    capacidades: {nome do consultor: clientes por dia}, sobre `capacidade`.
+    """
+    if dias < 1 or capacidade < 0:
+        raise analitico.ParametroInvalido('dias deve ser ao menos 1 e capacidade não pode ser negativa')
+    snapshot = cobertura.snapshot
+    codigos = snapshot.categorias['consultor'].codigos
+    por_consultor = {}
+    for nome, valor in (capacidades or {}).items():
+        if valor < 0:
+            raise analitico.ParametroInvalido(f'capacidade negativa para {nome}')
+        if nome in codigos:
+            por_consultor[codigos[nome]] = int(valor)
+
+    calendario = dias_uteis(hoje, dias, feriados)
+    # Primeiro dia do horizonte em que o cliente pode entrar (0 se já vencido)
+    vencimento = cobertura.vencimento.astype('datetime64[D]')
+    disponivel = np.searchsorted(calendario, vencimento, side='left')
+    disponivel[cobertura.situacao == cobertura_.SEM_CONTATO] = 0
+
+    consultor = snapshot.clientes['consultor']
+    devidos = disponivel < dias
+    devidos[0] = False  # posição vazia do snapshot
+    sem_consultor = int((devidos & (consultor == 0)).sum())
+    candidatos = np.flatnonzero(devidos & (consultor != 0))
+
+    prioridade = prioridades(cobertura)
+    ids = snapshot.clientes['ids']
+    # Agrupados por consultor e, dentro dele, por dia disponível
+    ordem = np.lexsort((disponivel[candidatos], consultor[candidatos]))
+    candidatos = candidatos[ordem]
+    grupos = consultor[candidatos]
+    limites = np.flatnonzero(np.diff(grupos)) + 1
+    inicios = np.concatenate([[0], limites]).tolist()
+    fins = np.concatenate([limites, [len(candidatos)]]).tolist()
+
+    clientes, consultores, dia, posicao, prioridades_plano = [], [], [], [], []
+    excedentes = {}
+    for inicio, fim in zip(inicios, fins):
+        if inicio == fim:
+            continue
+        codigo = int(grupos[inicio])
+        limite = por_consultor.get(codigo, capacidade)
+        bloco = candidatos[inicio:fim]
+        disponiveis = disponivel[bloco].tolist()
+        chaves = (-prioridade[bloco]).tolist()
+        desempate = ids[bloco].tolist()
+        bloco = bloco.tolist()
+
+        heap, i, n = [], 0, len(bloco)
+        for d in range(dias):
+            while i < n and disponiveis[i] <= d:
+                heapq.heappush(heap, (chaves[i], desempate[i], bloco[i]))
+                i += 1
+            for p in range(min(limite, len(heap))):
+                chave, _, cliente = heapq.heappop(heap)
+                clientes.append(cliente)
+                consultores.append(codigo)
+                dia.append(d)
+                posicao.append(p + 1)
+                prioridades_plano.append(-chave)
+        if heap:
+            excedentes[codigo] = len(heap)
+
+    return Plano(
+        tuple(d.item() for d in calendario),
+        np.array(clientes, dtype=np.int32),
+        np.array(consultores, dtype=np.int32),
+        np.array(dia, dtype=np.int32),
+        np.array(posicao, dtype=np.int32),
+        np.array(prioridades_plano, dtype=np.float64),
+        excedentes,
+        sem_consultor,
+    )
+
+
+def _linhas(plano, cobertura, gerado_em):
+    snapshot = cobertura.snapshot
+    nomes = snapshot.categorias['consultor'].valores
+    ids = snapshot.clientes['ids'][plano.clientes].tolist()
+    sem_contato = (cobertura.situacao[plano.clientes] == cobertura_.SEM_CONTATO).tolist()
+    atrasos = cobertura.atraso[plano.clientes].tolist()
+    vencimentos = cobertura.vencimento[plano.clientes].tolist()
+    colunas = zip(
+        ids, plano.consultores.tolist(), plano.dia.tolist(), plano.posicao.tolist(),
+        np.round(plano.prioridade, 4).tolist(), sem_contato, atrasos, vencimentos
+    )
+    for cliente_id, consultor, dia, posicao, prioridade, sem, atraso, vencimento in colunas:
+        yield {
+            'consultor': nomes[consultor],
+            'data': plano.dias[dia],
+            'posicao': posicao,
+            'cliente_id': cliente_id,
+            'prioridade': prioridade,
+            'dias_atraso': None if sem else atraso,
+            'vencimento': None if sem else date.fromordinal(vencimento + analitico.EPOCA),
+            'gerado_em': gerado_em,
+        }
+
+
+def salvar_plano(plano, cobertura, sessao=None):
+    """Substitui fila_trabalho pelo plano numa transação"""
+    sessao = sessao or db.session
+    gerado_em = datetime.utcnow()
+    tabela = ItemFila.__table__
+    sessao.execute(delete(tabela))
+    lote = []
+    for linha in _linhas(plano, cobertura, gerado_em):
+        lote.append(linha)
+        if len(lote) == LOTE:
+            sessao.execute(insert(tabela), lote)
+            lote = []
+    if lote:
+        sessao.execute(insert(tabela), lote)
+    sessao.commit()
+    return gerado_em
+
+
+def gerar(capacidade=None, capacidades=None, dias=None):
+    """Calcula e grava o plano a partir da cobertura atual; retorna o resumo"""
+    config = current_app.config
+    capacidade = config.get('FILA_CAPACIDADE_DIARIA', 20) if capacidade is None else capacidade
+    dias = config.get('FILA_DIAS', 10) if dias is None else dias
+
+    atual = cobertura_.obter_cobertura()
+    plano = planejar(atual, obter_registro().feriados, atual.hoje, capacidade, capacidades, dias)
+    gerado_em = salvar_plano(plano, atual)
+
+    nomes = atual.snapshot.categorias['consultor'].valores
+    return {
+        'gerado_em': gerado_em.isoformat(),
+        'dias': [d.isoformat() for d in plano.dias],
+        'capacidade': capacidade,
+        'consultores': len(np.unique(plano.consultores)),
+        'agendados': len(plano.clientes),
+        'excedentes': sum(plano.excedentes.values()),
+        'excedentes_por_consultor': {nomes[c]: n for c, n in sorted(plano.excedentes.items(), key=lambda i: -i[1])},
+        'sem_consultor': plano.sem_consultor,
+    }
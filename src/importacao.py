@@ -0,0 +1,141 @@
+"""
+Importação de clientes em modo "replace" via tabela de staging
+
+Em vez de apagar a tabela de clientes e recriar linha a linha, a planilha
+é carregada numa tabela temporária e a diferença é calculada em SQL:
+
+- novos: códigos que não existem em clientes
+- alterados: códigos existentes cujo hash de conteúdo mudou
+- removidos: clientes que não estão mais na planilha
+
+Tudo é aplicado numa única transação. Clientes que sumiram da planilha
+mas possuem contatos registrados são mantidos para preservar o histórico.
+"""
+
+from datetime import datetime
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, String, Float, Date,
+    select, insert, update, delete, func, exists, literal, and_, or_
+)
+from src.models.user import db
+from src.models.cliente import Cliente, CAMPOS_IMPORTACAO
+from src.models.contato import ContatoRegistrado
+
+
+def _criar_tabela_staging():
+    metadata = MetaData()
+    return Table(
+        'clientes_staging', metadata,
+        Column('cod_cliente', Integer, primary_key=True),
+        Column('nome', String(200), nullable=False),
+        Column('municipio', String(100)),
+        Column('filial', String(10)),
+        Column('classe', String(10)),
+        Column('potencial_pecas', Float),
+        Column('potencial_servico', Float),
+        Column('status_6m', String(50)),
+        Column('ultima_mov', Date),
+        Column('consultor_pecas', String(100)),
+        Column('consultor_servicos', String(100)),
+        Column('hash_conteudo', String(40)),
+        prefixes=['TEMPORARY']
+    )
+
+
+def substituir_clientes(registros):
+    """Substitui a base de clientes pelos registros da planilha
+
+    registros: lista de dicts com cod_cliente e as colunas de
+    CAMPOS_IMPORTACAO. Retorna um dict com as contagens do diff.
+    """
+    # Último registro de cada código prevalece (igual ao comportamento anterior)
+    por_codigo = {}
+    for registro in registros:
+        linha = {campo: registro.get(campo) for campo in CAMPOS_IMPORTACAO}
+        linha['cod_cliente'] = registro['cod_cliente']
+        linha['hash_conteudo'] = Cliente.calcular_hash(linha)
+        por_codigo[linha['cod_cliente']] = linha
+
+    clientes = Cliente.__table__
+    contatos = ContatoRegistrado.__table__
+    staging = _criar_tabela_staging()
+    conn = db.session.connection()
+    agora = datetime.utcnow()
+
+    # Pode ter sobrado de uma importação anterior que falhou nesta conexão
+    staging.drop(conn, checkfirst=True)
+    staging.create(conn)
+    try:
+        if por_codigo:
+            conn.execute(insert(staging), list(por_codigo.values()))
+
+        existe_cliente = exists().where(clientes.c.cod_cliente == staging.c.cod_cliente)
+        existe_staging = exists().where(staging.c.cod_cliente == clientes.c.cod_cliente)
+        existe_contato = exists().where(contatos.c.cliente_id == clientes.c.id)
+
+        # Códigos existentes cujo conteúdo mudou (hash ausente conta como alterado)
+        codigos_alterados = select(staging.c.cod_cliente).join(
+            clientes, clientes.c.cod_cliente == staging.c.cod_cliente
+        ).where(or_(
+            clientes.c.hash_conteudo.is_(None),
+            clientes.c.hash_conteudo != staging.c.hash_conteudo
+        ))
+
+        novos = conn.execute(
+            select(func.count()).select_from(staging).where(~existe_cliente)
+        ).scalar()
+        alterados = conn.execute(
+            select(func.count()).select_from(codigos_alterados.subquery())
+        ).scalar()
+        mantidos = conn.execute(
+            select(func.count()).select_from(clientes).where(and_(~existe_staging, existe_contato))
+        ).scalar()
+
+        # Atualizar apenas os clientes alterados
+        if alterados:
+            colunas = list(CAMPOS_IMPORTACAO) + ['hash_conteudo']
+            valores = {
+                coluna: select(staging.c[coluna]).where(
+                    staging.c.cod_cliente == clientes.c.cod_cliente
+                ).scalar_subquery()
+                for coluna in colunas
+            }
+            valores['updated_at'] = agora
+            conn.execute(
+                update(clientes)
+                .where(clientes.c.cod_cliente.in_(codigos_alterados))
+                .values(valores)
+            )
+
+        # Inserir os novos
+        if novos:
+            colunas = ['cod_cliente'] + list(CAMPOS_IMPORTACAO) + ['hash_conteudo']
+            conn.execute(
+                insert(clientes).from_select(
+                    colunas + ['created_at', 'updated_at'],
+                    select(
+                        *[staging.c[c] for c in colunas],
+                        literal(agora, clientes.c.created_at.type),
+                        literal(agora, clientes.c.updated_at.type)
+                    ).where(~existe_cliente)
+                )
+            )
+
+        # Remover os que saíram da planilha e não têm histórico de contatos
+        removidos = conn.execute(
+            delete(clientes).where(and_(~existe_staging, ~existe_contato))
+        ).rowcount
+
+        staging.drop(conn)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        'novos': novos,
+        'alterados': alterados,
+        'inalterados': len(por_codigo) - novos - alterados,
+        'removidos': removidos,
+        'mantidos': mantidos
+    }
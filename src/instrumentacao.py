@@ -0,0 +1,260 @@
+"""
+Instrumentação de SQL por requisição
+
+Os eventos before/after_cursor_execute do SQLAlchemy acumulam, em g, as
+consultas da requisição atual: quantidade, tempo total no banco, linhas
+(cursor.rowcount, quando o driver informa) e a consulta mais lenta com o
+formato dos parâmetros (tipos, nunca os valores). Ao final da requisição:
+
+- cabeçalho Server-Timing (db, app) visível no DevTools do navegador
+- uma linha de log JSON no logger 'crm.requisicoes'
+- agregação por endpoint num relatório em memória (por processo) com os
+  endpoints mais lentos, exposto em GET /api/sistema/sql (master)
+
+Em desenvolvimento e testes o mesmo hook detecta N+1: cada SELECT é
+reduzido a uma "forma" (espaços e listas IN normalizados) e, quando a
+mesma forma roda mais de DETECTOR_N_MAIS_UM_LIMITE vezes numa requisição,
+o detector avisa (NMaisUmAviso) ou levanta NMaisUmDetectado, indicando o
+endpoint e a linha do código do projeto que disparou a consulta.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+import warnings
+from collections import deque, Counter
+from contextlib import contextmanager
+from flask import g, request, has_request_context, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('crm.requisicoes')
+
+# Tamanho máximo do SQL guardado para a consulta mais lenta
+LIMITE_SQL = 500
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Listas de parâmetros "(?, ?, ?)" ou "(%(id_1)s, %(id_2)s)" viram "(?)"
+_LISTA_PARAMETROS = re.compile(r'\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)')
+
+
+class NMaisUmDetectado(RuntimeError):
+    """A mesma consulta rodou mais vezes que o limite numa requisição"""
+
+
+class NMaisUmAviso(RuntimeWarning):
+    """Aviso de N+1 (modo 'avisar' do detector)"""
+
+
+def forma_consulta(statement):
+    """Normaliza o SQL para agrupar execuções da mesma consulta"""
+    return _LISTA_PARAMETROS.sub('(?)', ' '.join(statement.split()))
+
+
+def _origem_consulta():
+    """Primeira linha do código do projeto na pilha (fora deste módulo)"""
+    for quadro in reversed(traceback.extract_stack()):
+        arquivo = os.path.abspath(quadro.filename)
+        if (
+            arquivo.startswith(RAIZ_PROJETO)
+            and arquivo != os.path.abspath(__file__)
+            and 'site-packages' not in arquivo
+        ):
+            return f'{os.path.relpath(arquivo, RAIZ_PROJETO)}:{quadro.lineno} ({quadro.name})'
+    return 'desconhecida'
+
+
+@contextmanager
+def consultas_em_lote():
+    """Suspende o detector de N+1 para repetições intencionais (ex.: lotes de IN)"""
+    if not (has_request_context() and 'sql' in g):
+        yield
+        return
+    g.sql['em_lote'] += 1
+    try:
+        yield
+    finally:
+        g.sql['em_lote'] -= 1
+
+
+def _verificar_n_mais_um(sql, statement):
+    modo, limite = sql['detector']
+    if not modo or sql['em_lote'] or not statement.lstrip()[:6].upper() == 'SELECT':
+        return
+
+    forma = forma_consulta(statement)
+    sql['formas'][forma] += 1
+    if sql['formas'][forma] != limite + 1:
+        return
+
+    mensagem = (
+        f'Possível N+1 em {request.endpoint or request.path}: a mesma consulta rodou '
+        f'mais de {limite} vezes (origem: {_origem_consulta()}): {forma[:LIMITE_SQL]}'
+    )
+    if modo == 'erro':
+        raise NMaisUmDetectado(mensagem)
+    warnings.warn(mensagem, NMaisUmAviso, stacklevel=2)
+
+
+def formato_parametros(parametros):
+    """Troca os valores dos parâmetros pelos nomes dos tipos"""
+    if isinstance(parametros, dict):
+        return {chave: type(valor).__name__ for chave, valor in parametros.items()}
+    if isinstance(parametros, (list, tuple)):
+        if parametros and isinstance(parametros[0], (dict, list, tuple)):
+            # executemany: formato da primeira linha e quantidade de linhas
+            return {'linhas': len(parametros), 'formato': formato_parametros(parametros[0])}
+        return [type(valor).__name__ for valor in parametros]
+    return type(parametros).__name__
+
+
+class RelatorioEndpoints:
+    """Últimas amostras por endpoint e ranking dos mais lentos"""
+
+    def __init__(self, amostras_por_endpoint=200):
+        self.amostras_por_endpoint = amostras_por_endpoint
+        self._lock = threading.Lock()
+        self.resetar()
+
+    def resetar(self):
+        with self._lock:
+            self._amostras = {}
+            self._mais_lenta = {}
+
+    def registrar(self, endpoint, duracao_ms, sql):
+        with self._lock:
+            amostras = self._amostras.get(endpoint)
+            if amostras is None:
+                amostras = self._amostras[endpoint] = deque(maxlen=self.amostras_por_endpoint)
+            amostras.append((duracao_ms, sql['consultas'], sql['db_ms']))
+
+            lenta = sql['mais_lenta']
+            atual = self._mais_lenta.get(endpoint)
+            if lenta and (atual is None or lenta['ms'] > atual['ms']):
+                self._mais_lenta[endpoint] = lenta
+
+    def top(self, n=10):
+        with self._lock:
+            copia = {endpoint: list(amostras) for endpoint, amostras in self._amostras.items()}
+            mais_lenta = dict(self._mais_lenta)
+
+        relatorio = []
+        for endpoint, amostras in copia.items():
+            duracoes = sorted(a[0] for a in amostras)
+            total = len(amostras)
+            relatorio.append({
+                'endpoint': endpoint,
+                'requisicoes': total,
+                'p50_ms': round(duracoes[total // 2], 1),
+                'p95_ms': round(duracoes[min(total - 1, int(total * 0.95))], 1),
+                'max_ms': round(duracoes[-1], 1),
+                'consultas_media': round(sum(a[1] for a in amostras) / total, 1),
+                'db_ms_medio': round(sum(a[2] for a in amostras) / total, 1),
+                'consulta_mais_lenta': mais_lenta.get(endpoint)
+            })
+        relatorio.sort(key=lambda r: r['p95_ms'], reverse=True)
+        return relatorio[:n]
+
+
+relatorio_endpoints = RelatorioEndpoints()
+
+
+def _antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    # O início fica no contexto da execução (um por comando), não na conexão:
+    # after_cursor_execute não dispara quando o comando falha
+    if context is not None and has_request_context() and 'sql' in g:
+        context._inicio_consulta = time.perf_counter()
+
+
+def _depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    if not (has_request_context() and 'sql' in g):
+        return
+    inicio = getattr(context, '_inicio_consulta', None)
+    if inicio is None:
+        return
+    duracao_ms = (time.perf_counter() - inicio) * 1000
+
+    sql = g.sql
+    sql['consultas'] += 1
+    sql['db_ms'] += duracao_ms
+    if cursor.rowcount and cursor.rowcount > 0:
+        sql['linhas'] += cursor.rowcount
+
+    if sql['mais_lenta'] is None or duracao_ms > sql['mais_lenta']['ms']:
+        sql['mais_lenta'] = {
+            'ms': round(duracao_ms, 3),
+            'sql': ' '.join(statement.split())[:LIMITE_SQL],
+            'parametros': formato_parametros(parameters)
+        }
+
+    _verificar_n_mais_um(sql, statement)
+
+
+def init_instrumentacao(app):
+    """Registra os eventos do SQLAlchemy e os hooks de requisição do app"""
+    if not (app.config.get('SQL_INSTRUMENTACAO', True) or app.config.get('DETECTOR_N_MAIS_UM')):
+        return
+
+    # Eventos na classe Engine valem para o primário e para a réplica
+    if not event.contains(Engine, 'before_cursor_execute', _antes_da_consulta):
+        event.listen(Engine, 'before_cursor_execute', _antes_da_consulta)
+        event.listen(Engine, 'after_cursor_execute', _depois_da_consulta)
+
+    if app.config.get('SQL_LOG_REQUISICOES', True) and not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+    @app.before_request
+    def iniciar_medicao():
+        g.sql = {
+            'consultas': 0, 'db_ms': 0.0, 'linhas': 0, 'mais_lenta': None,
+            'detector': (
+                current_app.config.get('DETECTOR_N_MAIS_UM'),
+                current_app.config.get('DETECTOR_N_MAIS_UM_LIMITE', 10)
+            ),
+            'formas': Counter(),
+            'em_lote': 0
+        }
+        g.inicio_requisicao = time.perf_counter()
+
+    @app.after_request
+    def registrar_medicao(response):
+        sql = g.pop('sql', None)
+        if sql is None or not app.config.get('SQL_INSTRUMENTACAO', True):
+            return response
+        duracao_ms = (time.perf_counter() - g.inicio_requisicao) * 1000
+        endpoint = request.endpoint or 'sem_rota'
+
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={sql["db_ms"]:.1f};desc="{sql["consultas"]} consultas", '
+            f'app;dur={max(duracao_ms - sql["db_ms"], 0):.1f}'
+        )
+
+        if sql['consultas']:
+            relatorio_endpoints.registrar(endpoint, duracao_ms, sql)
+
+        if app.config.get('SQL_LOG_REQUISICOES', True):
+            logger.info(json.dumps({
+                'metodo': request.method,
+                'rota': request.path,
+                'endpoint': endpoint,
+                'status': response.status_code,
+                'duracao_ms': round(duracao_ms, 1),
+                'consultas': sql['consultas'],
+                'db_ms': round(sql['db_ms'], 1),
+                'linhas': sql['linhas'],
+                'mais_lenta': sql['mais_lenta'],
+                'repeticoes_max': max(sql['formas'].values(), default=0)
+            }, ensure_ascii=False, default=str))
+
+        return response
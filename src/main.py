@@ -3,68 +3,106 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+import importlib
+import time
+from flask import Flask, request, Response
+import sqlalchemy as sa
 from flask_cors import CORS
 
 # Importar configuração
-from src.config import get_config
+from src.config import get_config, aplicar_statement_timeout
 
 # Importar modelos primeiro
 from src.models.user import db
+from src.replica import init_replica
+from src.instrumentacao import init_instrumentacao
+from src.metricas import init_metricas, gerar_metricas
+from src.perfilamento import init_perfilamento
+from src.estaticos import init_estaticos
+from src.compressao import init_compressao
+
+# Blueprints registrados pelo create_app: (módulo, atributo)
+# Os módulos de rotas só são importados quando o app é criado.
+BLUEPRINTS = [
+    ('src.routes.user', 'user_bp'),
+    ('src.routes.cliente', 'cliente_bp'),
+    ('src.routes.contato', 'contato_bp'),
+    ('src.routes.upload', 'upload_bp'),
+    ('src.routes.dashboard', 'dashboard_bp'),
+    ('src.routes.agenda', 'agenda_bp'),
+    ('src.routes.sistema', 'sistema_bp'),
+    ('src.routes.analitico', 'analitico_bp'),
+    ('src.routes.fila', 'fila_bp'),
+]
+
+
+def create_app(config=None, servidor_web=False):
+    """Cria e configura a aplicação Flask
+
+    Não acessa o banco: criação de tabelas e migrações ficam no comando
+    explícito bootstrap_db.py (src/bootstrap.py). servidor_web=True (wsgi.py,
+    asgi.py) aplica o statement_timeout das requisições; os comandos de
+    manutenção criam o app sem ele.
+    """
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+
+    # Carregar configuração baseada no ambiente
+    app.config.from_object(config or get_config())
+    if servidor_web:
+        aplicar_statement_timeout(app.config)
+
+    # Habilitar CORS para todas as rotas
+    CORS(app, origins=app.config.get('CORS_ORIGINS', '*'))
+
+    # Inicializar banco de dados
+    db.init_app(app)
+    init_replica(app)
+    init_instrumentacao(app)
+    init_metricas(app)
+    init_perfilamento(app)
+    init_compressao(app)
+
+    # Registrar blueprints
+    for modulo, atributo in BLUEPRINTS:
+        blueprint = getattr(importlib.import_module(modulo), atributo)
+        app.register_blueprint(blueprint, url_prefix='/api')
+
+    # Front-end: manifesto em memória e variantes pré-comprimidas
+    init_estaticos(app)
+
+    # Rota de health check (inclui um SELECT 1 no banco principal)
+    @app.route('/health')
+    def health():
+        inicio = time.perf_counter()
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(sa.text('SELECT 1'))
+        except Exception:
+            # O erro do driver traz host, porta e usuário: só no log do servidor
+            app.logger.exception('Health check: banco de dados indisponível')
+            return {'status': 'erro', 'message': 'Banco de dados indisponível'}, 503
+        return {
+            'status': 'ok',
+            'message': 'CRM API is running',
+            'db_ms': round((time.perf_counter() - inicio) * 1000, 1)
+        }
+
+    # Métricas Prometheus (somadas entre os workers do Gunicorn)
+    @app.route('/metrics')
+    def metrics():
+        token = app.config.get('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return {'error': 'Token inválido'}, 401
+        corpo, content_type = gerar_metricas()
+        return Response(corpo, content_type=content_type)
+
+    return app
 
-# Importar rotas
-from src.routes.user import user_bp
-from src.routes.cliente import cliente_bp
-from src.routes.contato import contato_bp
-from src.routes.upload import upload_bp
-from src.routes.dashboard import dashboard_bp
-from src.routes.agenda import agenda_bp
-
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-
-# Carregar configuração baseada no ambiente
-config = get_config()
-app.config.from_object(config)
-
-# Habilitar CORS para todas as rotas
-CORS(app, origins=app.config.get('CORS_ORIGINS', '*'))
-
-# Inicializar banco de dados
-db.init_app(app)
-
-# Registrar blueprints
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(cliente_bp, url_prefix='/api')
-app.register_blueprint(contato_bp, url_prefix='/api')
-app.register_blueprint(upload_bp, url_prefix='/api')
-app.register_blueprint(dashboard_bp, url_prefix='/api')
-app.register_blueprint(agenda_bp, url_prefix='/api')
-
-# Criar tabelas (apenas se não existirem)
-with app.app_context():
-    db.create_all()
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
-
-# Rota de health check
-@app.route('/health')
-def health():
-    return {'status': 'ok', 'message': 'CRM API is running'}
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    from src.bootstrap import bootstrap_database
 
+    # Servidor de desenvolvimento: preparar o banco (sem limite de tempo) antes de subir
+    bootstrap_database(create_app())
+    app = create_app(servidor_web=True)
+    app.run(host='0.0.0.0', port=5000, debug=True)
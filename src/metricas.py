@@ -0,0 +1,133 @@
+"""
+Métricas no formato Prometheus (GET /metrics)
+
+- requisições por rota: contador, histograma de latência e em andamento
+- pool de conexões: conexões em uso/ociosas/overflow e espera no checkout
+- importações de clientes: execuções e clientes por operação
+- caches em memória: consultas com acerto (hit) e falha (miss)
+
+Com o Gunicorn os valores de cada worker são gravados em arquivos mmap no
+diretório PROMETHEUS_MULTIPROC_DIR (definido em gunicorn.conf.py) e o
+/metrics soma todos os workers. Sem essa variável (servidor de
+desenvolvimento) as métricas são apenas do processo atual.
+"""
+
+import os
+import time
+from flask import g, request
+from prometheus_client import (
+    Counter, Histogram, Gauge, CollectorRegistry, REGISTRY,
+    generate_latest, CONTENT_TYPE_LATEST
+)
+from prometheus_client import multiprocess
+
+MULTIPROCESSO = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+# Latências típicas da API: de consultas simples (ms) a importações (s)
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+requisicoes = Counter(
+    'crm_http_requisicoes_total', 'Requisições HTTP atendidas',
+    ['metodo', 'endpoint', 'status']
+)
+latencia = Histogram(
+    'crm_http_latencia_segundos', 'Duração das requisições HTTP',
+    ['metodo', 'endpoint'], buckets=BUCKETS_LATENCIA
+)
+em_andamento = Gauge(
+    'crm_http_em_andamento', 'Requisições em andamento',
+    ['endpoint'], multiprocess_mode='livesum'
+)
+
+pool_conexoes = Gauge(
+    'crm_db_pool_conexoes', 'Conexões do pool por estado',
+    ['bind', 'estado'], multiprocess_mode='livesum'
+)
+pool_espera = Histogram(
+    'crm_db_pool_espera_segundos', 'Tempo de espera no checkout de conexões',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+importacoes = Counter(
+    'crm_importacoes_total', 'Execuções de importação de clientes',
+    ['origem', 'modo', 'resultado']
+)
+importacao_clientes = Counter(
+    'crm_importacao_clientes_total', 'Clientes processados em importações',
+    ['origem', 'operacao']
+)
+
+cache_consultas = Counter(
+    'crm_cache_consultas_total', 'Consultas a caches em memória',
+    ['cache', 'resultado']
+)
+
+
+def registrar_cache(cache, acerto, quantidade=1):
+    """Conta hits/misses de um cache em memória"""
+    if quantidade:
+        cache_consultas.labels(cache=cache, resultado='hit' if acerto else 'miss').inc(quantidade)
+
+
+def registrar_importacao(origem, modo, resultado, contagens=None):
+    """Conta uma importação e os clientes por operação (novos, alterados...)"""
+    importacoes.labels(origem=origem, modo=modo, resultado=resultado).inc()
+    for operacao, quantidade in (contagens or {}).items():
+        if quantidade:
+            importacao_clientes.labels(origem=origem, operacao=operacao).inc(quantidade)
+
+
+def registrar_requisicao(metodo, endpoint, status, duracao):
+    requisicoes.labels(metodo=metodo, endpoint=endpoint, status=str(status)).inc()
+    latencia.labels(metodo=metodo, endpoint=endpoint).observe(duracao)
+
+
+def atualizar_pool(engines):
+    """Atualiza os gauges do pool a partir do estado atual dos engines"""
+    for bind, engine in engines.items():
+        pool = engine.pool
+        if not hasattr(pool, 'checkedout'):
+            continue
+        nome = bind or 'primario'
+        pool_conexoes.labels(bind=nome, estado='em_uso').set(pool.checkedout())
+        pool_conexoes.labels(bind=nome, estado='ociosas').set(pool.checkedin())
+        pool_conexoes.labels(bind=nome, estado='overflow').set(max(pool.overflow(), 0))
+
+
+def gerar_metricas():
+    """Texto no formato de exposição do Prometheus (todos os workers)"""
+    if MULTIPROCESSO:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def init_metricas(app):
+    """Registra os hooks de requisição que alimentam as métricas HTTP"""
+    from src.models.user import db
+
+    @app.before_request
+    def iniciar_metricas():
+        g.metricas_inicio = time.perf_counter()
+        g.metricas_endpoint = request.endpoint or 'sem_rota'
+        em_andamento.labels(endpoint=g.metricas_endpoint).inc()
+        # Amostra do pool no início da requisição: a conexão da requisição
+        # anterior já foi devolvida (a sessão é removida depois dos teardowns)
+        atualizar_pool(db.engines)
+
+    @app.after_request
+    def registrar_metricas(response):
+        if 'metricas_inicio' in g:
+            registrar_requisicao(
+                request.method, g.metricas_endpoint, response.status_code,
+                time.perf_counter() - g.metricas_inicio
+            )
+        return response
+
+    @app.teardown_request
+    def finalizar_metricas(exc):
+        endpoint = g.pop('metricas_endpoint', None)
+        if endpoint is not None:
+            em_andamento.labels(endpoint=endpoint).dec()
@@ -0,0 +1,142 @@
+"""
+Migrações incrementais de esquema
+
+db.create_all() só cria tabelas inexistentes; colunas novas em tabelas
+já existentes precisam ser adicionadas aqui. Cada migração é idempotente
+e é aplicada apenas se a coluna (ou o índice) ainda não existir. Migrações de dados
+(normalizar_referencias_contato) rodam enquanto a coluna antiga existir.
+As transações das migrações rodam sem statement_timeout (sem_limite_de_tempo):
+o backfill e os ALTER TABLE percorrem a tabela de contatos inteira.
+"""
+
+from sqlalchemy import inspect, text, case, column, func, select, table
+from src.models.user import db
+from src.models.contato import codigo_automatico, incrementar_versao_referencias
+
+# (tabela, coluna, definição SQL)
+COLUNAS = [
+    ('clientes', 'hash_conteudo', 'VARCHAR(40)'),
+    ('contatos_registrados', 'tipo_contato_id', 'INTEGER REFERENCES tipos_contato(id)'),
+    ('contatos_registrados', 'resultado_contato_id', 'INTEGER REFERENCES resultados_contato(id)'),
+]
+
+# (nome, tabela, coluna)
+INDICES = [
+    ('ix_clientes_updated_at', 'clientes', 'updated_at'),
+    ('ix_contatos_registrados_updated_at', 'contatos_registrados', 'updated_at'),
+]
+
+# Texto livre que virou chave estrangeira: (coluna de texto, coluna inteira, tabela de referência)
+REFERENCIAS_CONTATO = [
+    ('tipo_contato', 'tipo_contato_id', 'tipos_contato'),
+    ('resultado_contato', 'resultado_contato_id', 'resultados_contato'),
+]
+
+
+def sem_limite_de_tempo(conn, lock_timeout_ms=None):
+    """Desliga o statement_timeout na transação de `conn` (PostgreSQL)
+
+    Migrações e manutenção reescrevem tabelas inteiras e não podem herdar o
+    limite das requisições (nem um padrão do papel ou do banco). SET LOCAL
+    vale até o fim da transação; lock_timeout_ms limita a espera por
+    bloqueios, para não enfileirar a aplicação atrás de um ALTER/LOCK.
+    """
+    if conn.dialect.name != 'postgresql':
+        return
+    conn.execute(text('SET LOCAL statement_timeout = 0'))
+    if lock_timeout_ms is not None:
+        conn.execute(text(f'SET LOCAL lock_timeout = {int(lock_timeout_ms)}'))
+
+
+def aplicar_migracoes(engine=None):
+    """Adiciona as colunas e os índices que faltam nas tabelas existentes"""
+    engine = engine or db.engine
+    inspector = inspect(engine)
+    tabelas = set(inspector.get_table_names())
+    aplicadas = []
+
+    with engine.begin() as conn:
+        sem_limite_de_tempo(conn)
+        for tabela, coluna, definicao in COLUNAS:
+            if tabela not in tabelas:
+                continue
+            existentes = {c['name'] for c in inspector.get_columns(tabela)}
+            if coluna in existentes:
+                continue
+            conn.execute(text(f'ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}'))
+            aplicadas.append(f'{tabela}.{coluna}')
+
+        for nome, tabela, coluna in INDICES:
+            if tabela not in tabelas:
+                continue
+            if nome in {i['name'] for i in inspector.get_indexes(tabela)}:
+                continue
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS {nome} ON {tabela} ({coluna})'))
+            aplicadas.append(nome)
+
+    aplicadas += normalizar_referencias_contato(engine)
+    return aplicadas
+
+
+def _mapa_descricoes(conn, tabela):
+    """{descrição: id}, preferindo o registro ativo e, entre iguais, o mais antigo"""
+    mapa = {}
+    for id_, descricao in conn.execute(text(
+        f'SELECT id, descricao FROM {tabela} ORDER BY CASE WHEN ativo THEN 0 ELSE 1 END, id'
+    )):
+        mapa.setdefault(descricao, id_)
+    return mapa
+
+
+def normalizar_referencias_contato(engine):
+    """Troca tipo/resultado de texto em contatos_registrados por ids
+
+    Backfill: cada texto distinto reaproveita o tipo/resultado com a mesma
+    descrição ou vira um registro inativo (código '~' + hash), os ids são
+    gravados com um UPDATE por coluna (CASE texto -> id) e a coluna de
+    texto é removida. Tudo numa transação; a API continua textual.
+    """
+    inspector = inspect(engine)
+    if 'contatos_registrados' not in inspector.get_table_names():
+        return []
+    existentes = {c['name'] for c in inspector.get_columns('contatos_registrados')}
+    pendentes = [ref for ref in REFERENCIAS_CONTATO if ref[0] in existentes]
+    if not pendentes:
+        return []
+
+    aplicadas = []
+    with engine.begin() as conn:
+        sem_limite_de_tempo(conn)
+        for texto, coluna, referencia in pendentes:
+            contatos = table('contatos_registrados', column(texto), column(coluna))
+            tabela_ref = table(referencia, column('id'), column('codigo'), column('descricao'), column('ativo'))
+            mapa = _mapa_descricoes(conn, referencia)
+
+            distintos = [valor for (valor,) in conn.execute(
+                select(contatos.c[texto]).where(contatos.c[coluna].is_(None)).distinct()
+            )]
+            for descricao in distintos:
+                if descricao not in mapa:
+                    conn.execute(tabela_ref.insert().values(
+                        codigo=codigo_automatico(descricao), descricao=descricao, ativo=False
+                    ))
+                    mapa[descricao] = conn.execute(
+                        select(tabela_ref.c.id).where(tabela_ref.c.codigo == codigo_automatico(descricao))
+                    ).scalar_one()
+                    incrementar_versao_referencias(conn)
+
+            if distintos:
+                conn.execute(contatos.update().where(contatos.c[coluna].is_(None)).values({
+                    coluna: case({descricao: mapa[descricao] for descricao in distintos}, value=contatos.c[texto])
+                }))
+            sem_id = conn.execute(select(func.count()).select_from(contatos).where(contatos.c[coluna].is_(None))).scalar()
+            if sem_id:
+                raise RuntimeError(f'{sem_id} contato(s) sem {coluna} depois do backfill')
+
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_contatos_registrados_{coluna} ON contatos_registrados ({coluna})'))
+            if engine.dialect.name == 'postgresql':
+                conn.execute(text(f'ALTER TABLE contatos_registrados ALTER COLUMN {coluna} SET NOT NULL'))
+            conn.execute(text(f'ALTER TABLE contatos_registrados DROP COLUMN {texto}'))
+            aplicadas.append(f'contatos_registrados.{texto} -> {coluna}')
+
+    return aplicadas
@@ -0,0 +1,46 @@
+from datetime import datetime
+from src.models.user import db
+
+class Auditoria(db.Model):
+    __tablename__ = 'auditoria'
+
+    id = db.Column(db.Integer, primary_key=True)
+    acao = db.Column(db.String(50), nullable=False, index=True)
+    entidade = db.Column(db.String(50), nullable=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    usuario_email = db.Column(db.String(120))
+    filtros = db.Column(db.JSON)
+    alteracoes = db.Column(db.JSON)
+    registros_afetados = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'acao': self.acao,
+            'entidade': self.entidade,
+            'usuario_id': self.usuario_id,
+            'usuario_email': self.usuario_email,
+            'filtros': self.filtros,
+            'alteracoes': self.alteracoes,
+            'registros_afetados': self.registros_afetados,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    @staticmethod
+    def registrar(acao, entidade, usuario=None, filtros=None, alteracoes=None, registros_afetados=0):
+        """Adiciona uma entrada de auditoria na sessão atual (sem commit)"""
+        entrada = Auditoria(
+            acao=acao,
+            entidade=entidade,
+            usuario_id=usuario.id if usuario else None,
+            usuario_email=usuario.email if usuario else None,
+            filtros=filtros,
+            alteracoes=alteracoes,
+            registros_afetados=registros_afetados
+        )
+        db.session.add(entrada)
+        return entrada
+
+    def __repr__(self):
+        return f'<Auditoria {self.id}: {self.acao} {self.entidade} ({self.registros_afetados})>'
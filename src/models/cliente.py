@@ -1,7 +1,35 @@
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from datetime import datetime, date
+import hashlib
 from src.models.user import db
 
+# Colunas vindas da planilha de importação (entram no hash de conteúdo)
+CAMPOS_IMPORTACAO = (
+    'nome', 'municipio', 'filial', 'classe', 'potencial_pecas', 'potencial_servico',
+    'status_6m', 'ultima_mov', 'consultor_pecas', 'consultor_servicos'
+)
+
+# Cadência de contato por classe, em dias corridos (calcular_proximo_contato,
+# cobertura da carteira)
+CADENCIA_DIAS = {
+    'AA': 7,    # 1 semana
+    'AM': 15,   # 2 semanas (quinzenal)
+    'AF': 30,   # 1 mês (mensal)
+    'BM': 30,   # 1 mês (mensal)
+    'BF': 30,   # 1 mês (mensal)
+    'ZZ': 30,   # 1 mês (mensal)
+    'QQ': 60,   # 2 meses (bimestral)
+    'SC': 60    # 2 meses (bimestral)
+}
+CADENCIA_PADRAO_DIAS = 30  # classe não reconhecida
+
+
+def cadencia_dias(classe):
+    """Dias entre contatos para a classe (normalizada para maiúsculas)"""
+    classe = str(classe).upper().strip() if classe else ''
+    return CADENCIA_DIAS.get(classe, CADENCIA_PADRAO_DIAS)
+
+
 class Cliente(db.Model):
     __tablename__ = 'clientes'
     
@@ -17,8 +45,10 @@ class Cliente(db.Model):
     classe = db.Column(db.String(10))
     consultor_pecas = db.Column(db.String(100))
     consultor_servicos = db.Column(db.String(100))
+    hash_conteudo = db.Column(db.String(40))  # SHA-1 das colunas importadas
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Indexado: leitura incremental do snapshot analítico (src/analitico.py)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relacionamento com contatos (backref definido em ContatoRegistrado)
     contatos = db.relationship('ContatoRegistrado', back_populates='cliente', lazy=True, cascade='all, delete-orphan')
@@ -68,6 +98,30 @@ class Cliente(db.Model):
         
         return cliente
     
+    @staticmethod
+    def calcular_hash(dados):
+        """Calcula o hash de conteúdo a partir das colunas importadas
+
+        Usado pelas importações para detectar se uma linha da planilha
+        realmente altera o cliente já cadastrado.
+        """
+        partes = []
+        for campo in CAMPOS_IMPORTACAO:
+            valor = dados.get(campo)
+            if campo in ('potencial_pecas', 'potencial_servico'):
+                partes.append(f'{float(valor or 0.0):.2f}')
+            elif isinstance(valor, (datetime, date)):
+                partes.append(valor.strftime('%Y-%m-%d'))
+            else:
+                partes.append('' if valor is None else str(valor).strip())
+        return hashlib.sha1('\x1f'.join(partes).encode('utf-8')).hexdigest()
+
+    def atualizar_hash(self):
+        """Recalcula o hash de conteúdo a partir dos valores atuais"""
+        self.hash_conteudo = Cliente.calcular_hash(
+            {campo: getattr(self, campo) for campo in CAMPOS_IMPORTACAO}
+        )
+
     def __repr__(self):
         return f'<Cliente {self.cod_cliente}: {self.nome}>'
 
@@ -1,35 +1,90 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, date
+import hashlib
+from flask import has_app_context
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
 from src.models.user import db
 
+
+def codigo_automatico(descricao):
+    """Código de um tipo/resultado criado a partir de texto livre ('~' + hash)"""
+    return '~' + hashlib.sha1(descricao.encode('utf-8')).hexdigest()[:9]
+
+
+def id_por_descricao(modelo, descricao):
+    """Id do TipoContato/ResultadoContato com a descrição exata; cria um inativo se faltar
+
+    Só a descrição idêntica é reaproveitada, então o texto livre recebido
+    pela API (ex.: 'MSG WHATSAPP') volta exatamente igual. Procura
+    primeiro no registro em memória (src/referencias.py), sem consulta.
+    """
+    descricao = '' if descricao is None else str(descricao)
+    if has_app_context():
+        # Importado aqui: src.referencias depende deste módulo
+        from src.referencias import obter_registro
+        registro = obter_registro()
+        id_ = (registro.tipos if modelo is TipoContato else registro.resultados).por_descricao.get(descricao)
+        if id_ is not None:
+            return id_
+
+    existente = modelo.query.filter_by(descricao=descricao).order_by(modelo.ativo.desc(), modelo.id).first()
+    if existente is not None:
+        return existente.id
+
+    novo = modelo(codigo=codigo_automatico(descricao), descricao=descricao, ativo=False)
+    try:
+        with db.session.begin_nested():
+            db.session.add(novo)
+    except IntegrityError:
+        # Criado ao mesmo tempo por outra requisição
+        return modelo.query.filter_by(codigo=codigo_automatico(descricao)).one().id
+    return novo.id
+
+
 class ContatoRegistrado(db.Model):
     __tablename__ = 'contatos_registrados'
     
     id = db.Column(db.Integer, primary_key=True)
     cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False, index=True)
     data_contato = db.Column(db.Date, nullable=False, default=date.today)
-    tipo_contato = db.Column(db.String(100), nullable=False)
-    resultado_contato = db.Column(db.String(200), nullable=False)
+    # Tipo e resultado: inteiros na tabela, texto (descrição) na API
+    tipo_contato_id = db.Column(db.Integer, db.ForeignKey('tipos_contato.id'), nullable=False, index=True)
+    resultado_contato_id = db.Column(db.Integer, db.ForeignKey('resultados_contato.id'), nullable=False, index=True)
     observacao = db.Column(db.Text)
     vendedor = db.Column(db.String(100), nullable=False)
     proximo_contato = db.Column(db.Date)
     hora_contato = db.Column(db.DateTime, default=datetime.utcnow)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relacionamento com Cliente
     cliente = db.relationship('Cliente', back_populates='contatos', lazy='joined')
+    # Tabelas de referência pequenas: carregadas junto, sem consulta por linha
+    tipo = db.relationship('TipoContato', lazy='joined')
+    resultado = db.relationship('ResultadoContato', lazy='joined')
+    
+    @property
+    def tipo_contato(self):
+        return self.tipo.descricao if self.tipo else None
+    
+    @tipo_contato.setter
+    def tipo_contato(self, descricao):
+        self.tipo_contato_id = id_por_descricao(TipoContato, descricao)
+    
+    @property
+    def resultado_contato(self):
+        return self.resultado.descricao if self.resultado else None
+    
+    @resultado_contato.setter
+    def resultado_contato(self, descricao):
+        self.resultado_contato_id = id_por_descricao(ResultadoContato, descricao)
     
     def to_dict(self):
-        try:
-            cliente_nome = self.cliente.nome if self.cliente else None
-            cliente_cod = self.cliente.cod_cliente if self.cliente else None
-        except Exception as e:
-            # Se houver erro ao acessar cliente, buscar diretamente
-            from src.models.cliente import Cliente
-            cliente = Cliente.query.get(self.cliente_id)
-            cliente_nome = cliente.nome if cliente else None
-            cliente_cod = cliente.cod_cliente if cliente else None
+        # cliente é carregado junto (lazy='joined'); sem consulta extra por linha
+        cliente = self.cliente
+        cliente_nome = cliente.nome if cliente else None
+        cliente_cod = cliente.cod_cliente if cliente else None
         
         return {
             'id': self.id,
@@ -153,3 +208,56 @@ class Feriado(db.Model):
             'descricao': self.descricao
         }
 
+
+VERSAO_REFERENCIAS = 'referencias'
+
+
+class VersaoReferencia(db.Model):
+    """Versão dos dados de referência (tipos, resultados, feriados)
+
+    Incrementada a cada alteração dessas tabelas; cada processo compara com
+    a versão do seu registro em memória (src/referencias.py).
+    """
+    __tablename__ = 'versoes_referencia'
+
+    nome = db.Column(db.String(50), primary_key=True)
+    versao = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+def incrementar_versao_referencias(conn):
+    """Marca tipos/resultados/feriados como alterados (na transação de conn)"""
+    tabela = VersaoReferencia.__table__
+    agora = datetime.utcnow()
+    alteradas = conn.execute(tabela.update().where(tabela.c.nome == VERSAO_REFERENCIAS).values(
+        versao=tabela.c.versao + 1, updated_at=agora
+    )).rowcount
+    if not alteradas:
+        conn.execute(tabela.insert().values(nome=VERSAO_REFERENCIAS, versao=1, updated_at=agora))
+
+
+def _referencia_alterada(mapper, connection, alvo):
+    incrementar_versao_referencias(connection)
+
+
+for _modelo in (TipoContato, ResultadoContato, Feriado):
+    for _evento in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_modelo, _evento, _referencia_alterada)
+
+
+class ContatoArquivado(db.Model):
+    """Contatos antigos de um mês, fora de contatos_registrados
+
+    dados: as linhas do mês em JSON Lines comprimido com gzip (src/arquivo.py).
+    """
+    __tablename__ = 'contatos_arquivados'
+
+    id = db.Column(db.Integer, primary_key=True)
+    mes = db.Column(db.Date, unique=True, nullable=False)  # primeiro dia do mês
+    linhas = db.Column(db.Integer, nullable=False)
+    dados = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ContatoArquivado {self.mes:%Y-%m}: {self.linhas} contatos>'
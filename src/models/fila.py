@@ -0,0 +1,40 @@
+from datetime import datetime
+from src.models.user import db
+
+class ItemFila(db.Model):
+    """Um cliente na lista de um consultor num dia (plano gerado por src/fila.py)
+
+    O plano é substituído inteiro a cada geração. cliente_id não é chave
+    estrangeira: excluir um cliente não deve esbarrar no plano, e a leitura
+    ignora clientes que não existem mais.
+    """
+    __tablename__ = 'fila_trabalho'
+    __table_args__ = (
+        db.Index('ix_fila_trabalho_consultor_data', 'consultor', 'data', 'posicao'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    consultor = db.Column(db.String(100), nullable=False)
+    data = db.Column(db.Date, nullable=False, index=True)
+    posicao = db.Column(db.Integer, nullable=False)  # ordem na lista do dia (1 = primeiro)
+    cliente_id = db.Column(db.Integer, nullable=False, index=True)
+    prioridade = db.Column(db.Float, nullable=False)
+    dias_atraso = db.Column(db.Integer)  # None: cliente sem contato
+    vencimento = db.Column(db.Date)
+    gerado_em = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'consultor': self.consultor,
+            'data': self.data.isoformat(),
+            'posicao': self.posicao,
+            'cliente_id': self.cliente_id,
+            'prioridade': self.prioridade,
+            'dias_atraso': self.dias_atraso,
+            'vencimento': self.vencimento.isoformat() if self.vencimento else None,
+            'gerado_em': self.gerado_em.isoformat() if self.gerado_em else None
+        }
+
+    def __repr__(self):
+        return f'<ItemFila {self.consultor} {self.data} #{self.posicao}: {self.cliente_id}>'
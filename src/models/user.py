@@ -1,8 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
+from src.replica import SessionRoteada
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': SessionRoteada})
 
 class User(db.Model):
     __tablename__ = 'users'
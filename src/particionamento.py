@@ -0,0 +1,288 @@
+"""
+Particionamento de contatos_registrados por data (PostgreSQL, opcional)
+
+converter() transforma a tabela em uma tabela particionada por faixa de
+data_contato (PARTITION BY RANGE), com uma partição por ano ou por
+trimestre e uma partição padrão para datas fora das faixas. O mapeamento
+do ORM não muda: a tabela-mãe mantém nome, colunas, índices e a
+sequência do id; só a chave primária passa a ser (id, data_contato),
+exigência do PostgreSQL para tabelas particionadas.
+
+Consultas que filtram data_contato leem só as partições da faixa
+(partition pruning). manter() cria as partições dos próximos períodos
+(o bootstrap chama a cada deploy) e arquivar() tira as partições antigas
+das consultas: desanexadas (viram tabelas comuns arquivo_*) ou movidas
+para contatos_arquivados (um blob comprimido por mês, src/arquivo.py).
+
+converter(), manter() e arquivar() rodam sem statement_timeout (a cópia
+de milhões de linhas não cabe no limite das requisições) e com
+lock_timeout de LOCK_TIMEOUT_MS: se a tabela estiver ocupada, a operação
+falha em vez de deixar a aplicação enfileirada atrás do bloqueio.
+
+Comando de manutenção: python partition_contatos.py
+"""
+
+import re
+from datetime import date
+from sqlalchemy import text
+from src.arquivo import COLUNAS, arquivar_linhas, proximo_mes
+from src.migrations import sem_limite_de_tempo
+
+TABELA = 'contatos_registrados'
+PADRAO = f'{TABELA}_padrao'
+GRANULARIDADES = ('ano', 'trimestre')
+PERIODOS_ADIANTE = 2
+MODOS_ARQUIVO = ('desanexar', 'comprimir')
+# Espera máxima (ms) pelos bloqueios de LOCK TABLE, ATTACH e DETACH
+LOCK_TIMEOUT_MS = 10000
+
+_NOME_TRIMESTRE = re.compile(rf'^{TABELA}_\d{{4}}q[1-4]$')
+_LIMITES = re.compile(r"FROM \('([\d-]+)'\) TO \('([\d-]+)'\)")
+
+
+class ParticionamentoInvalido(RuntimeError):
+    """Operação de particionamento impossível no banco atual"""
+
+
+def inicio_periodo(dia, granularidade):
+    if granularidade == 'ano':
+        return date(dia.year, 1, 1)
+    return date(dia.year, 3 * ((dia.month - 1) // 3) + 1, 1)
+
+
+def proximo_periodo(inicio, granularidade):
+    meses = 12 if granularidade == 'ano' else 3
+    mes = inicio.month - 1 + meses
+    return date(inicio.year + mes // 12, mes % 12 + 1, 1)
+
+
+def nome_particao(inicio, granularidade):
+    if granularidade == 'ano':
+        return f'{TABELA}_{inicio.year}'
+    return f'{TABELA}_{inicio.year}q{(inicio.month - 1) // 3 + 1}'
+
+
+def periodos(de, ate, granularidade):
+    """[(nome, início, fim exclusivo)] dos períodos que cobrem de..ate"""
+    resultado = []
+    inicio = inicio_periodo(de, granularidade)
+    while inicio <= ate:
+        fim = proximo_periodo(inicio, granularidade)
+        resultado.append((nome_particao(inicio, granularidade), inicio, fim))
+        inicio = fim
+    return resultado
+
+
+def _limite_adiante(granularidade, adiante):
+    """Início do último período a existir: o atual + `adiante` períodos"""
+    inicio = inicio_periodo(date.today(), granularidade)
+    for _ in range(adiante):
+        inicio = proximo_periodo(inicio, granularidade)
+    return inicio
+
+
+def _exigir_postgres(engine):
+    if engine.dialect.name != 'postgresql':
+        raise ParticionamentoInvalido('Particionamento disponível apenas no PostgreSQL')
+
+
+def eh_particionada(conn):
+    if conn.dialect.name != 'postgresql':
+        return False
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :tabela AND pg_table_is_visible(c.oid)"
+    ), {'tabela': TABELA}).scalar() is not None
+
+
+def listar_particoes(conn):
+    """Partições com faixa, linhas estimadas e tamanho (a padrão por último)"""
+    linhas = conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint, "
+        "pg_total_relation_size(c.oid) "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:tabela AS regclass)"
+    ), {'tabela': TABELA}).fetchall()
+
+    particoes = []
+    for nome, limites, estimadas, tamanho in linhas:
+        faixa = _LIMITES.search(limites or '')
+        particoes.append({
+            'nome': nome,
+            'inicio': date.fromisoformat(faixa.group(1)) if faixa else None,
+            'fim': date.fromisoformat(faixa.group(2)) if faixa else None,
+            'linhas_estimadas': max(estimadas, 0),
+            'bytes': tamanho,
+        })
+    return sorted(particoes, key=lambda p: (p['inicio'] is None, p['inicio'] or date.min))
+
+
+def granularidade_atual(particoes):
+    return 'trimestre' if any(_NOME_TRIMESTRE.match(p['nome']) for p in particoes) else 'ano'
+
+
+def _criar_particao(conn, nome, inicio, fim, pai=TABELA):
+    """Cria e anexa a partição, trazendo da partição padrão as linhas da faixa"""
+    conn.execute(text(f'CREATE TABLE {nome} (LIKE {pai} INCLUDING DEFAULTS)'))
+    if conn.execute(text('SELECT to_regclass(:nome)'), {'nome': PADRAO}).scalar():
+        conn.execute(text(
+            f'WITH movidas AS (DELETE FROM {PADRAO} WHERE data_contato >= :inicio AND data_contato < :fim '
+            f'RETURNING *) INSERT INTO {nome} SELECT * FROM movidas'
+        ), {'inicio': inicio, 'fim': fim})
+    conn.execute(text(
+        f"ALTER TABLE {pai} ATTACH PARTITION {nome} FOR VALUES FROM ('{inicio}') TO ('{fim}')"
+    ))
+
+
+def converter(engine, granularidade='ano', adiante=PERIODOS_ADIANTE, lock_timeout_ms=LOCK_TIMEOUT_MS):
+    """Recria contatos_registrados como tabela particionada, copiando os dados
+
+    Roda numa única transação com a tabela bloqueada (leituras e escritas
+    esperam até o fim da cópia), sem statement_timeout. Retorna as
+    partições criadas e as linhas.
+    """
+    _exigir_postgres(engine)
+    if granularidade not in GRANULARIDADES:
+        raise ParticionamentoInvalido(f'Granularidade inválida: {granularidade}')
+
+    novo = f'{TABELA}_novo'
+    with engine.begin() as conn:
+        sem_limite_de_tempo(conn, lock_timeout_ms)
+        if eh_particionada(conn):
+            raise ParticionamentoInvalido(f'{TABELA} já é particionada')
+
+        conn.execute(text(f'LOCK TABLE {TABELA} IN ACCESS EXCLUSIVE MODE'))
+        parametro = {'tabela': TABELA}
+        chave = conn.execute(text(
+            "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:tabela AS regclass) AND contype = 'p'"
+        ), parametro).scalar() or f'{TABELA}_pkey'
+        restricoes = conn.execute(text(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = CAST(:tabela AS regclass) AND contype IN ('f', 'c')"
+        ), parametro).fetchall()
+        indices = conn.execute(text(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = :tabela AND indexname <> :chave"
+        ), {'tabela': TABELA, 'chave': chave}).fetchall()
+        sequencia = conn.execute(text("SELECT pg_get_serial_sequence(:tabela, 'id')"), parametro).scalar()
+        primeira = conn.execute(text(f'SELECT min(data_contato) FROM {TABELA}')).scalar() or date.today()
+
+        conn.execute(text(
+            f'CREATE TABLE {novo} (LIKE {TABELA} INCLUDING DEFAULTS) PARTITION BY RANGE (data_contato)'
+        ))
+        criadas = []
+        for nome, inicio, fim in periodos(primeira, _limite_adiante(granularidade, adiante), granularidade):
+            conn.execute(text(
+                f"CREATE TABLE {nome} PARTITION OF {novo} FOR VALUES FROM ('{inicio}') TO ('{fim}')"
+            ))
+            criadas.append(nome)
+        conn.execute(text(f'CREATE TABLE {PADRAO} PARTITION OF {novo} DEFAULT'))
+
+        linhas = conn.execute(text(f'INSERT INTO {novo} SELECT * FROM {TABELA}')).rowcount
+
+        # A sequência do id pertence à coluna antiga: desvincular antes do DROP
+        if sequencia:
+            conn.execute(text(f'ALTER SEQUENCE {sequencia} OWNED BY NONE'))
+        conn.execute(text(f'DROP TABLE {TABELA}'))
+        conn.execute(text(f'ALTER TABLE {novo} RENAME TO {TABELA}'))
+        if sequencia:
+            conn.execute(text(f'ALTER SEQUENCE {sequencia} OWNED BY {TABELA}.id'))
+
+        conn.execute(text(f'ALTER TABLE {TABELA} ADD CONSTRAINT {chave} PRIMARY KEY (id, data_contato)'))
+        for nome, definicao in restricoes:
+            conn.execute(text(f'ALTER TABLE {TABELA} ADD CONSTRAINT {nome} {definicao}'))
+        ignorados = []
+        for nome, definicao in indices:
+            # Índice único sem a chave de partição não é permitido na tabela-mãe
+            if definicao.startswith('CREATE UNIQUE') and 'data_contato' not in definicao:
+                ignorados.append(nome)
+                continue
+            conn.execute(text(definicao))
+
+    with engine.begin() as conn:
+        sem_limite_de_tempo(conn)
+        conn.execute(text(f'ANALYZE {TABELA}'))
+
+    return {'particoes': criadas + [PADRAO], 'linhas': linhas, 'indices_ignorados': ignorados}
+
+
+def manter(engine, adiante=PERIODOS_ADIANTE, lock_timeout_ms=LOCK_TIMEOUT_MS):
+    """Cria as partições que faltam até `adiante` períodos à frente
+
+    Também cria as dos períodos passados que estão na partição padrão.
+    Idempotente; sem efeito se a tabela não for particionada. Retorna os
+    nomes das partições criadas.
+    """
+    if engine.dialect.name != 'postgresql':
+        return []
+
+    with engine.begin() as conn:
+        sem_limite_de_tempo(conn, lock_timeout_ms)
+        if not eh_particionada(conn):
+            return []
+        particoes = listar_particoes(conn)
+        granularidade = granularidade_atual(particoes)
+        existentes = {p['inicio'] for p in particoes if p['inicio']}
+        fins = [p['fim'] for p in particoes if p['fim']]
+        inicio = max(fins) if fins else date.today()
+        # Contatos na partição padrão anteriores às faixas ganham partições próprias
+        antigo = conn.execute(text(f'SELECT min(data_contato) FROM {PADRAO}')).scalar()
+        if antigo and antigo < inicio:
+            inicio = antigo
+
+        criadas = []
+        for nome, de, ate in periodos(inicio, _limite_adiante(granularidade, adiante), granularidade):
+            if de in existentes:
+                continue
+            _criar_particao(conn, nome, de, ate)
+            criadas.append(nome)
+    return criadas
+
+
+def arquivar(engine, antes_de, modo='desanexar', lock_timeout_ms=LOCK_TIMEOUT_MS):
+    """Tira das consultas as partições que terminam até `antes_de`
+
+    desanexar: DETACH PARTITION e renomeia para arquivo_<partição>, sem as
+    chaves estrangeiras; os dados continuam no banco, fora das consultas.
+    comprimir: move as linhas para contatos_arquivados (mês a mês) e
+    descarta a partição.
+    """
+    _exigir_postgres(engine)
+    if modo not in MODOS_ARQUIVO:
+        raise ParticionamentoInvalido(f'Modo de arquivamento inválido: {modo}')
+
+    arquivadas = []
+    with engine.begin() as conn:
+        sem_limite_de_tempo(conn, lock_timeout_ms)
+        if not eh_particionada(conn):
+            raise ParticionamentoInvalido(f'{TABELA} não é particionada')
+
+        for particao in listar_particoes(conn):
+            if particao['fim'] is None or particao['fim'] > antes_de:
+                continue
+            nome = particao['nome']
+            conn.execute(text(f'ALTER TABLE {TABELA} DETACH PARTITION {nome}'))
+
+            if modo == 'desanexar':
+                # Histórico: a tabela desanexada não pode impedir a exclusão de clientes
+                for (restricao,) in conn.execute(text(
+                    "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:nome AS regclass) AND contype = 'f'"
+                ), {'nome': nome}).fetchall():
+                    conn.execute(text(f'ALTER TABLE {nome} DROP CONSTRAINT {restricao}'))
+                conn.execute(text(f'ALTER TABLE {nome} RENAME TO arquivo_{nome}'))
+                linhas = conn.execute(text(f'SELECT count(*) FROM arquivo_{nome}')).scalar()
+            else:
+                linhas = 0
+                mes = particao['inicio']
+                while mes < particao['fim']:
+                    seguinte = proximo_mes(mes)
+                    contatos = conn.execute(text(
+                        f"SELECT {', '.join(COLUNAS)} FROM {nome} "
+                        f"WHERE data_contato >= :inicio AND data_contato < :fim ORDER BY id"
+                    ), {'inicio': mes, 'fim': seguinte}).mappings().all()
+                    linhas += sum(arquivar_linhas(conn, contatos).values())
+                    mes = seguinte
+                conn.execute(text(f'DROP TABLE {nome}'))
+
+            arquivadas.append({'particao': nome, 'linhas': linhas})
+    return arquivadas
@@ -0,0 +1,237 @@
+"""
+Perfilamento sob demanda de requisições (flame graphs)
+
+Um amostrador estatístico em thread separada lê a pilha da thread da
+requisição (sys._current_frames) a cada PERFIL_INTERVALO_MS e conta as
+pilhas. O perfil é gravado em PERFIL_DIRETORIO (compartilhado entre os
+workers) e pode ser baixado em GET /api/sistema/perfis/<id> no formato
+speedscope (https://www.speedscope.app) ou collapsed (flamegraph.pl).
+
+Uma requisição é perfilada quando:
+- traz o cabeçalho X-Perfil: 1 ou o parâmetro ?_perfil=1 e o token é de
+  um usuário master (outros usuários são ignorados); ou
+- é sorteada pela amostragem PERFIL_AMOSTRAGEM (fração, 0 desliga).
+
+A resposta perfilada traz o cabeçalho X-Perfil-Id. Com o modo desligado o
+custo é só a verificação do cabeçalho e da fração no before_request.
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from flask import g, request
+
+CABECALHO = 'X-Perfil'
+PARAMETRO = '_perfil'
+
+# Ids gerados por _novo_id (evita caminhos arbitrários no download)
+_ID_VALIDO = re.compile(r'^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$')
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def perfil_solicitado(cabecalhos, args):
+    """Cabeçalho X-Perfil ou ?_perfil= com valor verdadeiro"""
+    valor = cabecalhos.get(CABECALHO) or args.get(PARAMETRO)
+    return bool(valor) and valor.lower() in ('1', 'true', 'sim', 'yes')
+
+
+def _nome_quadro(codigo):
+    arquivo = codigo.co_filename
+    if arquivo.startswith(RAIZ_PROJETO):
+        arquivo = os.path.relpath(arquivo, RAIZ_PROJETO)
+    else:
+        # Bibliotecas: a partir de site-packages (ou só o nome do arquivo)
+        partes = arquivo.split('site-packages' + os.sep, 1)
+        arquivo = partes[1] if len(partes) == 2 else os.path.basename(arquivo)
+    return f'{codigo.co_name} ({arquivo}:{codigo.co_firstlineno})'
+
+
+class Amostrador(threading.Thread):
+    """Conta as pilhas de uma thread em intervalos regulares"""
+
+    def __init__(self, thread_id, intervalo_ms):
+        super().__init__(name='crm-perfil', daemon=True)
+        self.thread_id = thread_id
+        self.intervalo = intervalo_ms / 1000
+        self.pilhas = Counter()
+        self.amostras = 0
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            quadro = sys._current_frames().get(self.thread_id)
+            pilha = []
+            while quadro is not None:
+                pilha.append(_nome_quadro(quadro.f_code))
+                quadro = quadro.f_back
+            if pilha:
+                self.pilhas[';'.join(reversed(pilha))] += 1
+                self.amostras += 1
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+
+def _novo_id():
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def salvar_perfil(diretorio, perfil, maximo):
+    """Grava o perfil (JSON) e remove os mais antigos além de `maximo`"""
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = os.path.join(diretorio, f"{perfil['id']}.json")
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(perfil, f, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+    arquivos = sorted(n for n in os.listdir(diretorio) if n.endswith('.json'))
+    for nome in arquivos[:-maximo] if maximo else []:
+        try:
+            os.remove(os.path.join(diretorio, nome))
+        except OSError:
+            pass
+
+
+def carregar_perfil(diretorio, perfil_id):
+    """Perfil gravado ou None (id inválido ou inexistente)"""
+    if not _ID_VALIDO.match(perfil_id):
+        return None
+    try:
+        with open(os.path.join(diretorio, f'{perfil_id}.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def listar_perfis(diretorio):
+    """Metadados dos perfis gravados, do mais recente ao mais antigo"""
+    if not os.path.isdir(diretorio):
+        return []
+    perfis = []
+    for nome in sorted(os.listdir(diretorio), reverse=True):
+        if nome.endswith('.json'):
+            perfil = carregar_perfil(diretorio, nome[:-5])
+            if perfil:
+                perfil.pop('pilhas', None)
+                perfis.append(perfil)
+    return perfis
+
+
+def formato_collapsed(perfil):
+    """Uma linha por pilha: 'quadro;quadro;quadro contagem' (flamegraph.pl)"""
+    return ''.join(f'{pilha} {contagem}\n' for pilha, contagem in perfil['pilhas'].items())
+
+
+def formato_speedscope(perfil):
+    """Perfil 'sampled' no formato de arquivo do speedscope"""
+    quadros, indices = [], {}
+    amostras, pesos = [], []
+    for pilha, contagem in perfil['pilhas'].items():
+        amostra = []
+        for nome in pilha.split(';'):
+            if nome not in indices:
+                indices[nome] = len(quadros)
+                funcao, _, local = nome.partition(' (')
+                arquivo, _, linha = local.rstrip(')').rpartition(':')
+                quadros.append({'name': funcao, 'file': arquivo, 'line': int(linha) if linha.isdigit() else None})
+            amostra.append(indices[nome])
+        amostras.append(amostra)
+        pesos.append(contagem * perfil['intervalo_ms'])
+
+    titulo = f"{perfil['metodo']} {perfil['rota']} ({perfil['id']})"
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': titulo,
+        'exporter': 'crm',
+        'shared': {'frames': quadros},
+        'profiles': [{
+            'type': 'sampled',
+            'name': titulo,
+            'unit': 'milliseconds',
+            'startValue': 0,
+            'endValue': sum(pesos),
+            'samples': amostras,
+            'weights': pesos
+        }]
+    }
+
+
+def _usuario_master():
+    """Token do cabeçalho Authorization pertence a um master ativo?"""
+    from src.auth import decode_token
+    from src.models.user import db, User
+
+    partes = request.headers.get('Authorization', '').split(' ')
+    payload = decode_token(partes[1]) if len(partes) == 2 else None
+    if not payload:
+        return False
+    usuario = db.session.get(User, payload['user_id'])
+    return bool(usuario and usuario.ativo and usuario.is_master())
+
+
+def init_perfilamento(app):
+    """Registra os hooks que iniciam e gravam o perfil da requisição"""
+
+    @app.before_request
+    def iniciar_perfil():
+        taxa = app.config.get('PERFIL_AMOSTRAGEM', 0.0)
+        if perfil_solicitado(request.headers, request.args):
+            if not _usuario_master():
+                return
+            origem = 'solicitado'
+        elif taxa and random.random() < taxa:
+            origem = 'amostragem'
+        else:
+            return
+
+        amostrador = Amostrador(threading.get_ident(), app.config.get('PERFIL_INTERVALO_MS', 2))
+        g.perfil = (amostrador, origem, time.perf_counter())
+        amostrador.start()
+
+    def finalizar(status):
+        amostrador, origem, inicio = g.pop('perfil')
+        amostrador.parar()
+        perfil = {
+            'id': _novo_id(),
+            'criado_em': datetime.now().isoformat(timespec='seconds'),
+            'pid': os.getpid(),
+            'origem': origem,
+            'metodo': request.method,
+            'rota': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': status,
+            'duracao_ms': round((time.perf_counter() - inicio) * 1000, 1),
+            'intervalo_ms': amostrador.intervalo * 1000,
+            'amostras': amostrador.amostras,
+            'pilhas': dict(amostrador.pilhas)
+        }
+        try:
+            salvar_perfil(app.config['PERFIL_DIRETORIO'], perfil, app.config.get('PERFIL_MAXIMO', 100))
+        except OSError as e:
+            print(f"Erro ao gravar perfil: {e}")
+            return None
+        return perfil['id']
+
+    @app.after_request
+    def gravar_perfil(response):
+        if 'perfil' in g:
+            perfil_id = finalizar(response.status_code)
+            if perfil_id:
+                response.headers['X-Perfil-Id'] = perfil_id
+        return response
+
+    @app.teardown_request
+    def descartar_perfil(exc):
+        # Exceção não tratada: after_request não roda, grava o que houver
+        if 'perfil' in g:
+            finalizar(500)
@@ -0,0 +1,97 @@
+"""
+Instrumentação do pool de conexões do SQLAlchemy
+
+QueuePoolInstrumentado mede o tempo de cada checkout (espera na fila do
+pool + pre-ping, quando habilitado) e acumula num histograma por processo.
+estatisticas_pool() junta esse histograma com o estado atual do pool.
+"""
+
+import threading
+import time
+from sqlalchemy.pool import QueuePool
+from src.metricas import pool_espera
+
+# Limites superiores dos buckets do histograma, em milissegundos
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class HistogramaEspera:
+    """Histograma acumulado do tempo de checkout de conexões"""
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.resetar()
+
+    def resetar(self):
+        with self._lock:
+            self.contagens = [0] * (len(self.buckets) + 1)
+            self.total = 0
+            self.soma_ms = 0.0
+            self.max_ms = 0.0
+
+    def registrar(self, duracao_ms):
+        indice = len(self.buckets)
+        for i, limite in enumerate(self.buckets):
+            if duracao_ms <= limite:
+                indice = i
+                break
+        with self._lock:
+            self.contagens[indice] += 1
+            self.total += 1
+            self.soma_ms += duracao_ms
+            if duracao_ms > self.max_ms:
+                self.max_ms = duracao_ms
+
+    def to_dict(self):
+        with self._lock:
+            limites = list(self.buckets) + [None]  # None = acima do último limite
+            return {
+                'total': self.total,
+                'media_ms': round(self.soma_ms / self.total, 3) if self.total else 0.0,
+                'max_ms': round(self.max_ms, 3),
+                'buckets': [
+                    {'ate_ms': limite, 'count': count}
+                    for limite, count in zip(limites, self.contagens)
+                ]
+            }
+
+
+espera_checkout = HistogramaEspera()
+
+
+class QueuePoolInstrumentado(QueuePool):
+    """QueuePool que registra o tempo de cada checkout"""
+
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            duracao = time.perf_counter() - inicio
+            espera_checkout.registrar(duracao * 1000)
+            pool_espera.observe(duracao)
+
+
+def estatisticas_pool(engine):
+    """Retorna o estado atual do pool do engine e o histograma de espera"""
+    pool = engine.pool
+    dados = {
+        'classe': type(pool).__name__,
+        'status': pool.status()
+    }
+
+    if isinstance(pool, QueuePool):
+        dados.update({
+            'pool_size': pool.size(),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0)
+        })
+
+    if isinstance(pool, QueuePoolInstrumentado):
+        dados['espera_checkout'] = espera_checkout.to_dict()
+
+    return dados
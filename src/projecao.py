@@ -0,0 +1,175 @@
+"""
+Projeção dos próximos contatos planejados de cada cliente
+
+A partir da cobertura (src/cobertura.py), as próximas K datas de contato
+de todos os clientes são calculadas de uma vez, em colunas:
+
+- 1ª data: o vencimento pela cadência da classe; se já venceu (ou o
+  cliente nunca teve contato), o primeiro dia útil a partir de hoje
+- seguintes: data anterior + cadência da classe, levada ao próximo dia
+  útil (mesma regra de calcular_proximo_contato)
+
+com np.busday_offset sobre um np.busdaycalendar com os feriados do
+registro. Para planejamento de capacidade, as datas são somadas por
+consultor e semana (segunda a domingo) numa janela de datas.
+
+O resultado fica em memória por (cobertura, K): a cobertura muda junto com
+a versão dos feriados (registro de referências), com o snapshot de
+clientes e contatos e com o dia.
+"""
+
+import threading
+from datetime import date, timedelta
+import numpy as np
+from src.referencias import obter_registro
+from src.metricas import registrar_cache
+from src import analitico, cobertura as cobertura_
+
+# Até quantas datas por cliente e até onde a janela pode ir
+MAX_K = 120
+MAX_JANELA_DIAS = 730
+# 1970-01-05 (dia 4 desde a época) é uma segunda-feira
+SEGUNDA = 4
+# Projeções guardadas (valores de k distintos) para a cobertura atual
+MAX_PROJECOES = 3
+# Dimensões de consultor aceitas na agregação
+AGRUPAMENTOS = ('consultor', 'consultor_servicos')
+
+
+class Projecao:
+    def __init__(self, cobertura, datas):
+        self.cobertura = cobertura
+        self.datas = datas  # int32 (clientes × K), dias desde 1970-01-01
+
+
+def projetar(cobertura, feriados, k):
+    """Próximas k datas de contato de todos os clientes do snapshot"""
+    if not 1 <= k <= MAX_K:
+        raise analitico.ParametroInvalido(f'k deve estar entre 1 e {MAX_K}')
+    calendario = np.busdaycalendar(holidays=np.array(feriados, dtype='datetime64[D]'))
+    hoje = np.busday_offset(np.datetime64(cobertura.hoje, 'D'), 0, roll='forward', busdaycal=calendario)
+    hoje = int((hoje - np.datetime64(0, 'D')).astype(np.int32))
+
+    # Vencidos e sem contato: primeiro dia útil a partir de hoje
+    primeira = np.where(cobertura.situacao == cobertura_.EM_DIA, cobertura.vencimento, hoje).astype(np.int32)
+    datas = np.empty((len(primeira), k), dtype=np.int32)
+    datas[:, 0] = primeira
+    cadencia = cobertura.cadencia
+    for i in range(1, k):
+        proxima = np.busday_offset((datas[:, i - 1] + cadencia).astype('datetime64[D]'), 0, roll='forward', busdaycal=calendario)
+        datas[:, i] = (proxima - np.datetime64(0, 'D')).astype(np.int32)
+    return Projecao(cobertura, datas)
+
+
+_lock = threading.Lock()
+_projecoes = {}  # {k: Projecao}, da cobertura atual
+
+
+def obter_projecao(k):
+    """Projeção com k datas, recalculada quando a cobertura (feriados, snapshot, dia) muda"""
+    atual = cobertura_.obter_cobertura()
+    projecao = _projecoes.get(k)
+    acerto = projecao is not None and projecao.cobertura is atual
+    registrar_cache('projecao', acerto)
+    if acerto:
+        return projecao
+
+    projecao = projetar(atual, obter_registro().feriados, k)
+    with _lock:
+        if any(p.cobertura is not atual for p in _projecoes.values()):
+            _projecoes.clear()
+        while len(_projecoes) >= MAX_PROJECOES:
+            _projecoes.pop(next(iter(_projecoes)))
+        _projecoes[k] = projecao
+    return projecao
+
+
+def _dia(valor):
+    return valor.toordinal() - analitico.EPOCA
+
+
+def k_para_janela(cobertura, fim):
+    """Quantas datas por cliente cobrem a janela até `fim` para a menor cadência
+
+    Arredondado para múltiplos de 8, para janelas parecidas usarem a mesma projeção.
+    """
+    dias = (fim - cobertura.hoje).days
+    if dias > MAX_JANELA_DIAS:
+        raise analitico.ParametroInvalido(f'a janela vai no máximo {MAX_JANELA_DIAS} dias além de hoje')
+    clientes = cobertura.cadencia[1:]
+    menor = int(clientes.min()) if len(clientes) else 1
+    # +2: a 1ª data pode ser hoje e o ajuste a dia útil só adia as seguintes
+    necessario = max(1, dias // max(menor, 1) + 2)
+    return min(MAX_K, -(-necessario // 8) * 8)
+
+
+def janela_padrao(hoje, semanas=13):
+    """Da segunda-feira desta semana até o domingo de `semanas` semanas depois"""
+    inicio = hoje - timedelta(days=hoje.weekday())
+    return inicio, inicio + timedelta(weeks=semanas, days=-1)
+
+
+def por_semana(projecao, inicio, fim, por='consultor', filtros=None):
+    """Contatos projetados por consultor e semana na janela [inicio, fim]
+
+    Retorna {'semanas': [segundas-feiras], 'linhas': [{por, 'semanas': {...}, 'total'}],
+    'totais': {segunda: n}}. Não há datas projetadas antes de hoje: `inicio` anterior
+    à semana corrente é trazido para a segunda-feira desta semana.
+    """
+    if por not in AGRUPAMENTOS:
+        raise analitico.ParametroInvalido(f'agrupamento desconhecido: {por}')
+    if fim < inicio:
+        raise analitico.ParametroInvalido('data_fim anterior a data_inicio')
+    cobertura = projecao.cobertura
+    inicio = max(inicio, janela_padrao(cobertura.hoje)[0])
+    if fim < inicio:
+        raise analitico.ParametroInvalido('data_fim anterior à semana corrente')
+    if (fim - inicio).days > MAX_JANELA_DIAS:
+        raise analitico.ParametroInvalido(f'a janela vai no máximo {MAX_JANELA_DIAS} dias')
+    snapshot = cobertura.snapshot
+    posicoes = cobertura_.selecionar(cobertura, filtros)
+
+    datas = projecao.datas[posicoes]
+    grupos = np.repeat(snapshot.clientes[por][posicoes], datas.shape[1])
+    datas = datas.ravel()
+    dentro = (datas >= _dia(inicio)) & (datas <= _dia(fim))
+    datas, grupos = datas[dentro], grupos[dentro]
+
+    primeira_semana = (_dia(inicio) - SEGUNDA) // 7
+    semanas = (_dia(fim) - SEGUNDA) // 7 - primeira_semana + 1
+    valores = snapshot.categorias['consultor'].valores
+    chave = grupos.astype(np.int64) * semanas + ((datas - SEGUNDA) // 7 - primeira_semana)
+    contagem = np.bincount(chave, minlength=len(valores) * semanas).reshape(len(valores), semanas)
+
+    rotulos = [
+        date.fromordinal((primeira_semana + s) * 7 + SEGUNDA + analitico.EPOCA).isoformat()
+        for s in range(semanas)
+    ]
+    linhas = []
+    for g in np.flatnonzero(contagem.sum(axis=1)).tolist():
+        linha = contagem[g].tolist()
+        linhas.append({
+            por: valores[g] or None,
+            'semanas': dict(zip(rotulos, linha)),
+            'total': sum(linha),
+        })
+    linhas.sort(key=lambda l: (-l['total'], l[por] or ''))
+    return {
+        'semanas': rotulos,
+        'linhas': linhas,
+        'totais': dict(zip(rotulos, contagem.sum(axis=0).tolist())),
+    }
+
+
+def ordenar_por_proxima(projecao, posicoes):
+    """Posições pela primeira data projetada; desempate pelo id do cliente"""
+    ids = projecao.cobertura.snapshot.clientes['ids'][posicoes]
+    return posicoes[np.lexsort((ids, projecao.datas[posicoes, 0]))]
+
+
+def datas_dos_clientes(projecao, posicoes):
+    """{posição: [datas ISO]} de uma página de clientes"""
+    return {
+        p: [date.fromordinal(d + analitico.EPOCA).isoformat() for d in projecao.datas[p].tolist()]
+        for p in posicoes.tolist()
+    }
@@ -0,0 +1,187 @@
+"""
+Dados de referência lidos com frequência e alterados raramente
+
+Dois níveis, ambos imutáveis e por processo. Com o Gunicorn em modo
+--preload são carregados no processo master antes do fork
+(gunicorn.conf.py) e compartilhados copy-on-write pelos workers.
+
+Registro (tipos e resultados de contato, feriados): codificado como
+dicionário, com tuplas alinhadas id -> código -> descrição e mapas
+inversos, e os feriados numa tupla ordenada. Qualquer alteração dessas
+tabelas incrementa a linha de versoes_referencia (eventos em
+src/models/contato.py); cada processo confere essa versão no máximo a
+cada REFERENCIAS_VERIFICAR_SEGUNDOS e só recarrega quando ela muda.
+
+Snapshot (filiais e vendedores, derivados de clientes e contatos): é
+descartado quando os domínios 'clientes' ou 'contatos' são invalidados
+neste processo e, nos demais workers, expira após REFERENCIAS_TTL
+segundos.
+"""
+
+import bisect
+import hashlib
+import json
+import threading
+import time
+from collections import namedtuple
+from flask import current_app
+from sqlalchemy import select
+from src.models.user import db
+from src.models.cliente import Cliente
+from src.models.contato import (
+    ContatoRegistrado, TipoContato, ResultadoContato, Feriado, VersaoReferencia, VERSAO_REFERENCIAS
+)
+from src.cache import registrar_invalidador
+from src.metricas import registrar_cache
+
+Dicionario = namedtuple('Dicionario', [
+    'ids',            # tuple de ids em ordem crescente
+    'codigos',        # tuple alinhada a ids
+    'descricoes',     # tuple alinhada a ids
+    'ativos',         # tuple de bool alinhada a ids
+    'posicoes',       # {id: posição nas tuplas}
+    'por_codigo',     # {código: id}
+    'por_descricao',  # {descrição: id}, preferindo o ativo e o menor id
+    'lista',          # tuple de dicts (to_dict) dos ativos, servida pela API
+    'etag'            # hash de `lista`
+])
+
+Registro = namedtuple('Registro', [
+    'tipos',        # Dicionario de TipoContato
+    'resultados',   # Dicionario de ResultadoContato
+    'feriados',     # tuple ordenada de datas
+    'versao'        # versoes_referencia.versao lida antes da carga
+])
+
+Referencias = namedtuple('Referencias', [
+    'filiais',      # tuple ordenada
+    'vendedores',   # tuple ordenada
+    'carregado_em'  # time.monotonic() da carga
+])
+
+_lock = threading.Lock()
+_registro = None
+_verificado_em = 0.0
+_snapshot = None
+
+
+def _dicionario(modelo):
+    linhas = db.session.execute(
+        select(modelo.id, modelo.codigo, modelo.descricao, modelo.ativo).order_by(modelo.id)
+    ).all()
+    ids, codigos, descricoes, ativos = (tuple(coluna) for coluna in zip(*linhas)) if linhas else ((),) * 4
+    ativos = tuple(bool(a) if a is not None else True for a in ativos)
+
+    por_descricao = {}
+    # Ativos primeiro; entre iguais, o menor id (mesma regra de id_por_descricao)
+    for posicao in sorted(range(len(ids)), key=lambda p: (not ativos[p], ids[p])):
+        por_descricao.setdefault(descricoes[posicao], ids[posicao])
+
+    lista = tuple(
+        {'id': ids[p], 'codigo': codigos[p], 'descricao': descricoes[p], 'ativo': True}
+        for p in range(len(ids)) if ativos[p]
+    )
+    etag = hashlib.sha1(json.dumps(lista, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+    return Dicionario(
+        ids, codigos, descricoes, ativos,
+        {id_: p for p, id_ in enumerate(ids)},
+        dict(zip(codigos, ids)),
+        por_descricao, lista, etag
+    )
+
+
+def _versao_no_banco():
+    versao = db.session.execute(
+        select(VersaoReferencia.versao).where(VersaoReferencia.nome == VERSAO_REFERENCIAS)
+    ).scalar()
+    return versao or 0
+
+
+def carregar_registro():
+    """Lê tipos, resultados e feriados e substitui o registro do processo"""
+    global _registro, _verificado_em
+
+    # A versão é lida antes: uma alteração durante a carga força nova carga
+    versao = _versao_no_banco()
+    registro = Registro(
+        _dicionario(TipoContato),
+        _dicionario(ResultadoContato),
+        tuple(sorted(data for (data,) in db.session.query(Feriado.data))),
+        versao
+    )
+    with _lock:
+        _registro = registro
+        _verificado_em = time.monotonic()
+    return registro
+
+
+def obter_registro():
+    """Retorna o registro atual, conferindo a versão no banco a cada N segundos"""
+    global _verificado_em
+
+    registro = _registro
+    if registro is None:
+        registrar_cache('referencias_registro', False)
+        return carregar_registro()
+
+    intervalo = current_app.config.get('REFERENCIAS_VERIFICAR_SEGUNDOS', 5)
+    if time.monotonic() - _verificado_em < intervalo:
+        registrar_cache('referencias_registro', True)
+        return registro
+
+    versao = _versao_no_banco()
+    acerto = versao == registro.versao
+    registrar_cache('referencias_registro', acerto)
+    if not acerto:
+        return carregar_registro()
+    _verificado_em = time.monotonic()
+    return registro
+
+
+def descricao(dicionario, id_):
+    """Descrição do id no Dicionario (None se não existir)"""
+    posicao = dicionario.posicoes.get(id_)
+    return None if posicao is None else dicionario.descricoes[posicao]
+
+
+def eh_feriado(feriados, data):
+    """Busca binária na tupla ordenada de feriados"""
+    posicao = bisect.bisect_left(feriados, data)
+    return posicao < len(feriados) and feriados[posicao] == data
+
+
+def carregar_referencias():
+    """Lê filiais e vendedores e substitui o snapshot do processo"""
+    global _snapshot
+
+    filiais = tuple(sorted(f for (f,) in db.session.query(Cliente.filial).distinct() if f))
+    vendedores = tuple(sorted(
+        v for (v,) in db.session.query(ContatoRegistrado.vendedor).distinct() if v
+    ))
+
+    snapshot = Referencias(filiais, vendedores, time.monotonic())
+    with _lock:
+        _snapshot = snapshot
+    return snapshot
+
+
+def obter_referencias():
+    """Retorna o snapshot atual, recarregando se ausente ou expirado"""
+    snapshot = _snapshot
+    ttl = current_app.config.get('REFERENCIAS_TTL', 300)
+    acerto = snapshot is not None and time.monotonic() - snapshot.carregado_em <= ttl
+    registrar_cache('referencias', acerto)
+    if not acerto:
+        snapshot = carregar_referencias()
+    return snapshot
+
+
+def descartar_referencias():
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+
+registrar_invalidador('clientes', descartar_referencias)
+registrar_invalidador('contatos', descartar_referencias)
@@ -0,0 +1,106 @@
+"""
+Roteamento de leituras para réplica do banco
+
+Quando DATABASE_REPLICA_URL está configurada, os endpoints marcados com
+@somente_leitura executam suas consultas na réplica (bind 'replica').
+Escritas (flush, UPDATE/DELETE em lote) sempre vão para o primário.
+
+- Fallback: a réplica é testada com um SELECT 1 no máximo a cada
+  REPLICA_CHECK_INTERVAL segundos; se falhar, as leituras voltam para o
+  primário até a próxima verificação.
+- Read-your-writes: toda escrita bem-sucedida grava um cookie de curta
+  duração; enquanto ele existir, as leituras daquele navegador vão para o
+  primário, mesmo que a réplica ainda não tenha recebido a alteração.
+  POSTs marcados com @somente_leitura (ex.: consultas em lote) não contam
+  como escrita.
+"""
+
+import threading
+import time
+from functools import wraps
+import sqlalchemy as sa
+from flask import g, request, current_app, has_app_context
+from flask_sqlalchemy.session import Session
+
+BIND_REPLICA = 'replica'
+COOKIE_ESCRITA = 'crm_escrita_recente'
+METODOS_ESCRITA = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+_lock = threading.Lock()
+_estado = {'verificado_em': 0.0, 'disponivel': False}
+
+
+class SessionRoteada(Session):
+    """Session que envia as leituras de endpoints somente leitura para a réplica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and not isinstance(clause, sa.UpdateBase)
+            and has_app_context()
+            and g.get('ler_da_replica', False)
+        ):
+            return self._db.engines[BIND_REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def replica_configurada():
+    return BIND_REPLICA in current_app.extensions['sqlalchemy'].engines
+
+
+def _replica_disponivel():
+    """Verifica (com cache) se a réplica responde"""
+    intervalo = current_app.config.get('REPLICA_CHECK_INTERVAL', 30)
+    agora = time.monotonic()
+
+    with _lock:
+        if agora - _estado['verificado_em'] < intervalo:
+            return _estado['disponivel']
+        _estado['verificado_em'] = agora
+
+    try:
+        engine = current_app.extensions['sqlalchemy'].engines[BIND_REPLICA]
+        with engine.connect() as conn:
+            conn.execute(sa.text('SELECT 1'))
+        disponivel = True
+    except Exception as e:
+        print(f"Réplica indisponível, usando primário: {e}")
+        disponivel = False
+
+    _estado['disponivel'] = disponivel
+    return disponivel
+
+
+def somente_leitura(f):
+    """Decorator para endpoints que só leem dados (podem usar a réplica)"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        g.ler_da_replica = (
+            replica_configurada()
+            and not request.cookies.get(COOKIE_ESCRITA)
+            and _replica_disponivel()
+        )
+        return f(*args, **kwargs)
+
+    return decorated
+
+
+def init_replica(app):
+    """Registra o hook que marca escritas recentes (read-your-writes)"""
+
+    @app.after_request
+    def marcar_escrita_recente(response):
+        if (
+            request.method in METODOS_ESCRITA
+            and response.status_code < 400
+            and 'ler_da_replica' not in g
+            and app.config.get('SQLALCHEMY_BINDS', {}).get(BIND_REPLICA)
+        ):
+            response.set_cookie(
+                COOKIE_ESCRITA, '1',
+                max_age=app.config.get('REPLICA_READ_YOUR_WRITES_SECONDS', 10),
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
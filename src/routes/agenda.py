@@ -1,13 +1,15 @@
 from flask import Blueprint, jsonify
-from models.user import db
-from models.cliente import Cliente
-from models.contato import ContatoRegistrado
+from src.models.user import db
+from src.models.cliente import Cliente
+from src.models.contato import ContatoRegistrado
+from src.replica import somente_leitura
 from datetime import datetime, timedelta
 from sqlalchemy import func
 
 agenda_bp = Blueprint('agenda', __name__)
 
 @agenda_bp.route('/agenda/grouped', methods=['GET'])
+@somente_leitura
 def get_agenda_grouped():
     """Listar contatos agendados agrupados por status"""
     try:
@@ -67,6 +69,7 @@ def get_agenda_grouped():
         }), 500
 
 @agenda_bp.route('/agenda/stats', methods=['GET'])
+@somente_leitura
 def get_agenda_stats():
     """Estatísticas da agenda"""
     try:
@@ -117,6 +120,7 @@ def get_agenda_stats():
 
 
 @agenda_bp.route('/agenda/notifications', methods=['GET'])
+@somente_leitura
 def get_notifications():
     """Obter notificações de contatos agendados"""
     try:
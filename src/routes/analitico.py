@@ -0,0 +1,227 @@
+from flask import Blueprint, jsonify, request
+from datetime import datetime
+from sqlalchemy import select
+from src.models.user import db
+from src.models.cliente import Cliente
+from src.auth import token_required
+from src.replica import somente_leitura
+from src.consultas import parametros_paginacao, paginacao
+
+analitico_bp = Blueprint('analitico', __name__)
+
+# Dimensões que aceitam filtro por valor (?filial=X&filial=Y)
+FILTROS = ('filial', 'classe', 'consultor', 'consultor_servicos', 'vendedor', 'tipo_contato', 'resultado_contato')
+FILTROS_COBERTURA = ('filial', 'classe', 'consultor', 'consultor_servicos', 'situacao')
+
+
+def _data(nome):
+    valor = request.args.get(nome)
+    if not valor:
+        return None
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'{nome} deve estar no formato AAAA-MM-DD')
+
+
+@analitico_bp.route('/analytics/pivot', methods=['GET'])
+@token_required
+@somente_leitura
+def get_pivot(current_user):
+    """Contagem de contatos (ou clientes distintos) por combinação de dimensões
+
+    ?dimensoes=filial,classe,mes&medida=contatos|clientes&data_inicio=&data_fim=&limite=
+    """
+    from src import analitico
+
+    try:
+        dimensoes = [d.strip() for d in request.args.get('dimensoes', '').split(',') if d.strip()]
+        if not dimensoes:
+            return jsonify({'success': False, 'message': 'Informe "dimensoes"'}), 400
+        filtros = {
+            'data_inicio': _data('data_inicio'),
+            'data_fim': _data('data_fim'),
+        }
+        for dimensao in FILTROS:
+            valores = request.args.getlist(dimensao)
+            if valores:
+                filtros[dimensao] = valores
+
+        snapshot = analitico.obter_snapshot()
+        resultado = analitico.pivot(
+            snapshot, dimensoes,
+            medida=request.args.get('medida', 'contatos'),
+            filtros=filtros,
+            limite=request.args.get('limite', 10000, type=int)
+        )
+        resultado['snapshot'] = {
+            'clientes': len(snapshot.clientes['ids']) - 1,
+            'contatos': len(snapshot.contatos),
+            'arquivados': len(snapshot.arquivados),
+            'atualizado_em': snapshot.atualizado_em.isoformat(),
+        }
+        return jsonify({'success': True, 'data': resultado})
+
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erro ao calcular pivot: {str(e)}'
+        }), 500
+
+
+def _com_nomes(linhas):
+    """Acrescenta nome e código às linhas (uma consulta, só da página)"""
+    nomes = {
+        id_: (nome, codigo) for id_, nome, codigo in db.session.execute(
+            select(Cliente.id, Cliente.nome, Cliente.cod_cliente).where(Cliente.id.in_([l['id'] for l in linhas]))
+        )
+    } if linhas else {}
+    for linha in linhas:
+        linha['nome'], linha['cod_cliente'] = nomes.get(linha['id'], (None, None))
+    return linhas
+
+
+def _filtros_cobertura():
+    return {nome: request.args.getlist(nome) for nome in FILTROS_COBERTURA if request.args.getlist(nome)}
+
+
+@analitico_bp.route('/analytics/coverage', methods=['GET'])
+@token_required
+@somente_leitura
+def get_cobertura(current_user):
+    """Clientes com último contato, vencimento e dias úteis de atraso na cadência da classe
+
+    ?situacao=atrasado&consultor=X&sort=dias_atraso|ultimo_contato|vencimento|cadencia_dias&order=desc&page=&per_page=
+    """
+    from src import cobertura
+
+    try:
+        page, per_page, pagina, por_pagina = parametros_paginacao(request.args)
+        atual = cobertura.obter_cobertura()
+        posicoes = cobertura.selecionar(atual, _filtros_cobertura())
+        ordenadas = cobertura.ordenar(
+            atual, posicoes,
+            request.args.get('sort', 'dias_atraso'),
+            request.args.get('order', 'desc') != 'asc'
+        )
+        linhas = cobertura.linhas(atual, ordenadas[(pagina - 1) * por_pagina:pagina * por_pagina])
+
+        _com_nomes(linhas)
+
+        return jsonify({
+            'success': True,
+            'data': linhas,
+            'pagination': paginacao(page, per_page, por_pagina, len(posicoes)),
+            'resumo': dict(cobertura.totais(atual, posicoes), data_referencia=atual.hoje.isoformat())
+        })
+
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erro ao calcular cobertura: {str(e)}'
+        }), 500
+
+
+@analitico_bp.route('/analytics/coverage/summary', methods=['GET'])
+@token_required
+@somente_leitura
+def get_cobertura_resumo(current_user):
+    """Cobertura % por consultor, consultor_servicos, filial ou classe (?por=), pior primeiro"""
+    from src import cobertura
+
+    try:
+        atual = cobertura.obter_cobertura()
+        posicoes = cobertura.selecionar(atual, _filtros_cobertura())
+        return jsonify({
+            'success': True,
+            'data': cobertura.resumo(atual, request.args.get('por', 'consultor'), posicoes),
+            'resumo': dict(cobertura.totais(atual, posicoes), data_referencia=atual.hoje.isoformat())
+        })
+
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erro ao calcular cobertura: {str(e)}'
+        }), 500
+
+
+@analitico_bp.route('/analytics/projection', methods=['GET'])
+@token_required
+@somente_leitura
+def get_projecao(current_user):
+    """Contatos planejados por consultor e semana (cadência da classe, dias úteis)
+
+    ?data_inicio=&data_fim= (padrão: 13 semanas a partir desta) ou ?semanas=,
+    ?por=consultor|consultor_servicos e os filtros de /analytics/coverage
+    """
+    from src import cobertura, projecao
+
+    try:
+        atual = cobertura.obter_cobertura()
+        inicio, fim = projecao.janela_padrao(atual.hoje, request.args.get('semanas', 13, type=int))
+        inicio = _data('data_inicio') or inicio
+        fim = _data('data_fim') or fim
+
+        projetada = projecao.obter_projecao(projecao.k_para_janela(atual, fim))
+        resultado = projecao.por_semana(
+            projetada, inicio, fim, request.args.get('por', 'consultor'), _filtros_cobertura()
+        )
+        resultado.update({
+            'data_inicio': inicio.isoformat(),
+            'data_fim': fim.isoformat(),
+            'data_referencia': atual.hoje.isoformat(),
+        })
+        return jsonify({'success': True, 'data': resultado})
+
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erro ao calcular projeção: {str(e)}'
+        }), 500
+
+
+@analitico_bp.route('/analytics/projection/clients', methods=['GET'])
+@token_required
+@somente_leitura
+def get_projecao_clientes(current_user):
+    """Próximas k datas de contato planejadas de cada cliente, a mais próxima primeiro
+
+    ?k=6&consultor=X&page=&per_page= e os filtros de /analytics/coverage
+    """
+    from src import cobertura, projecao
+
+    try:
+        page, per_page, pagina, por_pagina = parametros_paginacao(request.args)
+        projetada = projecao.obter_projecao(request.args.get('k', 6, type=int))
+        atual = projetada.cobertura
+        posicoes = cobertura.selecionar(atual, _filtros_cobertura())
+
+        ordenadas = projecao.ordenar_por_proxima(projetada, posicoes)
+        pagina_posicoes = ordenadas[(pagina - 1) * por_pagina:pagina * por_pagina]
+        linhas = _com_nomes(cobertura.linhas(atual, pagina_posicoes))
+        datas = projecao.datas_dos_clientes(projetada, pagina_posicoes)
+        for posicao, linha in zip(pagina_posicoes.tolist(), linhas):
+            linha['proximos_contatos'] = datas[posicao]
+
+        return jsonify({
+            'success': True,
+            'data': linhas,
+            'pagination': paginacao(page, per_page, por_pagina, len(posicoes)),
+            'data_referencia': atual.hoje.isoformat()
+        })
+
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erro ao calcular projeção: {str(e)}'
+        }), 500
@@ -1,70 +1,52 @@
 from flask import Blueprint, request, jsonify
-from sqlalchemy import or_, and_
-from models.user import db
-from models.cliente import Cliente
+from sqlalchemy import or_, and_, func
+from src.models.user import db
+from src.models.cliente import Cliente
+from src.models.contato import ContatoRegistrado
+from src.models.auditoria import Auditoria
+from src.auth import master_required
+from src.cache import invalidar, versao, CacheLRU
+from src.instrumentacao import consultas_em_lote
+from src.metricas import registrar_cache
+from src.replica import somente_leitura
+from src.referencias import obter_referencias
+from src.consultas import consulta_clientes, parametros_paginacao, paginacao
 from datetime import datetime
 
 cliente_bp = Blueprint('cliente', __name__)
 
+# Consulta em lote por código: limite por requisição e tamanho do IN
+LOOKUP_MAXIMO = 5000
+LOOKUP_LOTE = 500
+
+# Projeção usada pelo formulário de registro e pela colagem de planilhas
+COLUNAS_LOOKUP = (
+    Cliente.id, Cliente.cod_cliente, Cliente.nome, Cliente.municipio,
+    Cliente.filial, Cliente.classe, Cliente.status_6m
+)
+
+# cod_cliente -> projeção; limpo a cada invalidar('clientes') neste processo
+# e, nos demais workers, após o TTL
+cache_lookup = CacheLRU('clientes', tamanho=5000, ttl=60)
+
 @cliente_bp.route('/clientes', methods=['GET'])
 def get_clientes():
     """Listar clientes com filtros e paginação"""
     try:
-        # Parâmetros de consulta
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 50, type=int)
-        search = request.args.get('search', '')
-        filial = request.args.get('filial', '')
-        classe = request.args.get('classe', '')
-        consultor_pecas = request.args.get('consultor_pecas', '')
-        consultor_servicos = request.args.get('consultor_servicos', '')
+        page, per_page, pagina, por_pagina = parametros_paginacao(request.args)
         
-        # Construir query base
-        query = Cliente.query
-        
-        # Aplicar filtros
-        if search:
-            query = query.filter(
-                or_(
-                    Cliente.nome.ilike(f'%{search}%'),
-                    Cliente.cod_cliente.like(f'%{search}%'),
-                    Cliente.municipio.ilike(f'%{search}%')
-                )
-            )
-        
-        if filial:
-            query = query.filter(Cliente.filial == filial)
-            
-        if classe:
-            query = query.filter(Cliente.classe == classe)
-            
-        if consultor_pecas:
-            query = query.filter(Cliente.consultor_pecas.ilike(f'%{consultor_pecas}%'))
-            
-        if consultor_servicos:
-            query = query.filter(Cliente.consultor_servicos.ilike(f'%{consultor_servicos}%'))
-        
-        # Ordenar por nome
-        query = query.order_by(Cliente.nome)
-        
-        # Paginação
-        clientes_paginated = query.paginate(
-            page=page, 
-            per_page=per_page, 
+        # Filtros de busca compartilhados com o modo ASGI (src/consultas.py)
+        clientes_paginated = db.paginate(
+            consulta_clientes(request.args),
+            page=pagina, 
+            per_page=por_pagina, 
             error_out=False
         )
         
         return jsonify({
             'success': True,
             'data': [cliente.to_dict() for cliente in clientes_paginated.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': clientes_paginated.total,
-                'pages': clientes_paginated.pages,
-                'has_next': clientes_paginated.has_next,
-                'has_prev': clientes_paginated.has_prev
-            }
+            'pagination': paginacao(page, per_page, por_pagina, clientes_paginated.total)
         })
         
     except Exception as e:
@@ -103,6 +85,54 @@ def get_cliente_por_codigo(cod_cliente):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@cliente_bp.route('/clientes/lookup', methods=['POST'])
+@somente_leitura
+def lookup_clientes():
+    """Resolver vários códigos de cliente de uma vez (projeção enxuta)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        codigos = data.get('codigos')
+        if not isinstance(codigos, list):
+            return jsonify({'success': False, 'error': 'Informe a lista "codigos"'}), 400
+        if len(codigos) > LOOKUP_MAXIMO:
+            return jsonify({
+                'success': False,
+                'error': f'Máximo de {LOOKUP_MAXIMO} códigos por consulta'
+            }), 400
+
+        try:
+            # Códigos colados de planilhas chegam como texto ("00123")
+            codigos = list(dict.fromkeys(int(str(c).strip()) for c in codigos))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Códigos devem ser números inteiros'}), 400
+
+        encontrados = cache_lookup.obter_varios(codigos)
+        registrar_cache('clientes_lookup', True, len(encontrados))
+
+        faltantes = [c for c in codigos if c not in encontrados]
+        registrar_cache('clientes_lookup', False, len(faltantes))
+        if faltantes:
+            versao_inicial = versao('clientes')
+            lidos = {}
+            with consultas_em_lote():
+                for i in range(0, len(faltantes), LOOKUP_LOTE):
+                    lote = faltantes[i:i + LOOKUP_LOTE]
+                    for linha in db.session.query(*COLUNAS_LOOKUP).filter(Cliente.cod_cliente.in_(lote)):
+                        lidos[linha.cod_cliente] = dict(linha._mapping)
+            # Não guardar o que pode ter sido alterado durante a consulta
+            if versao('clientes') == versao_inicial:
+                cache_lookup.guardar_varios(lidos)
+            encontrados.update(lidos)
+
+        return jsonify({
+            'success': True,
+            'data': [encontrados[c] for c in codigos if c in encontrados],
+            'nao_encontrados': [c for c in codigos if c not in encontrados]
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @cliente_bp.route('/clientes', methods=['POST'])
 def create_cliente():
     """Criar novo cliente"""
@@ -126,8 +156,10 @@ def create_cliente():
         
         # Criar cliente
         cliente = Cliente.from_dict(data)
+        cliente.atualizar_hash()
         db.session.add(cliente)
         db.session.commit()
+        invalidar('clientes')
         
         return jsonify({
             'success': True,
@@ -178,10 +210,12 @@ def update_cliente(cliente_id):
         if 'consultor_servicos' in data:
             cliente.consultor_servicos = data['consultor_servicos']
         
-        # Atualizar data de modificação
+        # Atualizar data de modificação e hash de conteúdo
         cliente.updated_at = datetime.utcnow()
+        cliente.atualizar_hash()
         
         db.session.commit()
+        invalidar('clientes')
         
         return jsonify({
             'success': True,
@@ -200,15 +234,19 @@ def delete_cliente(cliente_id):
     try:
         cliente = Cliente.query.get_or_404(cliente_id)
         
-        # Verificar se tem contatos associados
-        if cliente.contatos:
+        # Verificar se tem contatos associados (contagem, sem carregar os contatos)
+        total_contatos = db.session.query(func.count(ContatoRegistrado.id)).filter(
+            ContatoRegistrado.cliente_id == cliente.id
+        ).scalar()
+        if total_contatos:
             return jsonify({
                 'success': False,
-                'error': f'Cliente possui {len(cliente.contatos)} contatos registrados. Não é possível excluir.'
+                'error': f'Cliente possui {total_contatos} contatos registrados. Não é possível excluir.'
             }), 400
         
         db.session.delete(cliente)
         db.session.commit()
+        invalidar('clientes')
         
         return jsonify({
             'success': True,
@@ -220,7 +258,108 @@ def delete_cliente(cliente_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@cliente_bp.route('/clientes/reatribuir', methods=['POST'])
+@master_required
+def reatribuir_consultores(current_user):
+    """Reatribuir carteira de clientes entre consultores em lote
+
+    Executa um único UPDATE ... WHERE sobre os clientes que atendem aos
+    filtros (filial, classe e consultor atual). Com "dry_run" apenas
+    conta e mostra uma amostra dos clientes que seriam alterados.
+    """
+    try:
+        data = request.get_json() or {}
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'Corpo da requisição deve ser um objeto JSON'}), 400
+        filtros = data.get('filtros') or {}
+        if not isinstance(filtros, dict):
+            return jsonify({
+                'success': False,
+                'error': '"filtros" deve ser um objeto {campo: valor}'
+            }), 400
+        dry_run = bool(data.get('dry_run', False))
+
+        # Montar condições a partir dos filtros (comparação exata)
+        condicoes = []
+        filtros_aplicados = {}
+        for campo in ('filial', 'classe', 'consultor_pecas', 'consultor_servicos'):
+            valor = filtros.get(campo)
+            if valor:
+                condicoes.append(getattr(Cliente, campo) == valor)
+                filtros_aplicados[campo] = valor
+
+        if not condicoes:
+            return jsonify({
+                'success': False,
+                'error': 'Informe ao menos um filtro (filial, classe, consultor_pecas ou consultor_servicos)'
+            }), 400
+
+        # Novos valores
+        alteracoes = {}
+        if data.get('novo_consultor_pecas'):
+            alteracoes['consultor_pecas'] = data['novo_consultor_pecas']
+        if data.get('novo_consultor_servicos'):
+            alteracoes['consultor_servicos'] = data['novo_consultor_servicos']
+
+        if not alteracoes:
+            return jsonify({
+                'success': False,
+                'error': 'Informe novo_consultor_pecas e/ou novo_consultor_servicos'
+            }), 400
+
+        query = Cliente.query.filter(and_(*condicoes))
+
+        if dry_run:
+            total = query.count()
+            amostra = query.with_entities(
+                Cliente.id, Cliente.cod_cliente, Cliente.nome
+            ).order_by(Cliente.nome).limit(20).all()
+
+            return jsonify({
+                'success': True,
+                'dry_run': True,
+                'registros_afetados': total,
+                'filtros': filtros_aplicados,
+                'alteracoes': alteracoes,
+                'amostra': [
+                    {'id': c.id, 'cod_cliente': c.cod_cliente, 'nome': c.nome}
+                    for c in amostra
+                ]
+            })
+
+        valores = dict(alteracoes)
+        valores['updated_at'] = datetime.utcnow()
+        valores['hash_conteudo'] = None  # Recalculado na próxima importação
+        registros_afetados = query.update(valores, synchronize_session=False)
+
+        Auditoria.registrar(
+            acao='reatribuir_consultor',
+            entidade='clientes',
+            usuario=current_user,
+            filtros=filtros_aplicados,
+            alteracoes=alteracoes,
+            registros_afetados=registros_afetados
+        )
+        db.session.commit()
+
+        invalidar('clientes')
+
+        return jsonify({
+            'success': True,
+            'dry_run': False,
+            'registros_afetados': registros_afetados,
+            'filtros': filtros_aplicados,
+            'alteracoes': alteracoes,
+            'message': f'{registros_afetados} clientes reatribuídos com sucesso'
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @cliente_bp.route('/clientes/stats', methods=['GET'])
+@somente_leitura
 def get_clientes_stats():
     """Obter estatísticas dos clientes"""
     try:
@@ -262,12 +401,9 @@ def get_clientes_stats():
 def get_filiais():
     """Listar todas as filiais únicas"""
     try:
-        filiais = db.session.query(Cliente.filial).distinct().all()
-        filiais_list = [f.filial for f in filiais if f.filial]
-        
         return jsonify({
             'success': True,
-            'data': sorted(filiais_list)
+            'data': list(obter_referencias().filiais)
         })
         
     except Exception as e:
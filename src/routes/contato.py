@@ -1,8 +1,16 @@
 from flask import Blueprint, request, jsonify
-from sqlalchemy import or_, and_, desc, func
-from models.user import db
-from models.cliente import Cliente
-from models.contato import ContatoRegistrado, TipoContato, ResultadoContato, Feriado
+from sqlalchemy import select, cast, or_, desc, func, case
+from src.models.user import db
+from src.models.cliente import Cliente, cadencia_dias
+from src.models.contato import ContatoRegistrado, TipoContato, ResultadoContato
+from src.replica import somente_leitura
+from src.referencias import obter_referencias, obter_registro, eh_feriado
+from src.cache import invalidar
+from src import arquivo
+from src.consultas import (
+    consulta_agenda, item_agenda, consultas_dashboard, montar_dashboard,
+    parametros_paginacao, paginacao
+)
 from datetime import datetime, date, timedelta
 
 contato_bp = Blueprint('contato', __name__)
@@ -29,7 +37,7 @@ def get_contatos():
             query = query.filter(
                 or_(
                     Cliente.nome.ilike(f'%{search}%'),
-                    Cliente.cod_cliente.like(f'%{search}%'),
+                    cast(Cliente.cod_cliente, db.String).like(f'%{search}%'),
                     ContatoRegistrado.observacao.ilike(f'%{search}%')
                 )
             )
@@ -38,12 +46,17 @@ def get_contatos():
             query = query.filter(ContatoRegistrado.vendedor.ilike(f'%{vendedor}%'))
             
         if tipo_contato:
-            query = query.filter(ContatoRegistrado.tipo_contato.ilike(f'%{tipo_contato}%'))
+            query = query.filter(ContatoRegistrado.tipo_contato_id.in_(
+                select(TipoContato.id).where(TipoContato.descricao.ilike(f'%{tipo_contato}%'))
+            ))
             
         if resultado_contato:
-            query = query.filter(ContatoRegistrado.resultado_contato.ilike(f'%{resultado_contato}%'))
+            query = query.filter(ContatoRegistrado.resultado_contato_id.in_(
+                select(ResultadoContato.id).where(ResultadoContato.descricao.ilike(f'%{resultado_contato}%'))
+            ))
         
         # Filtros de data
+        data_inicio_obj = data_fim_obj = None
         if data_inicio:
             try:
                 data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d').date()
@@ -61,6 +74,14 @@ def get_contatos():
         # Ordenar por data mais recente
         query = query.order_by(desc(ContatoRegistrado.data_contato), desc(ContatoRegistrado.hora_contato))
         
+        # Período que alcança meses arquivados: mesclar com o arquivo
+        meses = arquivo.meses_no_periodo(arquivo.indice(db.session), data_inicio_obj, data_fim_obj)
+        if meses:
+            return _listar_com_arquivo(query, meses, data_inicio_obj, data_fim_obj, {
+                'vendedor': vendedor, 'tipo_contato': tipo_contato,
+                'resultado_contato': resultado_contato, 'busca': search
+            })
+        
         # Paginação
         contatos_paginated = query.paginate(
             page=page, 
@@ -85,6 +106,85 @@ def get_contatos():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def _listar_com_arquivo(query, meses, data_inicio, data_fim, filtros):
+    """Página de contatos mesclando a tabela quente e os meses arquivados do período
+
+    Os contatos quentes posteriores ao mês arquivado mais recente vêm antes
+    de qualquer arquivado: páginas só com eles são paginadas no banco, como
+    sem arquivo. Daí em diante, as chaves (id, data, hora) dos quentes mais
+    antigos são intercaladas com as linhas do arquivo, até no máximo
+    arquivo.PROFUNDIDADE_MAXIMA contatos, e só os quentes da página são
+    carregados.
+    """
+    page, per_page, pagina, por_pagina = parametros_paginacao(request.args)
+    limite = pagina * por_pagina
+    inicio = limite - por_pagina
+
+    fronteira = arquivo.proximo_mes(meses[0][0])
+    recentes = ContatoRegistrado.data_contato >= fronteira
+    total_quentes, total_recentes = query.order_by(None).with_entities(
+        func.count(), func.count(case((recentes, 1)))
+    ).one()
+
+    # Contatos do período arquivado (quentes antigos + arquivo) até o fim da página
+    profundidade = max(limite - total_recentes, 0)
+    if profundidade > arquivo.PROFUNDIDADE_MAXIMA:
+        return jsonify({
+            'success': False,
+            'error': f'Página além dos {arquivo.PROFUNDIDADE_MAXIMA} contatos mais recentes do período '
+                     f'arquivado; restrinja data_inicio/data_fim'
+        }), 400
+
+    clientes_busca = set()
+    if filtros['busca']:
+        clientes_busca = set(db.session.scalars(select(Cliente.id).where(or_(
+            Cliente.nome.ilike(f"%{filtros['busca']}%"),
+            cast(Cliente.cod_cliente, db.String).like(f"%{filtros['busca']}%")
+        ))))
+    total_arquivo, arquivados = arquivo.consultar(
+        db.session, meses, profundidade, data_inicio, data_fim, clientes_busca=clientes_busca, **filtros
+    )
+
+    itens = []
+    if inicio < total_recentes:
+        itens = query.offset(inicio).limit(min(limite, total_recentes) - inicio).all()
+
+    if profundidade:
+        antigos = query.filter(~recentes).with_entities(
+            ContatoRegistrado.id, ContatoRegistrado.data_contato, ContatoRegistrado.hora_contato
+        ).limit(profundidade).all()
+        # Mesma ordem da consulta: data e hora do contato, mais recentes primeiro
+        mesclados = sorted(
+            [((data.isoformat(), hora.isoformat() if hora else ''), id_) for id_, data, hora in antigos]
+            + [((linha['data_contato'], linha['hora_contato'] or ''), linha) for linha in arquivados],
+            key=lambda par: par[0], reverse=True
+        )[max(inicio - total_recentes, 0):profundidade]
+
+        ids = [item for _, item in mesclados if not isinstance(item, dict)]
+        carregados = {c.id: c for c in query.filter(ContatoRegistrado.id.in_(ids))} if ids else {}
+        for _, item in mesclados:
+            item = item if isinstance(item, dict) else carregados.get(item)
+            if item is not None:  # excluído entre as consultas
+                itens.append(item)
+
+    ids_clientes = {item['cliente_id'] for item in itens if isinstance(item, dict)}
+    clientes = {}
+    if ids_clientes:
+        clientes = {c.id: c for c in db.session.execute(
+            select(Cliente.id, Cliente.nome, Cliente.cod_cliente).where(Cliente.id.in_(ids_clientes))
+        )}
+
+    return jsonify({
+        'success': True,
+        'data': [
+            arquivo.item_arquivado(item, clientes.get(item['cliente_id'])) if isinstance(item, dict)
+            else item.to_dict()
+            for item in itens
+        ],
+        'pagination': paginacao(page, per_page, por_pagina, total_quentes + total_arquivo)
+    })
+
+
 @contato_bp.route('/contatos', methods=['POST'])
 def create_contato():
     """Registrar novo contato"""
@@ -124,6 +224,7 @@ def create_contato():
         db.session.add(contato)
         db.session.flush()  # Flush para garantir que o ID seja gerado
         db.session.commit()
+        invalidar('contatos')
         
         # Log para debug
         print(f"✅ Contato criado: ID={contato.id}, Cliente={contato.cliente_id}, Vendedor={contato.vendedor}")
@@ -189,6 +290,7 @@ def update_contato(contato_id):
         
         contato.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidar('contatos')
         
         return jsonify({
             'success': True,
@@ -208,6 +310,7 @@ def delete_contato(contato_id):
         contato = ContatoRegistrado.query.get_or_404(contato_id)
         db.session.delete(contato)
         db.session.commit()
+        invalidar('contatos')
         
         return jsonify({
             'success': True,
@@ -220,83 +323,26 @@ def delete_contato(contato_id):
 
 
 @contato_bp.route('/agenda', methods=['GET'])
+@somente_leitura
 def get_agenda():
     """Obter agenda de contatos (próximos contatos agendados)"""
     try:
-        # Parâmetros
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 50, type=int)
-        vendedor = request.args.get('vendedor', '')
-        data_inicio = request.args.get('data_inicio', '')
-        data_fim = request.args.get('data_fim', '')
-        apenas_atrasados = request.args.get('apenas_atrasados', 'false').lower() == 'true'
-        
-        # Query para buscar últimos contatos de cada cliente com próximo contato agendado
-        subquery = db.session.query(
-            ContatoRegistrado.cliente_id,
-            func.max(ContatoRegistrado.data_contato).label('ultima_data')
-        ).group_by(ContatoRegistrado.cliente_id).subquery()
-        
-        query = db.session.query(ContatoRegistrado).join(Cliente).join(
-            subquery,
-            and_(
-                ContatoRegistrado.cliente_id == subquery.c.cliente_id,
-                ContatoRegistrado.data_contato == subquery.c.ultima_data
-            )
-        ).filter(ContatoRegistrado.proximo_contato.isnot(None))
-        
-        # Aplicar filtros
-        if vendedor:
-            query = query.filter(ContatoRegistrado.vendedor.ilike(f'%{vendedor}%'))
-            
-        if data_inicio:
-            try:
-                data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d').date()
-                query = query.filter(ContatoRegistrado.proximo_contato >= data_inicio_obj)
-            except ValueError:
-                pass
-                
-        if data_fim:
-            try:
-                data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d').date()
-                query = query.filter(ContatoRegistrado.proximo_contato <= data_fim_obj)
-            except ValueError:
-                pass
-        
-        if apenas_atrasados:
-            query = query.filter(ContatoRegistrado.proximo_contato < date.today())
-        
-        # Ordenar por data do próximo contato
-        query = query.order_by(ContatoRegistrado.proximo_contato)
-        
-        # Paginação
-        agenda_paginated = query.paginate(
-            page=page, 
-            per_page=per_page, 
+        page, per_page, pagina, por_pagina = parametros_paginacao(request.args)
+        hoje = date.today()
+        
+        # Últimos contatos de cada cliente com próximo contato agendado
+        # (mesma consulta do modo ASGI, ver src/consultas.py)
+        agenda_paginated = db.paginate(
+            consulta_agenda(request.args, hoje),
+            page=pagina, 
+            per_page=por_pagina, 
             error_out=False
         )
         
-        # Adicionar informação de dias de atraso
-        agenda_data = []
-        for contato in agenda_paginated.items:
-            contato_dict = contato.to_dict()
-            if contato.proximo_contato:
-                dias_atraso = (date.today() - contato.proximo_contato).days
-                contato_dict['dias_atraso'] = dias_atraso if dias_atraso > 0 else 0
-                contato_dict['status'] = 'ATRASADO' if dias_atraso > 0 else 'AGENDADO'
-            agenda_data.append(contato_dict)
-        
         return jsonify({
             'success': True,
-            'data': agenda_data,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': agenda_paginated.total,
-                'pages': agenda_paginated.pages,
-                'has_next': agenda_paginated.has_next,
-                'has_prev': agenda_paginated.has_prev
-            }
+            'data': [item_agenda(contato, hoje) for contato in agenda_paginated.items],
+            'pagination': paginacao(page, per_page, por_pagina, agenda_paginated.total)
         })
         
     except Exception as e:
@@ -307,11 +353,7 @@ def get_agenda():
 def get_tipos_contato():
     """Obter tipos de contato disponíveis"""
     try:
-        tipos = TipoContato.query.filter_by(ativo=True).all()
-        return jsonify({
-            'success': True,
-            'data': [tipo.to_dict() for tipo in tipos]
-        })
+        return _lista_de_referencia(obter_registro().tipos)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -320,15 +362,22 @@ def get_tipos_contato():
 def get_resultados_contato():
     """Obter resultados de contato disponíveis"""
     try:
-        resultados = ResultadoContato.query.filter_by(ativo=True).all()
-        return jsonify({
-            'success': True,
-            'data': [resultado.to_dict() for resultado in resultados]
-        })
+        return _lista_de_referencia(obter_registro().resultados)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def _lista_de_referencia(dicionario):
+    """Lista ativa do registro em memória, com ETag (304 se o cliente já tem)"""
+    resposta = jsonify({
+        'success': True,
+        'data': list(dicionario.lista)
+    })
+    # Fraca: a mesma lista vale com ou sem compressão
+    resposta.set_etag(dicionario.etag, weak=True)
+    return resposta.make_conditional(request)
+
+
 def calcular_proximo_contato(data_contato, classe_cliente):
     """Calcular próximo contato baseado na classe do cliente
     
@@ -342,20 +391,9 @@ def calcular_proximo_contato(data_contato, classe_cliente):
     - QQ: 60 dias (bimestral)
     - SC: 60 dias (bimestral)
     """
-    # Normalizar classe para uppercase
-    classe_upper = str(classe_cliente).upper().strip() if classe_cliente else ""
-    
-    # Mapeamento de classes atualizado
-    dias_adicionar = {
-        'AA': 7,    # 1 semana
-        'AM': 15,   # 2 semanas (quinzenal)
-        'AF': 30,   # 1 mês (mensal)
-        'BM': 30,   # 1 mês (mensal)
-        'BF': 30,   # 1 mês (mensal)
-        'ZZ': 30,   # 1 mês (mensal)
-        'QQ': 60,   # 2 meses (bimestral)
-        'SC': 60    # 2 meses (bimestral)
-    }.get(classe_upper, 30)  # Default 30 dias se classe não reconhecida
+    # Mapeamento de classes em CADENCIA_DIAS (src/models/cliente.py);
+    # default 30 dias se classe não reconhecida
+    dias_adicionar = cadencia_dias(classe_cliente)
     
     proximo_contato = data_contato + timedelta(days=dias_adicionar)
     
@@ -365,8 +403,8 @@ def calcular_proximo_contato(data_contato, classe_cliente):
     
     # Verificar feriados e ajustar para próximo dia útil
     try:
-        feriados = [f.data for f in Feriado.query.all()]
-        while proximo_contato in feriados:
+        feriados = obter_registro().feriados
+        while eh_feriado(feriados, proximo_contato):
             proximo_contato += timedelta(days=1)
             # Verificar novamente se não caiu em fim de semana
             while proximo_contato.weekday() >= 5:
@@ -379,76 +417,23 @@ def calcular_proximo_contato(data_contato, classe_cliente):
 
 
 @contato_bp.route('/dashboard/stats', methods=['GET'])
+@somente_leitura
 def get_dashboard_stats():
     """Obter estatísticas para o dashboard"""
     try:
-        # Parâmetros de período
-        data_inicio = request.args.get('data_inicio', '')
-        data_fim = request.args.get('data_fim', '')
-        vendedor = request.args.get('vendedor', '')
+        consultas = consultas_dashboard(request.args, date.today())
         
-        # Query base
-        query = ContatoRegistrado.query
-        
-        # Aplicar filtros de período
-        if data_inicio:
-            try:
-                data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d').date()
-                query = query.filter(ContatoRegistrado.data_contato >= data_inicio_obj)
-            except ValueError:
-                pass
-                
-        if data_fim:
-            try:
-                data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d').date()
-                query = query.filter(ContatoRegistrado.data_contato <= data_fim_obj)
-            except ValueError:
-                pass
-        
-        if vendedor:
-            query = query.filter(ContatoRegistrado.vendedor.ilike(f'%{vendedor}%'))
-        
-        # Total de contatos no período
-        total_contatos = query.count()
-        
-        # Contatos por tipo
-        contatos_por_tipo = db.session.query(
-            ContatoRegistrado.tipo_contato,
-            func.count(ContatoRegistrado.id).label('count')
-        ).filter(ContatoRegistrado.id.in_([c.id for c in query.all()])).group_by(
-            ContatoRegistrado.tipo_contato
-        ).all()
-        
-        # Contatos por resultado
-        contatos_por_resultado = db.session.query(
-            ContatoRegistrado.resultado_contato,
-            func.count(ContatoRegistrado.id).label('count')
-        ).filter(ContatoRegistrado.id.in_([c.id for c in query.all()])).group_by(
-            ContatoRegistrado.resultado_contato
-        ).all()
-        
-        # Contatos por vendedor
-        contatos_por_vendedor = db.session.query(
-            ContatoRegistrado.vendedor,
-            func.count(ContatoRegistrado.id).label('count')
-        ).filter(ContatoRegistrado.id.in_([c.id for c in query.all()])).group_by(
-            ContatoRegistrado.vendedor
-        ).all()
-        
-        # Contatos atrasados
-        contatos_atrasados = ContatoRegistrado.query.filter(
-            ContatoRegistrado.proximo_contato < date.today()
-        ).count()
+        resultados = {
+            'total_contatos': db.session.execute(consultas['total_contatos']).scalar(),
+            'contatos_atrasados': db.session.execute(consultas['contatos_atrasados']).scalar(),
+            'por_tipo': db.session.execute(consultas['por_tipo']).all(),
+            'por_resultado': db.session.execute(consultas['por_resultado']).all(),
+            'por_vendedor': db.session.execute(consultas['por_vendedor']).all()
+        }
         
         return jsonify({
             'success': True,
-            'data': {
-                'total_contatos': total_contatos,
-                'contatos_atrasados': contatos_atrasados,
-                'por_tipo': [{'tipo': t[0], 'count': t[1]} for t in contatos_por_tipo],
-                'por_resultado': [{'resultado': r[0], 'count': r[1]} for r in contatos_por_resultado],
-                'por_vendedor': [{'vendedor': v[0], 'count': v[1]} for v in contatos_por_vendedor]
-            }
+            'data': montar_dashboard(resultados)
         })
         
     except Exception as e:
@@ -459,12 +444,9 @@ def get_dashboard_stats():
 def get_vendedores():
     """Listar todos os vendedores únicos"""
     try:
-        vendedores = db.session.query(ContatoRegistrado.vendedor).distinct().all()
-        vendedores_list = [v.vendedor for v in vendedores if v.vendedor]
-        
         return jsonify({
             'success': True,
-            'data': sorted(vendedores_list)
+            'data': list(obter_referencias().vendedores)
         })
         
     except Exception as e:
@@ -1,13 +1,15 @@
 from flask import Blueprint, jsonify, request
-from models.user import db
-from models.cliente import Cliente
-from models.contato import ContatoRegistrado
+from src.models.user import db
+from src.models.cliente import Cliente
+from src.models.contato import ContatoRegistrado, TipoContato
+from src.replica import somente_leitura
 from datetime import datetime, timedelta
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, cast, Integer
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
 @dashboard_bp.route('/dashboard/stats', methods=['GET'])
+@somente_leitura
 def get_dashboard_stats():
     """Estatísticas para o dashboard com filtros"""
     try:
@@ -77,7 +79,7 @@ def get_dashboard_stats():
         
         # Tipos de contato
         tipos_contato_query = db.session.query(
-            ContatoRegistrado.tipo_contato,
+            ContatoRegistrado.tipo_contato_id,
             func.count(ContatoRegistrado.id).label('total')
         )
         
@@ -93,7 +95,12 @@ def get_dashboard_stats():
                 ContatoRegistrado.data_contato <= datetime.strptime(data_fim, '%Y-%m-%d').date()
             )
         
-        tipos_contato = tipos_contato_query.group_by(ContatoRegistrado.tipo_contato).all()
+        # Agrupado pelo id; a descrição vem da tabela de tipos
+        tipos_por_id = tipos_contato_query.group_by(ContatoRegistrado.tipo_contato_id).subquery()
+        tipos_contato = db.session.query(
+            TipoContato.descricao,
+            cast(func.sum(tipos_por_id.c.total), Integer).label('total')
+        ).join(tipos_por_id, TipoContato.id == tipos_por_id.c.tipo_contato_id).group_by(TipoContato.descricao).all()
         
         # Atividade recente (últimos 10 contatos) - com join para carregar cliente
         atividade_recente = contatos_query.join(Cliente).order_by(
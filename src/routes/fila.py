@@ -0,0 +1,150 @@
+from flask import Blueprint, jsonify, request
+from datetime import datetime, date
+from sqlalchemy import select, func
+from src.models.user import db
+from src.models.cliente import Cliente
+from src.models.fila import ItemFila
+from src.auth import token_required, master_required
+from src.replica import somente_leitura
+from src.consultas import parametros_paginacao, paginacao
+
+fila_bp = Blueprint('fila', __name__)
+
+
+@fila_bp.route('/work-queue', methods=['GET'])
+@token_required
+@somente_leitura
+def get_fila(current_user):
+    """Lista de clientes a contatar por consultor e dia (plano gravado)
+
+    ?consultor=X&data=AAAA-MM-DD&page=&per_page=. Sem data: o primeiro dia
+    do plano a partir de hoje.
+    """
+    try:
+        page, per_page, pagina, por_pagina = parametros_paginacao(request.args)
+        consultor = request.args.get('consultor')
+        data_param = request.args.get('data')
+        if data_param:
+            try:
+                data = datetime.strptime(data_param, '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({'success': False, 'message': 'data deve estar no formato AAAA-MM-DD'}), 400
+        else:
+            data = db.session.execute(
+                select(func.min(ItemFila.data)).where(ItemFila.data >= date.today())
+            ).scalar()
+
+        stmt = select(ItemFila).where(ItemFila.data == data)
+        if consultor:
+            stmt = stmt.where(ItemFila.consultor == consultor)
+        itens = db.paginate(
+            stmt.order_by(ItemFila.consultor, ItemFila.posicao),
+            page=pagina,
+            per_page=por_pagina,
+            error_out=False
+        )
+
+        # Dados do cliente só da página
+        clientes = {
+            c.id: c for c in db.session.execute(
+                select(Cliente).where(Cliente.id.in_([item.cliente_id for item in itens.items]))
+            ).scalars()
+        } if itens.items else {}
+        linhas = []
+        for item in itens.items:
+            cliente = clientes.get(item.cliente_id)
+            if cliente is None:
+                continue  # excluído depois da geração do plano
+            linha = item.to_dict()
+            linha.update({
+                'cliente_nome': cliente.nome,
+                'cod_cliente': cliente.cod_cliente,
+                'filial': cliente.filial,
+                'classe': cliente.classe,
+                'potencial_pecas': cliente.potencial_pecas,
+                'potencial_servico': cliente.potencial_servico
+            })
+            linhas.append(linha)
+
+        return jsonify({
+            'success': True,
+            'data': linhas,
+            'data_referencia': data.isoformat() if data else None,
+            'pagination': paginacao(page, per_page, por_pagina, itens.total)
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erro ao obter fila de trabalho: {str(e)}'
+        }), 500
+
+
+@fila_bp.route('/work-queue/summary', methods=['GET'])
+@token_required
+@somente_leitura
+def get_fila_resumo(current_user):
+    """Clientes planejados por consultor e dia"""
+    try:
+        linhas = db.session.execute(
+            select(ItemFila.consultor, ItemFila.data, func.count(), func.max(ItemFila.gerado_em))
+            .group_by(ItemFila.consultor, ItemFila.data)
+            .order_by(ItemFila.consultor, ItemFila.data)
+        ).all()
+
+        consultores = {}
+        gerado_em = None
+        for consultor, data, quantidade, gerado in linhas:
+            resumo = consultores.setdefault(consultor, {'consultor': consultor, 'total': 0, 'dias': {}})
+            resumo['total'] += quantidade
+            resumo['dias'][data.isoformat()] = quantidade
+            gerado_em = max(gerado_em, gerado) if gerado_em else gerado
+
+        return jsonify({
+            'success': True,
+            'data': list(consultores.values()),
+            'gerado_em': gerado_em.isoformat() if gerado_em else None
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erro ao obter resumo da fila: {str(e)}'
+        }), 500
+
+
+@fila_bp.route('/work-queue/generate', methods=['POST'])
+@master_required
+def gerar_fila(current_user):
+    """Recalcula o plano a partir da cobertura atual e substitui o anterior
+
+    JSON opcional: {"capacidade": 20, "capacidades": {"Consultor": 10}, "dias": 10}
+    """
+    from src import fila
+
+    try:
+        dados = request.get_json(silent=True) or {}
+        capacidades = dados.get('capacidades') or {}
+        if not isinstance(capacidades, dict):
+            return jsonify({'success': False, 'message': '"capacidades" deve ser um objeto {consultor: número}'}), 400
+        try:
+            capacidade = int(dados['capacidade']) if dados.get('capacidade') is not None else None
+            dias = int(dados['dias']) if dados.get('dias') is not None else None
+            capacidades = {str(nome): int(valor) for nome, valor in capacidades.items()}
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'capacidade e dias devem ser números inteiros'}), 400
+
+        return jsonify({
+            'success': True,
+            'data': fila.gerar(capacidade, capacidades, dias)
+        })
+
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Erro ao gerar fila de trabalho: {str(e)}'
+        }), 500
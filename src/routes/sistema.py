@@ -0,0 +1,114 @@
+from flask import Blueprint, jsonify, request, current_app, Response
+import json
+import os
+from src.models.user import db
+from src.auth import master_required
+from src.pool_stats import estatisticas_pool, espera_checkout
+from src.instrumentacao import relatorio_endpoints
+from src.perfilamento import listar_perfis, carregar_perfil, formato_collapsed, formato_speedscope
+
+sistema_bp = Blueprint('sistema', __name__)
+
+@sistema_bp.route('/sistema/pool', methods=['GET'])
+@master_required
+def get_pool_stats(current_user):
+    """Estatísticas do pool de conexões deste processo (worker)"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': {
+                'pid': os.getpid(),
+                'pool': estatisticas_pool(db.engine)
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erro ao obter estatísticas do pool: {str(e)}'
+        }), 500
+
+
+@sistema_bp.route('/sistema/pool/reset', methods=['POST'])
+@master_required
+def reset_pool_stats(current_user):
+    """Zerar o histograma de espera do pool deste processo"""
+    espera_checkout.resetar()
+    return jsonify({
+        'success': True,
+        'message': 'Histograma de espera zerado'
+    })
+
+
+@sistema_bp.route('/sistema/sql', methods=['GET'])
+@master_required
+def get_sql_stats(current_user):
+    """Endpoints mais lentos deste processo (últimas requisições de cada um)"""
+    try:
+        top = request.args.get('top', 10, type=int)
+        return jsonify({
+            'success': True,
+            'data': {
+                'pid': os.getpid(),
+                'endpoints': relatorio_endpoints.top(top)
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erro ao obter relatório de SQL: {str(e)}'
+        }), 500
+
+
+@sistema_bp.route('/sistema/sql/reset', methods=['POST'])
+@master_required
+def reset_sql_stats(current_user):
+    """Zerar o relatório de endpoints lentos deste processo"""
+    relatorio_endpoints.resetar()
+    return jsonify({
+        'success': True,
+        'message': 'Relatório de SQL zerado'
+    })
+
+
+@sistema_bp.route('/sistema/perfis', methods=['GET'])
+@master_required
+def get_perfis(current_user):
+    """Perfis de requisições gravados (todos os workers), mais recentes primeiro"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': listar_perfis(current_app.config['PERFIL_DIRETORIO'])
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erro ao listar perfis: {str(e)}'
+        }), 500
+
+
+@sistema_bp.route('/sistema/perfis/<perfil_id>', methods=['GET'])
+@master_required
+def download_perfil(current_user, perfil_id):
+    """Baixar um perfil no formato speedscope (padrão) ou collapsed"""
+    perfil = carregar_perfil(current_app.config['PERFIL_DIRETORIO'], perfil_id)
+    if perfil is None:
+        return jsonify({
+            'success': False,
+            'message': 'Perfil não encontrado'
+        }), 404
+
+    formato = request.args.get('formato', 'speedscope')
+    if formato == 'collapsed':
+        corpo, mimetype, extensao = formato_collapsed(perfil), 'text/plain', 'txt'
+    elif formato == 'speedscope':
+        corpo = json.dumps(formato_speedscope(perfil), ensure_ascii=False)
+        mimetype, extensao = 'application/json', 'speedscope.json'
+    else:
+        return jsonify({
+            'success': False,
+            'message': 'Formato inválido. Use speedscope ou collapsed'
+        }), 400
+
+    return Response(corpo, mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=perfil-{perfil_id}.{extensao}'
+    })
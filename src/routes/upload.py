@@ -1,10 +1,14 @@
 from flask import Blueprint, request, jsonify, send_file
 from werkzeug.utils import secure_filename
 import os
-from models.cliente import Cliente
-from models.user import db
+from src.models.cliente import Cliente
+from src.models.user import db
+from src.importacao import substituir_clientes
+from src.cache import invalidar
+from src.instrumentacao import consultas_em_lote
+from src.metricas import registrar_importacao
+from datetime import datetime, date
 import tempfile
-from openpyxl import Workbook, load_workbook
 
 upload_bp = Blueprint('upload', __name__)
 
@@ -27,7 +31,7 @@ def upload_clientes():
             return jsonify({'success': False, 'message': 'Tipo de arquivo não permitido'}), 400
         
         # Obter modo de upload (add ou replace)
-        upload_mode = request.form.get('mode', 'add')  # Default: adicionar
+        upload_mode = 'replace' if request.form.get('mode') == 'replace' else 'add'  # Default: adicionar
         
         # Salvar arquivo temporariamente
         filename = secure_filename(file.filename)
@@ -35,7 +39,9 @@ def upload_clientes():
         file.save(temp_path)
         
         try:
-            # Ler planilha Excel usando openpyxl
+            # Ler planilha Excel usando openpyxl (importado só aqui: carrega também
+            # o numpy e não é necessário no restante do processo web)
+            from openpyxl import load_workbook
             wb = load_workbook(temp_path)
             
             # Tentar encontrar a aba de clientes
@@ -69,7 +75,8 @@ def upload_clientes():
                 'POTENCIAL_SERVICO': ['POTENCIAL_SERVICO', 'POTENCIAL SERVICO', 'SERVICO'],
                 'STATUS_6M': ['STATUS_6M', 'STATUS 6M', 'STATUS'],
                 'CONSULTOR_PECAS': ['CONSULTOR_PECAS', 'CONSULTOR PECAS', 'VENDEDOR_PECAS'],
-                'CONSULTOR_SERVICOS': ['CONSULTOR_SERVICOS', 'CONSULTOR SERVICOS', 'VENDEDOR_SERVICOS']
+                'CONSULTOR_SERVICOS': ['CONSULTOR_SERVICOS', 'CONSULTOR SERVICOS', 'VENDEDOR_SERVICOS'],
+                'ULTIMA_MOV': ['ULTIMA_MOV', 'ULTIMA MOV', 'ÚLTIMA MOV.', 'ULTIMA_MOVIMENTACAO']
             }
             
             # Encontrar índices das colunas
@@ -89,16 +96,15 @@ def upload_clientes():
                     'message': f'Colunas obrigatórias não encontradas: {", ".join(missing_fields)}'
                 }), 400
             
-            # Limpar dados existentes apenas se modo for 'replace'
-            if upload_mode == 'replace':
-                Cliente.query.delete()
-                db.session.commit()
-            
             # Processar dados
             imported = 0
             updated = 0
+            unchanged = 0
+            removed = 0
+            kept = 0
             errors = 0
             skipped = 0  # Para modo 'add' quando cliente já existe
+            registros = []
             
             for row_num in range(2, ws.max_row + 1):  # Começar da linha 2 (pular cabeçalho)
                 try:
@@ -143,56 +149,91 @@ def upload_clientes():
                     consultor_pecas = str(row[column_indices['CONSULTOR_PECAS']]) if column_indices.get('CONSULTOR_PECAS') is not None and row[column_indices['CONSULTOR_PECAS']] else None
                     consultor_servicos = str(row[column_indices['CONSULTOR_SERVICOS']]) if column_indices.get('CONSULTOR_SERVICOS') is not None and row[column_indices['CONSULTOR_SERVICOS']] else None
                     
-                    # Verificar se cliente já existe
-                    existing_cliente = Cliente.query.filter_by(cod_cliente=cod_cliente).first()
-                    
-                    if existing_cliente:
-                        if upload_mode == 'add':
-                            # No modo 'add', pular clientes existentes
-                            skipped += 1
-                            continue
+                    # Data da última movimentação (opcional)
+                    ultima_mov = None
+                    if column_indices.get('ULTIMA_MOV') is not None and row[column_indices['ULTIMA_MOV']]:
+                        valor = row[column_indices['ULTIMA_MOV']]
+                        if isinstance(valor, datetime):
+                            ultima_mov = valor.date()
+                        elif isinstance(valor, date):
+                            ultima_mov = valor
                         else:
-                            # No modo 'replace', atualizar cliente existente
-                            existing_cliente.nome = nome
-                            existing_cliente.municipio = municipio
-                            existing_cliente.filial = filial
-                            existing_cliente.classe = classe
-                            existing_cliente.potencial_pecas = potencial_pecas
-                            existing_cliente.potencial_servico = potencial_servico
-                            existing_cliente.status_6m = status_6m
-                            existing_cliente.consultor_pecas = consultor_pecas
-                            existing_cliente.consultor_servicos = consultor_servicos
-                            updated += 1
-                    else:
-                        # Criar novo cliente
-                        cliente = Cliente(
-                            nome=nome,
-                            cod_cliente=cod_cliente,
-                            municipio=municipio,
-                            filial=filial,
-                            classe=classe,
-                            potencial_pecas=potencial_pecas,
-                            potencial_servico=potencial_servico,
-                            status_6m=status_6m,
-                            consultor_pecas=consultor_pecas,
-                            consultor_servicos=consultor_servicos
-                        )
-                        db.session.add(cliente)
-                        imported += 1
+                            try:
+                                ultima_mov = datetime.strptime(str(valor).strip(), '%Y-%m-%d').date()
+                            except ValueError:
+                                pass
+                    
+                    registros.append({
+                        'nome': nome,
+                        'cod_cliente': cod_cliente,
+                        'municipio': municipio,
+                        'filial': filial,
+                        'classe': classe,
+                        'potencial_pecas': potencial_pecas,
+                        'potencial_servico': potencial_servico,
+                        'status_6m': status_6m,
+                        'ultima_mov': ultima_mov,
+                        'consultor_pecas': consultor_pecas,
+                        'consultor_servicos': consultor_servicos
+                    })
                         
                 except Exception as e:
                     print(f"Erro ao processar linha {row_num}: {str(e)}")
                     errors += 1
                     continue
             
-            # Salvar alterações
-            db.session.commit()
+            if upload_mode == 'replace':
+                # Troca via tabela de staging: aplica apenas o que mudou,
+                # preservando clientes com histórico de contatos
+                resultado = substituir_clientes(registros)
+                imported = resultado['novos']
+                updated = resultado['alterados']
+                unchanged = resultado['inalterados']
+                removed = resultado['removidos']
+                kept = resultado['mantidos']
+            else:
+                # No modo 'add', pular clientes existentes (uma consulta por lote de códigos)
+                codigos = list({r['cod_cliente'] for r in registros})
+                existentes = set()
+                with consultas_em_lote():
+                    for i in range(0, len(codigos), 500):
+                        lote = codigos[i:i + 500]
+                        existentes.update(
+                            c for (c,) in db.session.query(Cliente.cod_cliente).filter(Cliente.cod_cliente.in_(lote))
+                        )
+                
+                novos = []
+                for registro in registros:
+                    if registro['cod_cliente'] in existentes:
+                        skipped += 1
+                        continue
+                    novos.append(dict(registro, hash_conteudo=Cliente.calcular_hash(registro)))
+                    existentes.add(registro['cod_cliente'])
+                    imported += 1
+                
+                # Um INSERT em lote (executemany) em vez de um por cliente
+                db.session.bulk_insert_mappings(Cliente, novos)
+                
+                # Salvar alterações
+                db.session.commit()
+            
+            invalidar('clientes')
+            registrar_importacao('upload', upload_mode, 'sucesso', {
+                'novos': imported,
+                'alterados': updated,
+                'inalterados': unchanged,
+                'removidos': removed,
+                'ignorados': skipped,
+                'erros': errors
+            })
             
             # Preparar mensagem baseada no modo
             if upload_mode == 'add':
                 message = f'Clientes adicionados com sucesso! {skipped} clientes já existentes foram ignorados.'
             else:
-                message = f'Base de clientes substituída com sucesso!'
+                message = f'Base de clientes substituída com sucesso! {unchanged} clientes sem alteração.'
+                if kept:
+                    message += f' {kept} clientes fora da planilha foram mantidos por possuírem contatos.'
             
             return jsonify({
                 'success': True,
@@ -201,13 +242,17 @@ def upload_clientes():
                     'imported': imported,
                     'updated': updated,
                     'skipped': skipped if upload_mode == 'add' else 0,
-                    'total': imported + updated,
+                    'unchanged': unchanged,
+                    'removed': removed,
+                    'kept': kept,
+                    'total': imported + updated + unchanged,
                     'errors': errors,
                     'mode': upload_mode
                 }
             })
             
         except Exception as e:
+            registrar_importacao('upload', upload_mode, 'erro')
             return jsonify({
                 'success': False,
                 'message': f'Erro ao processar arquivo: {str(e)}'
@@ -227,6 +272,8 @@ def upload_clientes():
 @upload_bp.route('/download-template', methods=['GET'])
 def download_template():
     try:
+        from openpyxl import Workbook
+        
         # Criar workbook com template
         wb = Workbook()
         ws = wb.active
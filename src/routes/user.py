@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
-from models.user import User, db
-from auth import generate_token, token_required, master_required
+from src.models.user import User, db
+from src.auth import generate_token, token_required, master_required
+from src.replica import somente_leitura
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 
@@ -343,6 +344,7 @@ def reset_password(user_id):
         }), 500
 
 @user_bp.route('/users/stats', methods=['GET'])
+@somente_leitura
 def get_user_stats():
     """Estatísticas dos usuários"""
     try: